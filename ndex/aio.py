@@ -0,0 +1,347 @@
+"""An asyncio client for NDEx, built on aiohttp.
+
+AsyncNdex has the network methods of ndex.client.Ndex as coroutines, so that
+many requests can be in flight at once::
+
+    async with AsyncNdex('http://public.ndexbio.org', max_concurrency=20) as ndex:
+        summaries = await asyncio.gather(*[ndex.get_network_summary(uuid) for uuid in uuids])
+
+At most max_concurrency requests are sent at the same time.  The server
+version is detected once and shared with the Ndex clients through their
+registry.  Requires Python 3.5 or later and aiohttp.
+"""
+
+import asyncio
+import json
+
+import ndex.client as nc
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+#: Default number of requests an AsyncNdex sends at the same time
+MAX_CONCURRENCY = 10
+
+
+class _StreamedResponse(object):
+    # An aiohttp response whose body is read by the caller.  It holds a place among the max_concurrency requests of
+    # the client until it is released or closed.
+
+    def __init__(self, response, semaphore):
+        self._response = response
+        self._semaphore = semaphore
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def _free(self):
+        if self._semaphore is not None:
+            semaphore, self._semaphore = self._semaphore, None
+            semaphore.release()
+
+    def release(self):
+        try:
+            return self._response.release()
+        finally:
+            self._free()
+
+    def close(self):
+        try:
+            self._response.close()
+        finally:
+            self._free()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+
+class AsyncNdex(object):
+    """An asyncio connection to an NDEx server.
+
+    The aiohttp session is created on the first request, in the running event loop; close the client (or use it
+    as an async context manager) when done.
+    """
+
+    def __init__(self, host=None, username=None, password=None, max_concurrency=MAX_CONCURRENCY, registry=None,
+                 debug=False):
+        """Creates a connection to a particular NDEx server.
+
+        :param host: The URL of the server. Defaults to http://public.ndexbio.org.
+        :type host: str
+        :param username: The username of the NDEx account to use. (Optional)
+        :type username: str
+        :param password: The account password. (Optional)
+        :type password: str
+        :param max_concurrency: The maximum number of requests in flight, and of open connections.
+        :type max_concurrency: int
+        :param registry: Where the server version is shared.  Defaults to ndex.client.DEFAULT_REGISTRY.
+        :type registry: ndex.client.NdexRegistry
+        """
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for AsyncNdex")
+        self.server_url = host or nc.DEFAULT_SERVER
+        self.username = username
+        self.password = password
+        self.max_concurrency = max_concurrency
+        self.registry = registry or nc.DEFAULT_REGISTRY
+        self.debug = debug
+        self.status = {}
+        self.version = None
+        self.host = None
+        self._session = None
+        self._semaphore = None
+        self._detect_lock = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            auth = aiohttp.BasicAuth(self.username, self.password) if self.username and self.password else None
+            self._session = aiohttp.ClientSession(
+                auth=auth, headers={'User-Agent': nc.userAgent},
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._detect_lock = asyncio.Lock()
+        return self._session
+
+    async def _server(self):
+        # Detect the server version once per server, unless a client of the registry already did.
+        server = self.registry.known_server(self.server_url)
+        if server is None:
+            session = self._get_session()
+            async with self._detect_lock:
+                server = self.registry.known_server(self.server_url)
+                if server is None:
+                    server = await self._detect_server(session)
+                    server = self.registry.add_server(self.server_url, server)
+        if self.version is None:
+            self.version = server[0]
+        if self.host is None:
+            self.host = server[1]
+
+    async def _detect_server(self, session):
+        host = self.server_url
+        if "localhost" in host:
+            return 1.3, "http://localhost:8080/ndexbio-rest"
+        async with self._semaphore:
+            async with session.get(nc.urljoin(host, "/rest/admin/status")) as response:
+                try:
+                    response.raise_for_status()
+                except aiohttp.ClientResponseError as error:
+                    return nc.Ndex._server_from_status(host, None, error)
+                return nc.Ndex._server_from_status(host, await response.json(content_type=None))
+
+    def require_auth(self):
+        if not (self.username and self.password):
+            raise Exception("this method requires user authentication")
+
+    async def _request(self, method, route, data=None, headers=None, params=None, result='json'):
+        # Send a request and return its response: decoded JSON ('json'), JSON or text depending on the content
+        # type ('text'), or the response itself with the body unread ('response').
+        session = self._get_session()
+        if self.host is None or self.version is None:
+            await self._server()
+        url = self.host + route
+        if self.debug:
+            print("%s route: %s" % (method, url))
+        await self._semaphore.acquire()
+        held = False
+        try:
+            response = await session.request(method, url, data=data, headers=headers, params=params)
+            if self.debug:
+                print("status code: " + str(response.status))
+            if result == 'response':
+                if response.status >= 400:
+                    response.release()
+                response.raise_for_status()
+                # The body is read by the caller: the request counts against max_concurrency until it is released.
+                held = True
+                return _StreamedResponse(response, self._semaphore)
+            async with response:
+                response.raise_for_status()
+                if response.status == 204:
+                    return None if method == 'GET' else ""
+                if result == 'json' or response.content_type == 'application/json':
+                    return await response.json(content_type=None)
+                return await response.text()
+        finally:
+            if not held:
+                self._semaphore.release()
+
+    async def get(self, route, get_params=None):
+        return await self._request('GET', route, params=get_params)
+
+    async def put(self, route, put_json=None):
+        headers = {'Content-Type': 'application/json;charset=UTF-8', 'Accept': 'application/json'}
+        return await self._request('PUT', route, data=put_json, headers=headers, result='text')
+
+    async def post(self, route, post_json):
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json,text/plain',
+                   'Cache-Control': 'no-cache'}
+        return await self._request('POST', route, data=post_json, headers=headers, result='text')
+
+    async def delete(self, route):
+        return await self._request('DELETE', route)
+
+    async def get_stream(self, route, get_params=None):
+        return await self._request('GET', route, params=get_params, result='response')
+
+    async def _multipart(self, method, route, cx_stream, params=None):
+        form = aiohttp.FormData()
+        form.add_field('CXNetworkStream', nc.Ndex._cx_upload_stream(cx_stream), filename='filename',
+                       content_type='application/octet-stream')
+        return await self._request(method, route, data=form, params=params, result='text')
+
+    # Network methods
+
+    async def update_status(self):
+        self.status = await self.get("/admin/status")
+        return self.status
+
+    async def get_network_summary(self, network_id):
+        """Gets information about a network.
+
+        :param network_id: The UUID of the network.
+        :type network_id: str
+        :return: The network summary.
+        :rtype: dict
+        """
+        await self._server()
+        if self.version == "2.0":
+            route = "/network/%s/summary" % network_id
+        else:
+            route = "/network/%s" % network_id
+        return await self.get(route)
+
+    async def get_network_as_cx_stream(self, network_id):
+        """Get the network with UUID network_id as a CX stream.
+
+        The body is not read: iterate over ``response.content`` (e.g. ``response.content.iter_chunked(n)``), then
+        call ``response.release()``, or use the response as an async context manager.  The connection, and one of
+        the max_concurrency requests of the client, stay in use until then.
+
+        :param network_id: The UUID of the network.
+        :type network_id: str
+        :return: The response.
+        :rtype: aiohttp.ClientResponse
+        """
+        await self._server()
+        if self.version == "2.0":
+            route = "/network/%s" % network_id
+        else:
+            route = "/network/%s/asCX" % network_id
+        return await self.get_stream(route)
+
+    async def get_network_as_cx(self, network_id):
+        """Get the network with UUID network_id as a list of CX aspect fragments."""
+        response = await self.get_network_as_cx_stream(network_id)
+        try:
+            return json.loads((await response.read()).decode('utf-8'))
+        finally:
+            response.release()
+
+    async def search_networks(self, search_string="", account_name=None, start=0, size=100, include_groups=False):
+        """Search for networks based on the search_string, optionally limited to networks owned by account_name.
+
+        :param start: The number of blocks to skip.
+        :type start: int
+        :param size: The size of the block.
+        :type size: int
+        :return: The search result.
+        :rtype: dict
+        """
+        await self._server()
+        post_data = {"searchString": search_string}
+        if self.version == "2.0":
+            route = "/search/network?start=%s&size=%s" % (start, size)
+            if include_groups:
+                post_data["includeGroups"] = True
+        else:
+            route = "/network/search/%s/%s" % (start, size)
+        if account_name:
+            post_data["accountName"] = account_name
+        return await self.post(route, json.dumps(post_data))
+
+    async def save_new_network(self, cx, visibility=None, indexed_fields=None):
+        """Create a new network from cx, which is encoded while it is uploaded.
+
+        :param cx: The network, in any of the forms Ndex.save_new_network accepts.
+        :return: The URL of the new network.
+        :rtype: str
+        """
+        if isinstance(cx, list) and len(cx) > 0 and cx[-1] is None:
+            cx = cx[:-1]
+        return await self.save_cx_stream_as_new_network(cx, visibility=visibility, indexed_fields=indexed_fields)
+
+    async def save_cx_stream_as_new_network(self, cx_stream, visibility=None, indexed_fields=None):
+        self.require_auth()
+        await self._server()
+        params = {}
+        if visibility:
+            params['visibility'] = visibility
+        if indexed_fields:
+            params['indexedfields'] = ','.join(indexed_fields)
+        route = '/network' if self.version == "2.0" else '/network/asCX'
+        return await self._multipart('POST', route, cx_stream, params=params or None)
+
+    async def update_cx_network(self, cx_stream, network_id):
+        """Update the network with UUID network_id from cx_stream, in any of the forms save_new_network accepts."""
+        self.require_auth()
+        await self._server()
+        if self.version == "2.0":
+            route = "/network/%s" % network_id
+        else:
+            route = '/network/asCX/%s' % network_id
+        return await self._multipart('PUT', route, cx_stream)
+
+    async def set_network_properties(self, network_id, network_properties):
+        self.require_auth()
+        route = "/network/%s/properties" % network_id
+        if isinstance(network_properties, list):
+            put_json = json.dumps(network_properties)
+        elif isinstance(network_properties, nc.basestring):
+            put_json = network_properties
+        else:
+            raise Exception("network_properties must be a string or a list of NdexPropertyValuePair objects")
+        return await self.put(route, put_json)
+
+    # Permissions
+
+    async def update_network_group_permission(self, groupid, networkid, permission):
+        route = "/network/%s/permission?groupid=%s&permission=%s" % (networkid, groupid, permission)
+        return await self.put(route)
+
+    async def update_network_user_permission(self, userid, networkid, permission):
+        route = "/network/%s/permission?userid=%s&permission=%s" % (networkid, userid, permission)
+        return await self.put(route)
+
+    async def grant_networks_to_group(self, groupid, networkids, permission="READ"):
+        """Grant permission on all networkids to the group, with the requests sent concurrently."""
+        return await asyncio.gather(*[self.update_network_group_permission(groupid, networkid, permission)
+                                      for networkid in networkids])
+
+    async def grant_networks_to_user(self, userid, networkids, permission="READ"):
+        """Grant permission on all networkids to the user, with the requests sent concurrently."""
+        return await asyncio.gather(*[self.update_network_user_permission(userid, networkid, permission)
+                                      for networkid in networkids])
+
+    async def get_user_by_username(self, username):
+        return await self.get("/user?username=%s" % username)
+
+    async def grant_network_to_user_by_username(self, username, network_id, permission):
+        user = await self.get_user_by_username(username)
+        return await self.update_network_user_permission(user["externalId"], network_id, permission)
@@ -0,0 +1,364 @@
+"""Columnar storage for node and edge attributes.
+
+By default an NdexGraph keeps every attribute in the per-element dict of the
+underlying networkx graph.  An AttributeStore keeps them by column instead:
+one column per attribute name, holding the values of all elements in a typed
+array (double, integer and boolean columns) or a plain list (everything
+else), together with the CX data type ('d') of the column.  Element ids are
+mapped to rows once per store, so an attribute costs a few bytes per element
+instead of a dict entry and a boxed Python value.
+
+Columns can be filtered value by value (ids_where) and, if numpy is installed,
+exported and filtered as numpy arrays (to_numpy, ids_where_array).
+"""
+
+from array import array
+from ndex.create_aspect import domain
+from six import string_types
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    array('q')
+    _INT_TYPECODE = 'q'
+except ValueError:
+    _INT_TYPECODE = 'l'
+
+# CX data type -> (array typecode, Python type of the values it stores)
+_TYPED_COLUMNS = {
+    'double': ('d', float),
+    'float': ('d', float),
+    'integer': (_INT_TYPECODE, int),
+    'long': (_INT_TYPECODE, int),
+    'short': (_INT_TYPECODE, int),
+    'boolean': ('b', bool),
+}
+
+
+class AttributeColumn(object):
+    """The values of one attribute, by row.
+
+    data_type is the CX data type of the column, or None if the values have
+    different types, in which case the type of each value is derived from the
+    value itself on output.
+    """
+
+    def __init__(self, data_type):
+        self.data_type = data_type
+        typed = _TYPED_COLUMNS.get(data_type)
+        if typed:
+            self.values = array(typed[0])
+            self.value_type = typed[1]
+        else:
+            self.values = []
+            self.value_type = None
+        self.present = bytearray()
+        self.count = 0
+        # Equal strings share one object; attribute values such as types or sources repeat a lot.
+        self._strings = {}
+
+    def _grow(self, size):
+        missing = size - len(self.present)
+        if missing > 0:
+            if self.value_type is None:
+                self.values.extend([None] * missing)
+            else:
+                self.values.extend(array(self.values.typecode, [0]) * missing)
+            self.present.extend(bytearray(missing))
+
+    def _untype(self):
+        # Fall back to a list once a value does not fit the typed array.
+        if self.value_type is not None:
+            value_type = self.value_type
+            self.values = [value_type(v) if p else None for v, p in zip(self.values, self.present)]
+            self.value_type = None
+
+    def accepts(self, value, data_type):
+        return (data_type == self.data_type and
+                (self.value_type is None or type(value) is self.value_type))
+
+    def set(self, row, value, data_type):
+        if not self.accepts(value, data_type):
+            self._untype()
+            if data_type != self.data_type:
+                self.data_type = None
+        self._grow(row + 1)
+        if self.value_type is not None:
+            try:
+                self.values[row] = value
+            except OverflowError:
+                self._untype()
+                self.values[row] = value
+        else:
+            if isinstance(value, string_types):
+                value = self._strings.setdefault(value, value)
+            self.values[row] = value
+        if not self.present[row]:
+            self.present[row] = 1
+            self.count += 1
+
+    def get(self, row, default=None):
+        if row < len(self.present) and self.present[row]:
+            value = self.values[row]
+            return value if self.value_type is None else self.value_type(value)
+        return default
+
+    def has(self, row):
+        return row < len(self.present) and self.present[row] == 1
+
+    def clear(self, row):
+        if row < len(self.present) and self.present[row]:
+            self.present[row] = 0
+            if self.value_type is None:
+                self.values[row] = None
+            self.count -= 1
+
+    def rows(self):
+        """The rows that have a value."""
+        present = self.present
+        return (row for row in range(len(present)) if present[row])
+
+
+class AttributeStore(object):
+    """Attributes of the nodes or the edges of a graph, stored by column."""
+
+    def __init__(self):
+        self.columns = {}
+        self._rows = {}
+        self._ids = []
+        self._free = []
+
+    def __len__(self):
+        return sum(column.count for column in self.columns.values())
+
+    def __contains__(self, name):
+        column = self.columns.get(name)
+        return column is not None and column.count > 0
+
+    def _row(self, element_id):
+        row = self._rows.get(element_id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+                self._ids[row] = element_id
+            else:
+                row = len(self._ids)
+                self._ids.append(element_id)
+            self._rows[element_id] = row
+        return row
+
+    def names(self):
+        """The names of the attributes that are set on at least one element."""
+        return [name for name, column in self.columns.items() if column.count > 0]
+
+    def set(self, element_id, name, value, data_type=None):
+        """Set attribute name of element_id to value.
+
+        :param data_type: The CX data type of value.  Derived from the value if not given.
+        :type data_type: str
+        """
+        if data_type is None:
+            data_type = domain(value)
+        column = self.columns.get(name)
+        if column is None:
+            column = self.columns[name] = AttributeColumn(data_type)
+        column.set(self._row(element_id), value, data_type)
+
+    def get(self, element_id, name, default=None):
+        column = self.columns.get(name)
+        row = self._rows.get(element_id)
+        if column is None or row is None:
+            return default
+        return column.get(row, default)
+
+    def has(self, element_id, name):
+        column = self.columns.get(name)
+        row = self._rows.get(element_id)
+        return column is not None and row is not None and column.has(row)
+
+    def pop(self, element_id, name, default=None):
+        column = self.columns.get(name)
+        row = self._rows.get(element_id)
+        if column is None or row is None or not column.has(row):
+            return default
+        value = column.get(row)
+        column.clear(row)
+        return value
+
+    def attributes(self, element_id):
+        """All attributes of element_id, as a new dict."""
+        row = self._rows.get(element_id)
+        if row is None:
+            return {}
+        return dict((name, column.get(row)) for name, column in self.columns.items() if column.has(row))
+
+    def remove(self, element_id):
+        """Remove all attributes of element_id."""
+        row = self._rows.pop(element_id, None)
+        if row is not None:
+            for column in self.columns.values():
+                column.clear(row)
+            self._ids[row] = None
+            self._free.append(row)
+
+    def clear(self):
+        self.__init__()
+
+    def subset(self, element_ids):
+        """A new store with the attributes of the elements element_ids, in columns of the same data types."""
+        store = AttributeStore()
+        for element_id in element_ids:
+            row = self._rows.get(element_id)
+            if row is None:
+                continue
+            for name, column in self.columns.items():
+                if column.has(row):
+                    copy = store.columns.get(name)
+                    if copy is None:
+                        copy = store.columns[name] = AttributeColumn(column.data_type)
+                    copy.set(store._row(element_id), column.get(row), column.data_type)
+        return store
+
+    def items(self, name):
+        """Generate the (element id, value) pairs of attribute name."""
+        column = self.columns.get(name)
+        if column is None:
+            return
+        ids = self._ids
+        for row in column.rows():
+            yield ids[row], column.get(row)
+
+    def find(self, name, value):
+        """The ids of the elements whose attribute name equals value."""
+        return [element_id for element_id, v in self.items(name) if v == value]
+
+    def elements(self, subnetwork_id=None):
+        """Generate the attributes as CX attribute elements ('po', 'n', 'v' and, unless a string, 'd')."""
+        for name, column in self.columns.items():
+            data_type = column.data_type
+            for element_id, value in self.items(name):
+                element = {'po': element_id, 'n': name, 'v': value}
+                d = data_type or domain(value)
+                if d != 'string':
+                    element['d'] = d
+                if subnetwork_id:
+                    element['s'] = subnetwork_id
+                yield element
+
+    def to_numpy(self, name):
+        """The element ids and values of attribute name as two numpy arrays.
+
+        Typed columns are exported without copying the values one at a time;
+        other columns give an object array.
+        """
+        if numpy is None:
+            raise ImportError("numpy is required to export attribute columns")
+        column = self.columns.get(name)
+        if column is None:
+            return numpy.array([], dtype=object), numpy.array([], dtype=object)
+        present = numpy.frombuffer(bytes(column.present), dtype=numpy.uint8).astype(bool)
+        if column.value_type is None:
+            values = numpy.empty(len(column.values), dtype=object)
+            values[:] = column.values
+        else:
+            values = numpy.frombuffer(column.values, dtype=numpy.dtype(column.values.typecode))
+            if column.value_type is bool:
+                values = values.astype(bool)
+        ids = numpy.empty(len(present), dtype=object)
+        ids[:] = self._ids[:len(present)]
+        return ids[present], values[present]
+
+    def ids_where(self, name, predicate):
+        """The ids of the elements whose attribute name satisfies predicate, called with one value at a time,
+        e.g. ``lambda v: 0.5 < v < 2``.
+        """
+        return [element_id for element_id, value in self.items(name) if predicate(value)]
+
+    def ids_where_array(self, name, predicate):
+        """The ids of the elements whose attribute name satisfies predicate, called once with all the values of
+        the column as a numpy array (see to_numpy) and returning an array of booleans, e.g.
+        ``lambda v: (v > 0.5) & (v < 2)``.  Requires numpy.
+        """
+        ids, values = self.to_numpy(name)
+        if len(values) == 0:
+            return []
+        return ids[numpy.asarray(predicate(values), dtype=bool)].tolist()
+
+
+class AttributeIndex(object):
+    """An inverted index from attribute values to the ids of the elements that have them.
+
+    Attributes are indexed one at a time, when first queried; build(name, items) gives the
+    (element id, value) pairs of the attribute.  Afterwards the index has to be told about every
+    change of the indexed attributes through add and discard.
+    """
+
+    def __init__(self):
+        # name -> value -> {element id: None}, the inner dict serving as an insertion-ordered set
+        self.keys = {}
+        # name -> {element id: value} for values that cannot be hashed, such as lists
+        self._unhashable = {}
+
+    def clear(self):
+        self.__init__()
+
+    def subset(self, element_ids):
+        """A new store with the attributes of the elements element_ids, in columns of the same data types."""
+        store = AttributeStore()
+        for element_id in element_ids:
+            row = self._rows.get(element_id)
+            if row is None:
+                continue
+            for name, column in self.columns.items():
+                if column.has(row):
+                    copy = store.columns.get(name)
+                    if copy is None:
+                        copy = store.columns[name] = AttributeColumn(column.data_type)
+                    copy.set(store._row(element_id), column.get(row), column.data_type)
+        return store
+
+    def __contains__(self, name):
+        return name in self.keys
+
+    def build(self, name, items):
+        self.keys[name] = {}
+        self._unhashable[name] = {}
+        for element_id, value in items:
+            self.add(element_id, name, value)
+
+    def add(self, element_id, name, value):
+        values = self.keys.get(name)
+        if values is None:
+            return
+        try:
+            ids = values.get(value)
+        except TypeError:
+            self._unhashable[name][element_id] = value
+            return
+        if ids is None:
+            ids = values[value] = {}
+        ids[element_id] = None
+
+    def discard(self, element_id, name, value):
+        values = self.keys.get(name)
+        if values is None:
+            return
+        try:
+            ids = values.get(value)
+        except TypeError:
+            self._unhashable[name].pop(element_id, None)
+            return
+        if ids is not None:
+            ids.pop(element_id, None)
+            if not ids:
+                del values[value]
+
+    def find(self, name, value):
+        """The ids of the elements whose attribute name equals value."""
+        try:
+            return list(self.keys[name].get(value, ()))
+        except TypeError:
+            return [element_id for element_id, v in self._unhashable[name].items() if v == value]
@@ -2,6 +2,7 @@ import pandas as pd
 import networkx as nx
 from ndex.networkn import NdexGraph
 import csv
+import sys
 
 
 
@@ -74,7 +75,18 @@ def load(G, filename, source=1, target=2, edge_attributes=None, sep='\t', header
 
 
 def annotate(G, filename):
-    with open(filename, 'rb') as tsvfile:
+    # Look the query values up in a node index, dropping it again afterwards unless G already had one.
+    had_index = G.node_index is not None
+    G.use_node_index()
+    try:
+        _annotate(G, filename)
+    finally:
+        if not had_index:
+            G.node_index = None
+
+
+def _annotate(G, filename):
+    with open(filename, 'rb' if sys.version_info.major == 2 else 'r') as tsvfile:
         dialect = csv.Sniffer().sniff(tsvfile.read(1024))
         tsvfile.seek(0)
         reader = csv.reader(tsvfile, dialect)
@@ -98,7 +110,7 @@ def annotate(G, filename):
                         # This would not be expected to occur,
                         # but could if the same node were specified twice in the same file.
                         raise ValueError("ERROR: Attempting to annotate the same node attribute twice.")
-                    G.node[n][key] = row[i]
+                    G.set_node_attribute(n, key, row[i])
                     annotated[n][key] = True
 
 
@@ -0,0 +1,496 @@
+"""Concurrent transfer of many networks.
+
+download_networks fetches a list of networks with a bounded pool of worker
+threads, or of worker processes when parsing the CX is the bottleneck, and
+yields a DownloadResult for each network as soon as it is done::
+
+    my_ndex = Ndex(server, username, password, pool_maxsize=8)
+    network_ids = my_ndex.get_network_ids_for_user(username)
+    for result in download_networks(my_ndex, network_ids, directory='mirror', workers=8):
+        if result.error is not None:
+            print("%s failed: %s" % (result.network_id, result.error))
+
+publish_networks is the reverse pipeline: networks are encoded as CX
+(optionally in worker processes), uploaded by worker threads, and their
+visibility, properties and permissions set::
+
+    for result in publish_networks(my_ndex, graphs, workers=8, processes=2, visibility='PUBLIC',
+                                   group_permissions={group_id: 'READ'}):
+        print("%s %s" % (result.network_id, result.error))
+
+grant_networks_to_group, make_networks_public and the other bulk variants
+of the per-network Ndex methods send one request per network through a
+bounded pool of threads, optionally rate limited, and collect the results
+and errors by network id::
+
+    outcome = grant_networks_to_group(my_ndex, group_id, network_ids, workers=16, rate=50)
+    for network_id, error in outcome.errors.items():
+        print("%s failed: %s" % (network_id, error))
+
+Requires concurrent.futures (the ``futures`` package on Python 2).
+"""
+
+import io
+import os
+import pickle
+import threading
+import time
+
+import ndex.client as nc
+from ndex.cx_stream import read_cx_fragments, write_cx_chunks, CX_CHUNK_SIZE
+from ndex.networkn import NdexGraph
+
+try:
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+except ImportError:
+    ThreadPoolExecutor = ProcessPoolExecutor = as_completed = wait = FIRST_COMPLETED = None
+
+#: Default number of networks transferred at the same time
+WORKERS = 4
+
+
+class DownloadResult(object):
+    """The outcome of downloading one network.
+
+    On success, path (when saving to a directory) or graph (when parsing) is set; otherwise error holds the
+    exception the download failed with.  size is the number of bytes received and seconds the time the download
+    took, parsing included.
+    """
+
+    def __init__(self, network_id, path=None, graph=None, size=0, seconds=0.0, error=None):
+        self.network_id = network_id
+        self.path = path
+        self.graph = graph
+        self.size = size
+        self.seconds = seconds
+        self.error = error
+
+    def __repr__(self):
+        outcome = 'error=%r' % self.error if self.error is not None else 'size=%d' % self.size
+        return 'DownloadResult(%r, %s, seconds=%.3f)' % (self.network_id, outcome, self.seconds)
+
+
+def _require_futures():
+    if ThreadPoolExecutor is None:
+        raise ImportError("concurrent.futures is required (pip install futures)")
+
+
+def _download(ndex, network_id, directory=None, columnar_attributes=False):
+    # Stream one network to directory, or into an NdexGraph, and report how it went.
+    start = time.time()
+    received = [0]
+
+    def chunks(response):
+        for chunk in response.iter_content(chunk_size=CX_CHUNK_SIZE):
+            received[0] += len(chunk)
+            yield chunk
+
+    path = None
+    graph = None
+    try:
+        response = ndex.get_network_as_cx_stream(network_id)
+        if not response:
+            raise RuntimeError("Failed to retrieve network with uuid " + network_id)
+        try:
+            if directory is None:
+                graph = NdexGraph(cx=read_cx_fragments(chunks(response)), columnar_attributes=columnar_attributes)
+            else:
+                path = os.path.join(directory, network_id + '.cx')
+                try:
+                    with open(path, 'wb') as cx_file:
+                        for chunk in chunks(response):
+                            cx_file.write(chunk)
+                except Exception:
+                    os.remove(path)
+                    raise
+        finally:
+            response.close()
+    except Exception as e:
+        return DownloadResult(network_id, size=received[0], seconds=time.time() - start, error=e)
+    return DownloadResult(network_id, path=path, graph=graph, size=received[0], seconds=time.time() - start)
+
+
+# The client of a worker process, created on its first download
+_process_ndex = None
+
+
+def _download_in_process(server, network_id, directory, columnar_attributes):
+    # Runs in a worker process.  The process gets a client of its own, with a registry of its own so that no
+    # connection inherited from the parent is shared, and is told the server version the parent detected.
+    global _process_ndex
+    if _process_ndex is None:
+        server_url, username, password, host, version = server
+        _process_ndex = nc.Ndex(server_url, username, password, registry=nc.NdexRegistry())
+        _process_ndex.host = host
+        _process_ndex.version = version
+    result = _download(_process_ndex, network_id, directory, columnar_attributes)
+    if result.error is not None:
+        try:
+            pickle.dumps(result.error)
+        except Exception:
+            result.error = Exception("%s: %s" % (type(result.error).__name__, result.error))
+    return result
+
+
+def download_networks(ndex, network_ids, directory=None, workers=WORKERS, processes=False,
+                      columnar_attributes=False):
+    """Download networks concurrently and generate a DownloadResult for each, in the order they complete.
+
+    Each network is streamed to <directory>/<network id>.cx, or, without a directory, parsed into an NdexGraph
+    while it is received.  A failed download does not stop the others: its error is captured in its result.
+
+    Downloads run in worker threads that share ndex and its connection pool, so give ndex a pool_maxsize of at
+    least workers.  With processes=True they run in worker processes instead, each with a connection of its own,
+    so that parsing large networks is not limited to one CPU; the graphs are then sent back to this process.
+
+    :param ndex: The client to download with.
+    :type ndex: ndex.client.Ndex
+    :param network_ids: The UUIDs of the networks.
+    :type network_ids: iterable of str
+    :param directory: Where to save the networks.  Created if missing.  If None, they are parsed into NdexGraphs.
+    :type directory: str
+    :param workers: The maximum number of networks downloaded at the same time.
+    :type workers: int
+    :param processes: If True, download and parse in worker processes rather than threads.
+    :type processes: bool
+    :param columnar_attributes: Passed to NdexGraph.
+    :type columnar_attributes: bool
+    :return: The results, as they complete.
+    :rtype: generator of DownloadResult
+    """
+    _require_futures()
+    if directory is not None and not os.path.isdir(directory):
+        os.makedirs(directory)
+    if processes:
+        executor = ProcessPoolExecutor(workers)
+        server = (ndex.server_url, ndex.username, ndex.password, ndex.host, ndex.version)
+        futures = [executor.submit(_download_in_process, server, network_id, directory, columnar_attributes)
+                   for network_id in network_ids]
+    else:
+        executor = ThreadPoolExecutor(workers)
+        futures = [executor.submit(_download, ndex, network_id, directory, columnar_attributes)
+                   for network_id in network_ids]
+    try:
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # Don't start the remaining downloads if the caller stops early.
+        for future in futures:
+            future.cancel()
+        executor.shutdown()
+
+
+class PublishJob(object):
+    """A network to publish, with settings of its own.
+
+    network is an NdexGraph, a list of CX aspect fragments or an encoded CX document (bytes).  If network_id is
+    given, that network is updated rather than a new one created.  Settings left as None take the value given to
+    publish_networks.  properties is a list of NdexPropertyValuePair dicts; user_permissions and
+    group_permissions map user and group UUIDs to a permission ('READ', 'WRITE' or 'ADMIN').
+    """
+
+    def __init__(self, network, network_id=None, visibility=None, properties=None, user_permissions=None,
+                 group_permissions=None, indexed_fields=None):
+        self.network = network
+        self.network_id = network_id
+        self.visibility = visibility
+        self.properties = properties
+        self.user_permissions = user_permissions
+        self.group_permissions = group_permissions
+        self.indexed_fields = indexed_fields
+
+
+class PublishResult(object):
+    """The outcome of publishing one network.
+
+    network_id is the UUID of the network (None if it could not be created) and error the exception publishing
+    stopped with, if any.
+    """
+
+    def __init__(self, job, network_id=None, seconds=0.0, error=None):
+        self.job = job
+        self.network_id = network_id
+        self.seconds = seconds
+        self.error = error
+
+    def __repr__(self):
+        outcome = ', error=%r' % self.error if self.error is not None else ''
+        return 'PublishResult(%r%s, seconds=%.3f)' % (self.network_id, outcome, self.seconds)
+
+
+def _serialize(network):
+    # Encode a network as a complete CX document.  Runs in a worker process when publishing with processes.
+    if isinstance(network, NdexGraph):
+        return b''.join(network.to_cx_chunks())
+    return b''.join(write_cx_chunks(nc.Ndex._with_status(network)))
+
+
+class _ReencodedCX(io.RawIOBase):
+    # A CX stream encoded on the fly that rewinds to its start by encoding the network again, so that the client
+    # can send it again when it retries the upload, as it does any seekable body.
+
+    def __init__(self, encode):
+        self._encode = encode
+        self._stream = encode()
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if offset != 0 or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("a CX stream being encoded can only be rewound to its start")
+        if self._position:
+            self._stream = self._encode()
+            self._position = 0
+        return 0
+
+    def readinto(self, b):
+        n = self._stream.readinto(b)
+        self._position += n
+        return n
+
+
+def _publish(ndex, job, settings, serialized):
+    # Upload one network and apply its settings.
+    start = time.time()
+    network_id = job.network_id
+    try:
+        if serialized is not None:
+            cx = serialized.result()
+        elif isinstance(job.network, NdexGraph):
+            cx = _ReencodedCX(job.network.to_cx_stream)
+        elif isinstance(job.network, list):
+            cx = _ReencodedCX(lambda: nc.Ndex._cx_upload_stream(job.network))
+        else:
+            cx = job.network
+        if network_id is None:
+            url = ndex.save_new_network(cx, indexed_fields=settings['indexed_fields'])
+            network_id = url.rstrip('/').rsplit('/', 1)[-1]
+        else:
+            ndex.update_cx_network(cx, network_id)
+        visibility = settings['visibility']
+        if visibility == 'PUBLIC':
+            ndex.make_network_public(network_id)
+        elif visibility == 'PRIVATE':
+            ndex.make_network_private(network_id)
+        if settings['properties'] is not None:
+            ndex.set_network_properties(network_id, settings['properties'])
+        for user_id, permission in sorted((settings['user_permissions'] or {}).items()):
+            ndex.update_network_user_permission(user_id, network_id, permission)
+        for group_id, permission in sorted((settings['group_permissions'] or {}).items()):
+            ndex.update_network_group_permission(group_id, network_id, permission)
+    except Exception as e:
+        return PublishResult(job, network_id, time.time() - start, e)
+    return PublishResult(job, network_id, time.time() - start)
+
+
+def publish_networks(ndex, networks, workers=WORKERS, processes=None, visibility=None, properties=None,
+                     user_permissions=None, group_permissions=None, indexed_fields=None):
+    """Publish networks concurrently and generate a PublishResult for each, in the order they complete.
+
+    Each network is uploaded as a new network (or used to update an existing one, see PublishJob), then its
+    visibility, properties and permissions are set.  Uploads run in worker threads that share ndex and its
+    connection pool, so give ndex a pool_maxsize of at least workers.  With processes, the networks are encoded as
+    CX in that many worker processes while earlier ones are being uploaded; otherwise each worker thread encodes
+    its network as it uploads it.  At most 2 * workers networks are in the pipeline at a time, so networks may be
+    a generator that produces them on demand.
+
+    Failed requests are retried as the retry policy of ndex allows, including NDEx_Concurrent_Modification errors
+    (the server is still processing a new network); uploads are encoded again for each attempt.  Any other failure
+    stops the publication of that network only; it is reported in its result.
+
+    :param ndex: The client to publish with.  It has to be authenticated.
+    :type ndex: ndex.client.Ndex
+    :param networks: NdexGraphs, lists of CX aspect fragments, encoded CX documents or PublishJobs.
+    :type networks: iterable
+    :param workers: The maximum number of networks uploaded at the same time.
+    :type workers: int
+    :param processes: The number of worker processes that encode the networks.  (Optional)
+    :type processes: int
+    :param visibility: 'PUBLIC' or 'PRIVATE'.  If None, the visibility is not changed.
+    :type visibility: str
+    :param properties: The network properties to set, a list of NdexPropertyValuePair dicts.  (Optional)
+    :type properties: list
+    :param user_permissions: Permissions to grant, by user UUID.  (Optional)
+    :type user_permissions: dict
+    :param group_permissions: Permissions to grant, by group UUID.  (Optional)
+    :type group_permissions: dict
+    :param indexed_fields: The fields to index when a network is created.  (Optional)
+    :type indexed_fields: list of str
+    :return: The results, as they complete.
+    :rtype: generator of PublishResult
+    """
+    _require_futures()
+    ndex.require_auth()
+    defaults = {'visibility': visibility, 'properties': properties, 'user_permissions': user_permissions,
+                'group_permissions': group_permissions, 'indexed_fields': indexed_fields}
+    uploader = ThreadPoolExecutor(workers)
+    encoder = ProcessPoolExecutor(processes) if processes else None
+    pending = set()
+    try:
+        for job in networks:
+            if not isinstance(job, PublishJob):
+                job = PublishJob(job)
+            settings = dict((name, getattr(job, name) if getattr(job, name) is not None else value)
+                            for name, value in defaults.items())
+            serialized = None
+            if encoder is not None and not isinstance(job.network, bytes):
+                serialized = encoder.submit(_serialize, job.network)
+            pending.add(uploader.submit(_publish, ndex, job, settings, serialized))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        uploader.shutdown()
+        if encoder is not None:
+            encoder.shutdown()
+
+
+class BulkResult(object):
+    """The outcome of a request sent for each of many networks.
+
+    results maps the ids of the networks whose request succeeded to what it returned, errors the others to the
+    exception it failed with.
+    """
+
+    def __init__(self):
+        self.results = {}
+        self.errors = {}
+        self.seconds = 0.0
+
+    @property
+    def ok(self):
+        """True if no request failed."""
+        return not self.errors
+
+    def __repr__(self):
+        return 'BulkResult(%d ok, %d failed, seconds=%.3f)' % (len(self.results), len(self.errors), self.seconds)
+
+
+class _RateLimiter(object):
+    # Spaces calls to wait() at least 1 / rate seconds apart, across threads.
+
+    def __init__(self, rate):
+        self._lock = threading.Lock()
+        self._interval = 1.0 / rate
+        self._next = time.time()
+
+    def wait(self):
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next)
+            self._next = start + self._interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def for_each_network(network_ids, function, workers=WORKERS, rate=None):
+    """Call function(network_id) for each network id concurrently and collect what the calls return or raise.
+
+    :param network_ids: The UUIDs of the networks.
+    :type network_ids: iterable of str
+    :param function: What to do for one network, e.g. lambda network_id: ndex.set_read_only(network_id, True).
+    :type function: callable
+    :param workers: The maximum number of calls in progress at the same time.
+    :type workers: int
+    :param rate: The maximum number of calls started per second.  (Optional)
+    :type rate: float
+    :return: The results and errors by network id.
+    :rtype: BulkResult
+    """
+    _require_futures()
+    limiter = _RateLimiter(rate) if rate else None
+
+    def call(network_id):
+        if limiter is not None:
+            limiter.wait()
+        return function(network_id)
+
+    outcome = BulkResult()
+    start = time.time()
+    executor = ThreadPoolExecutor(workers)
+    try:
+        futures = dict((executor.submit(call, network_id), network_id) for network_id in network_ids)
+        for future in as_completed(futures):
+            try:
+                outcome.results[futures[future]] = future.result()
+            except Exception as e:
+                outcome.errors[futures[future]] = e
+    finally:
+        executor.shutdown()
+    outcome.seconds = time.time() - start
+    return outcome
+
+
+def grant_networks_to_group(ndex, group_id, network_ids, permission="READ", workers=WORKERS, rate=None):
+    """Give the group permission on the networks.  See for_each_network for workers and rate.
+
+    :rtype: BulkResult
+    """
+    return for_each_network(network_ids, lambda network_id: ndex.update_network_group_permission(
+        group_id, network_id, permission), workers, rate)
+
+
+def grant_networks_to_user(ndex, user_id, network_ids, permission="READ", workers=WORKERS, rate=None):
+    """Give the user permission on the networks.  See for_each_network for workers and rate.
+
+    :rtype: BulkResult
+    """
+    return for_each_network(network_ids, lambda network_id: ndex.update_network_user_permission(
+        user_id, network_id, permission), workers, rate)
+
+
+def make_networks_public(ndex, network_ids, workers=WORKERS, rate=None):
+    """Make the networks public.  See for_each_network for workers and rate.
+
+    :rtype: BulkResult
+    """
+    return for_each_network(network_ids, ndex.make_network_public, workers, rate)
+
+
+def make_networks_private(ndex, network_ids, workers=WORKERS, rate=None):
+    """Make the networks private.  See for_each_network for workers and rate.
+
+    :rtype: BulkResult
+    """
+    return for_each_network(network_ids, ndex.make_network_private, workers, rate)
+
+
+def set_networks_read_only(ndex, network_ids, value, workers=WORKERS, rate=None):
+    """Set or clear the read-only flag of the networks.  See for_each_network for workers and rate.
+
+    :rtype: BulkResult
+    """
+    return for_each_network(network_ids, lambda network_id: ndex.set_read_only(network_id, value), workers, rate)
+
+
+def set_networks_properties(ndex, network_ids, network_properties, workers=WORKERS, rate=None):
+    """Set the same properties on the networks.  See for_each_network for workers and rate.
+
+    :param network_properties: A list of NdexPropertyValuePair dicts, or its JSON.
+    :rtype: BulkResult
+    """
+    return for_each_network(network_ids, lambda network_id: ndex.set_network_properties(
+        network_id, network_properties), workers, rate)
+
+
+def set_networks_system_properties(ndex, network_ids, network_properties, workers=WORKERS, rate=None):
+    """Set the same system properties on the networks.  See for_each_network for workers and rate.
+
+    :param network_properties: A dict such as {'visibility': 'PUBLIC', 'readOnly': True}, or its JSON.
+    :rtype: BulkResult
+    """
+    return for_each_network(network_ids, lambda network_id: ndex.set_network_system_properties(
+        network_id, network_properties), workers, rate)
@@ -0,0 +1,422 @@
+"""Caches of NDEx responses and networks.
+
+An Ndex client given a ResponseCache keeps the responses of the methods
+that read network summaries, aspects, provenance, samples and users::
+
+    my_ndex = Ndex(server, username, password, cache=ResponseCache(ttl=600, directory='/tmp/ndex-cache'))
+
+A cached response is served without a request for ttl seconds.  After that
+it is revalidated: with If-None-Match / If-Modified-Since when the server
+sent an ETag or Last-Modified header, or, for the parts of a network, by
+comparing the modificationTime of the network summary with the one the
+response was stored with.  Writing to a network through the client drops
+the responses of that network; queries (POSTs to /search/network/{uuid}/...)
+do not.
+
+The responses are kept in memory, least recently used first out once there
+are more than max_entries or max_bytes of them, and optionally in a
+directory shared by several processes, limited to max_disk_bytes.
+
+A NetworkCache keeps whole networks loaded by NdexGraph, by server, UUID
+and modificationTime, so that a network that has not changed is loaded from
+disk after a request for its summary::
+
+    G = NdexGraph(server=server, uuid=uuid, cache=NetworkCache('/tmp/ndex-networks'))
+"""
+
+import collections
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+import requests
+
+import ndex.snapshot as snapshot
+
+#: Default number of seconds a response is served without asking the server
+TTL = 300
+
+#: Default maximum number of responses kept in memory
+MAX_ENTRIES = 1024
+
+#: Default maximum number of bytes of responses kept in memory
+MAX_BYTES = 64 * 1024 * 1024
+
+#: Default maximum number of bytes of responses kept on disk
+MAX_DISK_BYTES = 1024 * 1024 * 1024
+
+# The network a route is about: /network/{uuid}/...
+_NETWORK_ROUTE = re.compile(r'/network/(?:asCX/)?([0-9A-Za-z-]+)(?:[/?]|$)')
+
+
+def network_of(url):
+    """The UUID of the network url refers to, or None."""
+    match = _NETWORK_ROUTE.search(url)
+    return match.group(1) if match else None
+
+
+# POST routes that query a network rather than change it
+_QUERY_ROUTE = re.compile(r'/search/network/|/network/[0-9A-Za-z-]+/(?:query|interconnectquery|nodes)(?:[/?]|$)')
+
+
+def modified_network(method, url):
+    """The UUID of the network a method request to url may change, or None."""
+    if method in ('GET', 'HEAD') or (method == 'POST' and _QUERY_ROUTE.search(url)):
+        return None
+    return network_of(url)
+
+
+class CachedResponse(object):
+    """A stored response: its status, the headers that matter for it, and its body."""
+
+    def __init__(self, url, status, headers, body, network_id=None, modification_time=None, expires=0.0):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.network_id = network_id
+        self.modification_time = modification_time
+        self.expires = expires
+
+    @classmethod
+    def from_response(cls, response, network_id=None, modification_time=None, ttl=TTL):
+        headers = dict((name, response.headers[name]) for name in ('Content-Type', 'ETag', 'Last-Modified')
+                       if name in response.headers)
+        return cls(response.url, response.status_code, headers, response.content, network_id, modification_time,
+                   time.time() + ttl)
+
+    def validators(self):
+        """The headers of a conditional request for this response."""
+        headers = {}
+        if 'ETag' in self.headers:
+            headers['If-None-Match'] = self.headers['ETag']
+        if 'Last-Modified' in self.headers:
+            headers['If-Modified-Since'] = self.headers['Last-Modified']
+        return headers
+
+    def to_response(self):
+        """A requests response with this body, already read."""
+        response = requests.models.Response()
+        response.status_code = self.status
+        response.url = self.url
+        response.headers.update(self.headers)
+        response._content = self.body
+        response._content_consumed = True
+        response.encoding = 'utf-8'
+        return response
+
+    def dump(self, f):
+        """Write this response to the binary file f: a line of JSON with everything but the body, then the body."""
+        header = {'url': self.url, 'status': self.status, 'headers': self.headers, 'length': len(self.body),
+                  'network_id': self.network_id, 'modification_time': self.modification_time,
+                  'expires': self.expires}
+        f.write(json.dumps(header).encode('utf-8') + b'\n')
+        f.write(self.body)
+
+    @classmethod
+    def load(cls, f):
+        """Read a response written by dump() from the binary file f.  Raises ValueError if it is not one."""
+        try:
+            header = json.loads(f.readline().decode('utf-8'))
+            body = f.read()
+            if len(body) != header['length']:
+                raise ValueError("truncated response")
+            return cls(header['url'], header['status'], header['headers'], body, header['network_id'],
+                       header['modification_time'], header['expires'])
+        except (KeyError, TypeError, UnicodeDecodeError):
+            raise ValueError("not a cached response")
+
+
+class ResponseCache(object):
+    """Responses by request, in memory and optionally on disk.  See the module documentation.
+
+    The counters hits (served from the cache), revalidated (served from the cache after asking the server) and
+    misses (fetched) are updated by the clients that use the cache; stats() returns them.
+    """
+
+    def __init__(self, ttl=TTL, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, directory=None,
+                 max_disk_bytes=MAX_DISK_BYTES):
+        """
+        :param ttl: The number of seconds a response is served without asking the server.
+        :type ttl: float
+        :param max_entries: The maximum number of responses kept in memory.
+        :type max_entries: int
+        :param max_bytes: The maximum total size of the responses kept in memory.  Larger responses are not kept.
+        :type max_bytes: int
+        :param directory: Where to keep responses on disk.  Created if missing.  (Optional)
+        :type directory: str
+        :param max_disk_bytes: The maximum total size of the responses kept on disk.
+        :type max_disk_bytes: int
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._store = None
+        if directory is not None:
+            self._store = _DirectoryStore(directory, max_disk_bytes, '.response',
+                                          dump=lambda entry, f: entry.dump(f), load=CachedResponse.load)
+
+    def stats(self):
+        """The counters, and the number and size of the responses in memory."""
+        with self._lock:
+            requests_served = self.hits + self.revalidated + self.misses
+            return {'hits': self.hits, 'revalidated': self.revalidated, 'misses': self.misses,
+                    'hit_rate': float(self.hits + self.revalidated) / requests_served if requests_served else 0.0,
+                    'entries': len(self._entries), 'bytes': self._bytes}
+
+    def count(self, counter):
+        """Add one to the counter 'hits', 'revalidated' or 'misses'."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key):
+        """The CachedResponse stored for key, fresh or not, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.pop(key)
+                self._entries[key] = entry
+                return entry
+        entry = self._read(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def keeps(self, size):
+        """Whether a response of size bytes would be stored."""
+        return size <= self.max_bytes
+
+    def put(self, key, entry):
+        """Store entry, a CachedResponse, for key, unless it is larger than max_bytes."""
+        self._remember(key, entry)
+        if self.keeps(len(entry.body)):
+            self._write(key, entry)
+        elif self._store is not None:
+            self._store.remove(self._store.path(self._name(key)))
+
+    def renew(self, key, entry):
+        """Serve entry for another ttl seconds."""
+        entry.expires = time.time() + self.ttl
+        self.put(key, entry)
+
+    def invalidate(self, network_id):
+        """Drop the responses about the network with UUID network_id."""
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.network_id == network_id:
+                    self._forget(key)
+        if self._store is not None:
+            self._store.remove_prefix(self._network_prefix(network_id))
+
+    def clear(self):
+        """Drop all responses."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self._store is not None:
+            self._store.remove_prefix('')
+
+    # Memory
+
+    def _remember(self, key, entry):
+        with self._lock:
+            if key in self._entries:
+                self._forget(key)
+            if len(entry.body) > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._forget(next(iter(self._entries)))
+
+    def _forget(self, key):
+        self._bytes -= len(self._entries.pop(key).body)
+
+    # Disk
+
+    @staticmethod
+    def _network_prefix(network_id):
+        return (network_id or '_') + '.'
+
+    def _name(self, key):
+        # Responses on disk are named after the network in the key, so that invalidate() can find them.
+        return self._network_prefix(network_of(key)) + hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def _read(self, key):
+        return self._store.read(self._name(key)) if self._store is not None else None
+
+    def _write(self, key, entry):
+        if self._store is not None:
+            self._store.write(self._name(key), entry)
+
+
+class _DirectoryStore(object):
+    # Values written by dump(value, f) to the files of a directory that several processes may share, and read
+    # back by load(f), which raises ValueError for a file it can't read.  Since anyone who can write to the
+    # directory controls the files, load must only build data, never run code as pickle.load does.  Files are
+    # written under a temporary name and renamed, so that no process reads a partial file, and the least recently
+    # read or written are removed once the files take more than max_bytes.
+
+    def __init__(self, directory, max_bytes, suffix, dump, load):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.dump = dump
+        self.load = load
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                if not os.path.isdir(directory):
+                    raise
+
+    def path(self, name):
+        return os.path.join(self.directory, name + self.suffix)
+
+    def files(self):
+        # (last use, size, path) of each file, least recently used first.
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.suffix):
+                path = os.path.join(self.directory, name)
+                try:
+                    status = os.stat(path)
+                except OSError:
+                    continue
+                files.append((status.st_mtime, status.st_size, path))
+        files.sort()
+        return files
+
+    def read(self, name):
+        path = self.path(name)
+        try:
+            with open(path, 'rb') as f:
+                value = self.load(f)
+            os.utime(path, None)
+        except (IOError, OSError, EOFError, ValueError):
+            return None
+        return value
+
+    def write(self, name, value):
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                self.dump(value, f)
+            if os.path.getsize(temporary) > self.max_bytes:
+                self.remove(temporary)
+                return
+            os.rename(temporary, self.path(name))
+        except (IOError, OSError):
+            self.remove(temporary)
+            return
+        self.trim()
+
+    def trim(self):
+        files = self.files()
+        total = sum(size for _, size, _ in files)
+        while total > self.max_bytes and files:
+            _, size, path = files.pop(0)
+            self.remove(path)
+            total -= size
+
+    def remove_prefix(self, prefix):
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith(self.suffix):
+                self.remove(os.path.join(self.directory, name))
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class NetworkCache(object):
+    """Downloaded networks, on disk, by server, UUID and modification time.
+
+    NdexGraph(server=..., uuid=..., cache=NetworkCache(directory)) reads the summary of the network and loads the
+    graph stored for its modificationTime, if any, instead of downloading and parsing its CX; otherwise it stores
+    the graph it loads.  Only the latest version of a network is kept.  Several processes may share the directory;
+    the least recently used networks are removed once they take more than max_bytes.
+
+    Requires msgpack (pip install msgpack).
+    """
+
+    def __init__(self, directory, max_bytes=MAX_DISK_BYTES):
+        """
+        :param directory: Where to keep the networks.  Created if missing.
+        :type directory: str
+        :param max_bytes: The maximum total size of the networks kept.
+        :type max_bytes: int
+        """
+        if snapshot.msgpack is None:
+            raise ImportError("msgpack is required for NetworkCache (pip install msgpack)")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Networks are stored as snapshots, which are fast to load and, unlike pickles, only ever hold data.
+        self._store = _DirectoryStore(directory, max_bytes, '.network', dump=snapshot.dump, load=snapshot.load)
+
+    @staticmethod
+    def _network_prefix(host, network_id):
+        return hashlib.sha1(('%s %s' % (host, network_id)).encode('utf-8')).hexdigest() + '.'
+
+    def _name(self, host, network_id, modification_time):
+        return self._network_prefix(host, network_id) + str(modification_time)
+
+    def get(self, host, network_id, modification_time):
+        """The graph stored for this version of the network, or None.
+
+        :param host: The URL of the server, as in Ndex.host.
+        :type host: str
+        :param network_id: The UUID of the network.
+        :type network_id: str
+        :param modification_time: The modificationTime in the summary of the network.
+        :rtype: ndex.networkn.NdexGraph
+        """
+        graph = self._store.read(self._name(host, network_id, modification_time))
+        with self._lock:
+            if graph is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return graph
+
+    def put(self, host, network_id, modification_time, graph):
+        """Store graph as this version of the network, in place of any other version."""
+        self._store.remove_prefix(self._network_prefix(host, network_id))
+        self._store.write(self._name(host, network_id, modification_time), graph)
+
+    def clear(self):
+        """Remove all networks."""
+        self._store.remove_prefix('')
+
+    def stats(self):
+        """The hits and misses of this process, and the number and size of the networks stored."""
+        files = self._store.files()
+        with self._lock:
+            loads = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': float(self.hits) / loads if loads else 0.0,
+                    'entries': len(files), 'bytes': sum(size for _, size, _ in files)}
+
+    def report(self):
+        """stats() as a line of text."""
+        stats = self.stats()
+        return "%d hits, %d misses (%.0f%% hit rate), %d networks, %.1f MB" % (
+            stats['hits'], stats['misses'], 100 * stats['hit_rate'], stats['entries'], stats['bytes'] / 1e6)
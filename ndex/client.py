@@ -3,10 +3,19 @@
 import requests
 import json
 import ndex
-from requests_toolbelt import MultipartEncoder
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
+from requests_toolbelt.multipart.encoder import total_len
+from ndex.cx_stream import write_cx_chunks, CXByteStream, CX_CHUNK_SIZE
+from ndex.cache import CachedResponse, network_of, modified_network
+import itertools
 import os
 import io
+import random
 import sys
+import threading
+import uuid
+from email.utils import parsedate_tz, mktime_tz
 
 if sys.version_info.major == 3:
     from urllib.parse import urljoin
@@ -17,79 +26,564 @@ else:
 from requests import exceptions as req_except
 import time
 
+try:
+    from urllib3.exceptions import NewConnectionError
+except ImportError:
+    from requests.packages.urllib3.exceptions import NewConnectionError
+
 userAgent = 'NDEx-Python/2.0'
 
 #: The URL of the default public NDEx Server
 DEFAULT_SERVER = "http://public.ndexbio.org"
 
-class Ndex:
+#: Default number of hosts a session keeps a connection pool for
+POOL_CONNECTIONS = 10
+
+#: Default number of connections a session keeps open per host
+POOL_MAXSIZE = 10
+
+#: Seconds a server version guessed after a failed status request is kept before the server is asked again
+FALLBACK_TTL = 60.0
+
+
+class _FallbackServer(tuple):
+    # The (version, API URL) guessed for a server whose status could not be read.
+    pass
+
+
+class NdexRegistry(object):
+    """Process-wide state shared by the Ndex clients: the API version of each server, detected once, and one
+    requests session per server and credentials, so that clients created for the same account reuse its
+    connections.
+
+    A version guessed because the server's status could not be read is only kept for fallback_ttl seconds, after
+    which the server is asked again.
+    """
+
+    def __init__(self, fallback_ttl=FALLBACK_TTL):
+        self._lock = threading.Lock()
+        self._detect_lock = threading.Lock()
+        self.fallback_ttl = fallback_ttl
+        self._servers = {}
+        self._sessions = {}
+
+    def _entry(self, server):
+        # The registry entry for server: the server and the time it expires, None for a detected one.
+        if isinstance(server, _FallbackServer):
+            return server, time.time() + self.fallback_ttl
+        return server, None
+
+    def known_server(self, host):
+        """The (version, API URL) of the server at host if it has been detected, otherwise None."""
+        entry = self._servers.get(host)
+        if entry is None or (entry[1] is not None and entry[1] <= time.time()):
+            return None
+        return entry[0]
+
+    def server(self, host, detect):
+        """The (version, API URL) of the server at host, from detect(host) the first time."""
+        server = self.known_server(host)
+        if server is None:
+            # Threads that need the server at the same time wait for one detection.
+            with self._detect_lock:
+                server = self.known_server(host)
+                if server is None:
+                    server = detect(host)
+                    self._servers[host] = self._entry(server)
+        return server
+
+    def add_server(self, host, server):
+        """Remember the (version, API URL) of the server at host, detected by other means than server().
+
+        A detected server replaces a guessed one, which is kept otherwise only until it expires.
+        """
+        with self._lock:
+            known = self.known_server(host)
+            if known is None or (isinstance(known, _FallbackServer) and not isinstance(server, _FallbackServer)):
+                self._servers[host] = self._entry(server)
+                return server
+            return known
+
+    def session(self, host, username=None, password=None, pool_connections=POOL_CONNECTIONS,
+                pool_maxsize=POOL_MAXSIZE, pool_block=False, keep_alive=True):
+        """The requests session for host and the given credentials and connection pool settings.
+
+        See Ndex for the pool settings.
+        """
+        key = (host, username, password, pool_connections, pool_maxsize, pool_block, keep_alive)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = requests.session()
+                adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                      pool_block=pool_block)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                if not keep_alive:
+                    session.headers['Connection'] = 'close'
+                if username and password:
+                    # add credentials to the session, if available
+                    session.auth = (username, password)
+        return session
+
+    def clear(self):
+        """Forget all server versions and close all sessions."""
+        with self._detect_lock, self._lock:
+            sessions = list(self._sessions.values())
+            self._servers.clear()
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+#: The registry used by Ndex clients unless they are given another one.
+DEFAULT_REGISTRY = NdexRegistry()
+
+#: Methods that can be sent again without changing their effect
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+#: Response statuses that are retried by default
+RETRY_STATUSES = frozenset([429, 502, 503, 504])
+
+
+class _RetryBudget(object):
+    # A token bucket that limits retries to a fraction of the requests sent: every request adds ratio tokens, every
+    # retry takes one.  It starts full, with room for burst retries.
+
+    def __init__(self, ratio, burst):
+        self._lock = threading.Lock()
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = float(burst)
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self._tokens + self.ratio, self.burst)
+
+    def withdraw(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RetryPolicy(object):
+    """When, and after how long, an Ndex client sends a failed request again.
+
+    A request is retried when it could not reach the server, when the server answers with one of the statuses
+    (429, 502, 503 or 504 by default) or when the network it works on is locked (an NDEx_Concurrent_Modification
+    error).  Requests whose methods are not idempotent (POST) are only retried if the server can't have acted on
+    them: the connection could not be made, or the server refused the request with a 429, a 503 or a lock
+    conflict.  Requests with a body that can't be sent twice, such as a CX stream being encoded on the fly, are
+    only retried if the connection could not be made.
+
+    The n-th retry waits for backoff * 2 ** (n - 1) seconds, at most max_backoff, or for as long as the server
+    asks in a Retry-After header.  With jitter, the wait is drawn uniformly between 0 and that, so that clients
+    that failed together don't retry together.  A server that asks for more than max_backoff is not retried.
+
+    The retry budget keeps a struggling server from being flooded with retries: at most a budget fraction of the
+    requests sent through the policy are retried, after an initial allowance of budget_burst retries.  The budget
+    is shared by all clients that use the policy.  Lock conflicts are not charged to it: they mean the server is
+    still busy with the network, not that it is struggling, and their retries are limited by retries alone.
+    """
+
+    def __init__(self, retries=3, backoff=0.5, max_backoff=30.0, jitter=True, statuses=RETRY_STATUSES,
+                 respect_retry_after=True, budget=0.2, budget_burst=10):
+        """
+        :param retries: The maximum number of times a request is retried.
+        :type retries: int
+        :param backoff: The wait before the first retry, in seconds.
+        :type backoff: float
+        :param max_backoff: The longest wait before a retry, in seconds.
+        :type max_backoff: float
+        :param jitter: If True, randomize the waits.
+        :type jitter: bool
+        :param statuses: The response statuses to retry.
+        :type statuses: set of int
+        :param respect_retry_after: If True, wait as long as a Retry-After header asks.
+        :type respect_retry_after: bool
+        :param budget: The fraction of requests that may be retried, or None for no limit.
+        :type budget: float
+        :param budget_burst: The number of retries allowed before the fraction applies.
+        :type budget_burst: int
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.respect_retry_after = respect_retry_after
+        self._budget = _RetryBudget(budget, budget_burst) if budget is not None else None
+
+    def copy(self, **changes):
+        """A policy with the same settings and budget, except for changes, e.g. policy.copy(retries=10)."""
+        policy = RetryPolicy.__new__(RetryPolicy)
+        policy.__dict__.update(self.__dict__)
+        for name, value in changes.items():
+            if not hasattr(policy, name):
+                raise TypeError("unknown retry policy setting: " + name)
+            setattr(policy, name, value)
+        return policy
+
+    @staticmethod
+    def is_lock_conflict(response):
+        """True if response is an NDEx_Concurrent_Modification error: the network is locked by another task."""
+        if response is None or response.status_code < 400:
+            return False
+        try:
+            error_code = response.json().get('errorCode') or ''
+        except (ValueError, AttributeError):
+            return False
+        return error_code.startswith('NDEx_Concurrent_Modification')
+
+    @staticmethod
+    def _not_sent(error):
+        # True if the request failed before it could reach the server.
+        if isinstance(error, req_except.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(error, req_except.ConnectionError) and isinstance(reason, NewConnectionError)
+
+    def _retry_after(self, response):
+        # The wait a Retry-After header asks for, in seconds, or None.
+        value = response.headers.get('Retry-After') if response is not None else None
+        if not value or not self.respect_retry_after:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            date = parsedate_tz(value)
+            return max(0.0, mktime_tz(date) - time.time()) if date else None
+
+    def retry_delay(self, method, attempt, response=None, error=None, replayable=True):
+        """The number of seconds to wait before sending a request again, or None if it should not be retried.
+
+        :param method: The HTTP method of the request.
+        :type method: str
+        :param attempt: The number of times the request has been retried so far.
+        :type attempt: int
+        :param response: The response, if one was received.
+        :param error: The exception the request failed with, if no response was received.
+        :param replayable: False if the body of the request can't be sent again.
+        :type replayable: bool
+        """
+        if attempt == 0 and self._budget is not None:
+            self._budget.deposit()
+        if attempt >= self.retries:
+            return None
+        lock_conflict = self.is_lock_conflict(response)
+        if error is not None:
+            if not self._not_sent(error) and not (replayable and method in IDEMPOTENT_METHODS and
+                                                  isinstance(error, (req_except.ConnectionError,
+                                                                     req_except.Timeout))):
+                return None
+        elif response is None or response.status_code < 400 or not replayable:
+            return None
+        elif method in IDEMPOTENT_METHODS:
+            if response.status_code not in self.statuses and not lock_conflict:
+                return None
+        elif not (response.status_code in (429, 503) and response.status_code in self.statuses) and \
+                not lock_conflict:
+            return None
+
+        delay = self._retry_after(response)
+        if delay is None:
+            delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+            if self.jitter:
+                delay = random.uniform(0, delay)
+        elif delay > self.max_backoff:
+            return None
+        if self._budget is not None and not lock_conflict and not self._budget.withdraw():
+            return None
+        return delay
+
 
+#: The retry policy of Ndex clients unless they are given another one.  Its retry budget is shared by all of them.
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+#: Default number of network summaries iter_networks requests at a time
+SEARCH_PAGE_SIZE = 100
+
+#: Number of network summaries requested at a time when listing the networks of an account
+USER_PAGE_SIZE = 1000
+
+
+class _Prefetch(object):
+    # Calls function(*args) in a background thread; result() waits for its return value, or raises its exception.
+
+    def __init__(self, function, *args):
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(function, args))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, function, args):
+        try:
+            self._result = function(*args)
+        except Exception as e:
+            self._error = e
 
-    '''A class to facilitate communication with an NDEx server.'''
-    def __init__(self, host = None, username = None, password = None, update_status=False, debug = False):
+    def result(self):
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class _ReadAheadBody(CXByteStream):
+    # The raw body of a streamed response whose first chunks were already read: those chunks, then the rest of the
+    # body.  Closing it closes the original body.
+
+    def __init__(self, read, rest, raw):
+        super(_ReadAheadBody, self).__init__(itertools.chain(read, rest))
+        self._raw = raw
+        self.release_conn = getattr(raw, 'release_conn', None)
+
+    def close(self):
+        self._raw.close()
+        super(_ReadAheadBody, self).close()
+
+
+class Ndex(object):
+
+
+    '''A class to facilitate communication with an NDEx server.
+
+    An Ndex client can be shared by several threads: each request builds its own headers and the session is not
+    modified after it is created.  Give the client a pool_maxsize of at least the number of threads so that each
+    of them can keep a connection open.
+    '''
+    def __init__(self, host = None, username = None, password = None, update_status=False, debug = False,
+                 registry = None, pool_connections = POOL_CONNECTIONS, pool_maxsize = POOL_MAXSIZE,
+                 pool_block = False, keep_alive = True, retry_policy = DEFAULT_RETRY_POLICY, cache = None):
         '''Creates a connection to a particular NDEx server.
 
+        The server version is detected on the first request, once per server and process, and clients for the
+        same server, account and pool settings share one session.  All requests go through the connection pool of
+        that session, so connections (and their TLS sessions) are reused across requests and clients.
+
                 :param host: The URL of the server. Defaults to http://public.ndexbio.org.
                 :type host: string
                 :param username: The username of the NDEx account to use. (Optional)
                 :type username: string
                 :param password: The account password. (Optional)
                 :type password: string
+                :param registry: Where server versions and sessions are shared.  Defaults to DEFAULT_REGISTRY.
+                :type registry: NdexRegistry
+                :param pool_connections: The number of hosts to keep a connection pool for.
+                :type pool_connections: int
+                :param pool_maxsize: The number of connections to keep open per host; set it to the number of
+                    threads that use the client concurrently.
+                :type pool_maxsize: int
+                :param pool_block: If True, never open more than pool_maxsize connections per host and wait for a
+                    free one instead.  Otherwise extra connections are opened and closed after use.
+                :type pool_block: bool
+                :param keep_alive: If False, ask the server to close each connection after its response.
+                :type keep_alive: bool
+                :param retry_policy: When to send failed requests again.  None never retries.
+                :type retry_policy: RetryPolicy
+                :param cache: Where to keep the network summaries, aspects, provenance, samples and users read, to
+                    read them again without a request.  May be shared by several clients.  (Optional)
+                :type cache: ndex.cache.ResponseCache
         '''
         self.debug = debug
-        self.version = 1.3
+        self.retry_policy = retry_policy
+        self.cache = cache
         self.status = {}
         self.username = username
         self.password = password
-        
+        self.registry = registry or DEFAULT_REGISTRY
+
         if host is None:
             host = DEFAULT_SERVER
-        
+        self.server_url = host
+        self._version = None
+        self._host = None
+
+        # the session for this Ndex
+        self.s = self.registry.session(host, username, password, pool_connections, pool_maxsize, pool_block,
+                                       keep_alive)
+        if update_status:
+            self.update_status()
+
+    @staticmethod
+    def _detect_server(host, session):
+        # (version, API URL) of the server at host, from its status.
         if "localhost" in host:
-            self.host = "http://localhost:8080/ndexbio-rest"
-        else:
-            status_url = "/rest/admin/status"
+            return 1.3, "http://localhost:8080/ndexbio-rest"
+        status_url = "/rest/admin/status"
 
-            try:
-                version_url = urljoin(host, status_url)
+        try:
+            version_url = urljoin(host, status_url)
 
 
-                response = requests.get(version_url,headers = {'User-Agent': userAgent})
-                response.raise_for_status()
-                data = response.json()
-
-                prop = data.get('properties')
-                if(prop is not None):
-                    pv = prop.get('ServerVersion')
-                    if(pv is not None):
-                        if not pv.startswith('2.'):
-                            raise Exception("This release only supports NDEx 2.x server.")
-                        else:
-                            self.version = pv
-                            self.host = host + "/v2"
-                    else:
-                        sys.stderr.write("Warning: This release doesn't fully support 1.3 version of NDEx")
-                        self.version = "1.3"
-                        self.host = host + "/rest"
-
-            except req_except.HTTPError as he:
-                ndex.get_logger('CLIENT').warning('Can''t determine server version.' + host + ' Server returned error -- '  + he.message)
-                self.version = "1.3"
-                self.host = host + "/rest"
-                #TODO - how to handle errors getting server version...
-
-#            self.host = host + "/rest"
-
-        # create a session for this Ndex
-        self.s = requests.session()
-        if username and password:
-            # add credentials to the session, if available
-            self.s.auth = (username, password)
-        if update_status:
-            self.update_status()
+            response = session.get(version_url,headers = {'User-Agent': userAgent})
+            response.raise_for_status()
+            return Ndex._server_from_status(host, response.json())
+
+        except req_except.HTTPError as he:
+            return Ndex._server_from_status(host, None, he)
+
+    @staticmethod
+    def _server_from_status(host, data, error=None):
+        # (version, API URL) of the server at host, given its status or the error the status request failed with.
+        if error is not None:
+            ndex.get_logger('CLIENT').warning('Can''t determine server version.' + host + ' Server returned error -- '  + str(error))
+            #TODO - how to handle errors getting server version...
+            return _FallbackServer(("1.3", host + "/rest"))
+
+        pv = (data.get('properties') or {}).get('ServerVersion')
+        if(pv is not None):
+            if not pv.startswith('2.'):
+                raise Exception("This release only supports NDEx 2.x server.")
+            else:
+                return pv, host + "/v2"
+        else:
+            sys.stderr.write("Warning: This release doesn't fully support 1.3 version of NDEx")
+            return "1.3", host + "/rest"
+
+    def _server(self):
+        # The (version, API URL) of the server.  A guess is not kept by the client, so that it is detected again
+        # once the registry lets the guess expire.
+        server = self.registry.server(self.server_url, lambda host: self._detect_server(host, self.s))
+        if not isinstance(server, _FallbackServer):
+            if self._version is None:
+                self._version = server[0]
+            if self._host is None:
+                self._host = server[1]
+        return server
+
+    @property
+    def version(self):
+        """The version of the server, detected on first use."""
+        if self._version is None:
+            return self._server()[0]
+        return self._version
+
+    @version.setter
+    def version(self, version):
+        self._version = version
+
+    @property
+    def host(self):
+        """The URL of the server's API (/v2 or /rest), detected on first use."""
+        if self._host is None:
+            return self._server()[1]
+        return self._host
+
+    @host.setter
+    def host(self, host):
+        self._host = host
 
 # Base methods for making requests to this NDEx
 
+    @staticmethod
+    def _is_unsized(value):
+        # True for a file-like part whose size is not known up front, e.g. a CX stream being encoded on the fly.
+        return hasattr(value, 'read') and total_len(value) is None
+
+    @staticmethod
+    def _iter_multipart(fields, boundary):
+        # Generate a multipart/form-data body, reading file parts in chunks of CX_CHUNK_SIZE.
+        for name, value in fields.items():
+            if isinstance(value, tuple):
+                filename, content, content_type = value
+                head = 'Content-Disposition: form-data; name="%s"; filename="%s"\r\nContent-Type: %s' \
+                       % (name, filename, content_type)
+            else:
+                content = value
+                head = 'Content-Disposition: form-data; name="%s"' % name
+            yield ('--%s\r\n%s\r\n\r\n' % (boundary, head)).encode('utf-8')
+            if hasattr(content, 'read'):
+                while True:
+                    chunk = content.read(CX_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk if isinstance(chunk, bytes) else chunk.encode('utf-8')
+            else:
+                yield content if isinstance(content, bytes) else content.encode('utf-8')
+            yield b'\r\n'
+        yield ('--%s--\r\n' % boundary).encode('utf-8')
+
+    @staticmethod
+    def _report_progress(chunks, progress):
+        start = time.time()
+        sent = 0
+        for chunk in chunks:
+            yield chunk
+            sent += len(chunk)
+            progress(sent, time.time() - start)
+
+    def _multipart_body(self, fields, progress=None):
+        # (content type, request body) for fields.  Parts of unknown size are sent with chunked transfer encoding
+        # rather than being read into memory to compute a Content-Length.
+        if any(self._is_unsized(value[1] if isinstance(value, tuple) else value) for value in fields.values()):
+            boundary = uuid.uuid4().hex
+            body = self._iter_multipart(fields, boundary)
+            if progress:
+                body = self._report_progress(body, progress)
+            return 'multipart/form-data; boundary=' + boundary, body
+        multipart_data = MultipartEncoder(fields=fields)
+        if progress:
+            start = time.time()
+            multipart_data = MultipartEncoderMonitor(
+                multipart_data, lambda monitor: progress(monitor.bytes_read, time.time() - start))
+        return multipart_data.content_type, multipart_data
+
+    def _multipart_rewind(self, fields, headers, progress=None):
+        # A function that rewinds the parts of fields and returns a new body and headers for them, so that the
+        # request can be sent again, or None if a part can only be read once.
+        positions = {}
+        for name, value in fields.items():
+            content = value[1] if isinstance(value, tuple) else value
+            if isinstance(content, (bytes, basestring)):
+                continue
+            if not (hasattr(content, 'seekable') and content.seekable()):
+                return None
+            positions[name] = content.tell()
+
+        def rewind():
+            for name, position in positions.items():
+                value = fields[name]
+                (value[1] if isinstance(value, tuple) else value).seek(position)
+            content_type, multipart_data = self._multipart_body(fields, progress)
+            return {'data': multipart_data, 'headers': dict(headers, **{'Content-Type': content_type})}
+        return rewind
+
+    def _send(self, method, url, retry_policy=None, rewind=None, **kwargs):
+        # Send a request through the session, again as long as the retry policy (by default, the client's) says
+        # so.  rewind is called before each retry to get new keyword arguments for a body that has been read; if
+        # it is None and the request has a body other than a string, the body is taken to be readable only once.
+        policy = retry_policy or self.retry_policy
+        data = kwargs.get('data')
+        replayable = rewind is not None or data is None or isinstance(data, (bytes, basestring))
+        if self.cache is not None:
+            network_id = modified_network(method, url)
+            if network_id is not None:
+                self.cache.invalidate(network_id)
+        attempt = 0
+        while True:
+            try:
+                response = self.s.request(method, url, **kwargs)
+            except (req_except.ConnectionError, req_except.Timeout) as e:
+                delay = policy.retry_delay(method, attempt, error=e, replayable=replayable) if policy else None
+                if delay is None:
+                    raise
+            else:
+                delay = policy.retry_delay(method, attempt, response=response, replayable=replayable) \
+                    if policy else None
+                if delay is None:
+                    return response
+                response.close()
+            attempt += 1
+            if self.debug:
+                print("retry %d of %s %s in %.2f s" % (attempt, method, url, delay))
+            time.sleep(delay)
+            if rewind is not None:
+                kwargs.update(rewind())
+
     def set_debug_mode(self, debug):
         self.debug = debug
 
@@ -110,15 +604,15 @@ class Ndex:
             if put_json is not None:
                 print("PUT json: " + put_json)
 
-        headers = self.s.headers
-        headers['Content-Type'] ='application/json;charset=UTF-8'
-        headers['Accept'] =  'application/json'
-        headers['User-Agent']= userAgent
+        headers = {'Content-Type': 'application/json;charset=UTF-8',
+                   'Accept': 'application/json',
+                   'User-Agent': userAgent,
+                   }
 
         if put_json is not None:
-            response = self.s.put(url, data = put_json, headers = headers)
+            response = self._send('PUT', url, data = put_json, headers = headers)
         else:
-            response = self.s.put(url, headers = headers)
+            response = self._send('PUT', url, headers = headers)
         self.debug_response(response)
         response.raise_for_status()
         if response.status_code == 204:
@@ -139,7 +633,7 @@ class Ndex:
                    'Cache-Control': 'no-cache',
                    'User-Agent':  userAgent,
                    }
-        response = self.s.post(url, data=post_json, headers=headers)
+        response = self._send('POST', url, data=post_json, headers=headers)
         self.debug_response(response)
         response.raise_for_status()
         if response.status_code == 204:
@@ -149,13 +643,12 @@ class Ndex:
         else :
             return response.text
 
-    def delete(self, route):
+    def delete(self, route, retry_policy=None):
         url = self.host + route
         if self.debug:
             print("DELETE route: " + url)
-        headers = self.s.headers
-        headers['User-Agent'] = userAgent
-        response = self.s.delete(url, headers = headers)
+        headers = {'User-Agent': userAgent}
+        response = self._send('DELETE', url, retry_policy=retry_policy, headers = headers)
         self.debug_response(response)
         response.raise_for_status()
         if response.status_code == 204:
@@ -166,9 +659,8 @@ class Ndex:
         url = self.host + route
         if self.debug:
             print("GET route: " + url)
-        headers = self.s.headers
-        headers['User-Agent'] = userAgent
-        response = self.s.get(url, params = get_params, headers=headers)
+        headers = {'User-Agent': userAgent}
+        response = self._send('GET', url, params = get_params, headers=headers)
         self.debug_response(response)
         response.raise_for_status()
         if response.status_code == 204:
@@ -180,26 +672,108 @@ class Ndex:
         url = self.host + route
         if self.debug:
             print("GET stream route: " + url)
-        headers = self.s.headers
-        headers['User-Agent'] = userAgent
-        response = self.s.get(url, params = get_params, stream = True,headers = headers)
+        headers = {'User-Agent': userAgent}
+        response = self._send('GET', url, params = get_params, stream = True,headers = headers)
         self.debug_response(response)
         response.raise_for_status()
         if response.status_code == 204:
             return ""
         return response
 
+    def _summary_route(self, network_id):
+        if self.version == "2.0":
+            return "/network/%s/summary" % (network_id)
+        return "/network/%s" % (network_id)
+
+    def _cached_get(self, route, stream=False):
+        # get (or get_stream) through the response cache.  A stored response is served as it is until it expires,
+        # then revalidated against the modificationTime of the network summary it was stored with, or else with a
+        # conditional request.
+        if self.cache is None:
+            return self.get_stream(route) if stream else self.get(route)
+        url = self.host + route
+        key = "%s %s" % (self.username or "", url)
+        entry = self.cache.get(key)
+        if entry is not None and time.time() < entry.expires:
+            self.cache.count('hits')
+        elif entry is not None and self._unmodified(entry):
+            self.cache.renew(key, entry)
+            self.cache.count('revalidated')
+        else:
+            if self.debug:
+                print("GET route: " + url)
+            headers = {'User-Agent': userAgent}
+            if entry is not None:
+                headers.update(entry.validators())
+            # The body is only read once it is known to fit in the cache.
+            response = self._send('GET', url, headers=headers, stream=True)
+            self.debug_response(response)
+            if response.status_code == 304 and entry is not None:
+                response.close()
+                self.cache.renew(key, entry)
+                self.cache.count('revalidated')
+            else:
+                response.raise_for_status()
+                self.cache.count('misses')
+                if response.status_code == 204:
+                    return "" if stream else None
+                length = response.headers.get('Content-Length')
+                if not (self.cache.keeps(int(length)) if length is not None else self._read_for_cache(response)):
+                    return response if stream else response.json()
+                network_id = network_of(url)
+                modification_time = None
+                if network_id is not None and route != self._summary_route(network_id):
+                    modification_time = self._cached_modification_time(network_id)
+                entry = CachedResponse.from_response(response, network_id, modification_time, self.cache.ttl)
+                self.cache.put(key, entry)
+        response = entry.to_response()
+        return response if stream else response.json()
+
+    def _read_for_cache(self, response):
+        # Read a streamed body of unknown length while it fits in the cache.  If it does not, the response is left
+        # to give the chunks read so far and then the rest of the body, and False is returned.
+        chunks = response.iter_content(CX_CHUNK_SIZE)
+        read = []
+        size = 0
+        for chunk in chunks:
+            read.append(chunk)
+            size += len(chunk)
+            if not self.cache.keeps(size):
+                response.raw = _ReadAheadBody(read, chunks, response.raw)
+                response._content = False
+                response._content_consumed = False
+                return False
+        response._content = b''.join(read)
+        response._content_consumed = True
+        return True
+
+    def _cached_modification_time(self, network_id):
+        # The modificationTime of the network in a fresh cached summary, or None.
+        entry = self.cache.get("%s %s" % (self.username or "", self.host + self._summary_route(network_id)))
+        if entry is None or time.time() >= entry.expires:
+            return None
+        try:
+            return json.loads(entry.body.decode('utf-8')).get('modificationTime')
+        except (ValueError, AttributeError):
+            return None
+
+    def _unmodified(self, entry):
+        # Whether the network entry is part of has not been modified since entry was stored.
+        if entry.network_id is None or entry.modification_time is None:
+            return False
+        summary = self.get_network_summary(entry.network_id)
+        return (summary or {}).get('modificationTime') == entry.modification_time
+
     # The stream refers to the Response, not the Request
     def post_stream(self, route, post_json):
         url = self.host + route
         if self.debug:
             print("POST stream route: " + url)
-        headers = self.s.headers
-
-        headers['Content-Type'] = 'application/json'
-        headers['Accept'] ='application/json'
-        headers['User-Agent'] = userAgent
-        response = self.s.post(url, data=post_json, headers=headers, stream = True)
+        headers = {'Content-Type': 'application/json',
+                   'Accept': 'application/json',
+                   'User-Agent': userAgent,
+                   }
+        response = self._send('POST', url, data=post_json, headers=headers, stream = True)
         self.debug_response(response)
         response.raise_for_status()
         if response.status_code == 204:
@@ -207,18 +781,19 @@ class Ndex:
         return response
 
     # The Request is streamed, not the Response
-    def put_multipart(self, route, fields):
+    def put_multipart(self, route, fields, progress=None):
         url = self.host + route
-        multipart_data = MultipartEncoder(fields=fields)
+        content_type, multipart_data = self._multipart_body(fields, progress)
         if self.debug:
             print("PUT route: " + url)
 
-        headers = {'Content-Type' : multipart_data.content_type,
+        headers = {'Content-Type' : content_type,
                    'Accept' : 'application/json',
 #                   'Cache-Control': 'no-cache',
                    'User-Agent':userAgent
                    }
-        response = requests.put(url, data=multipart_data, headers=headers,auth=(self.username, self.password))
+        response = self._send('PUT', url, rewind=self._multipart_rewind(fields, headers, progress),
+                              data=multipart_data, headers=headers)
         self.debug_response(response)
         response.raise_for_status()
         if response.status_code == 204:
@@ -230,20 +805,21 @@ class Ndex:
         return result
 
     # The Request is streamed, not the Response
-    def post_multipart(self, route, fields, query_string=None):
+    def post_multipart(self, route, fields, query_string=None, progress=None):
         if query_string:
             url = self.host + route + '?' + query_string
         else:
             url = self.host + route
-        multipart_data = MultipartEncoder(fields=fields)
+        content_type, multipart_data = self._multipart_body(fields, progress)
         if self.debug:
             print("POST route: " + url)
-        headers = {'Content-Type': multipart_data.content_type,
+        headers = {'Content-Type': content_type,
                    #'Accept': 'multipart/form-data', #'application/json',
  #                  'Cache-Control': 'no-cache',
                    'User-Agent': userAgent,
                    }
-        response = requests.post(url, data=multipart_data, headers=headers, auth=(self.username, self.password))
+        response = self._send('POST', url, rewind=self._multipart_rewind(fields, headers, progress),
+                              data=multipart_data, headers=headers)
         self.debug_response(response)
         response.raise_for_status()
         if response.status_code == 204:
@@ -256,36 +832,69 @@ class Ndex:
 
 # Network methods
 
-    def save_new_network (self, cx, visibility=None, indexed_fields=None):
-        if(len(cx) > 0):
-            if(cx[len(cx) - 1] is not None):
-                if(cx[len(cx) - 1].get('status') is None):
-                    # No STATUS element in the array.  Append a new status
-                    cx.append({"status" : [ {"error" : "","success" : True} ]})
-                else:
-                    if(len(cx[len(cx) - 1].get('status')) < 1):
-                        # STATUS element found, but the status was empty
-                        cx[len(cx) - 1].get('status').append({"error" : "","success" : True})
-
-            if sys.version_info.major == 3:
-                stream = io.BytesIO(json.dumps(cx).encode('utf-8'))
-            else:
-                stream = io.BytesIO(json.dumps(cx))
-
-            return self.save_cx_stream_as_new_network(stream, visibility=visibility, indexed_fields=indexed_fields)
-        else:
+    @staticmethod
+    def _with_status(fragments):
+        # Pass the aspect fragments through, making sure the CX ends with a successful status aspect.
+        has_status = False
+        for fragment in fragments:
+            status = fragment.get('status')
+            has_status = status is not None
+            if has_status and len(status) < 1:
+                # STATUS element found, but the status was empty
+                status.append({"error" : "","success" : True})
+            yield fragment
+        if not has_status:
+            # No STATUS element in the array.  Append a new status
+            yield {"status" : [ {"error" : "","success" : True} ]}
+
+    @staticmethod
+    def _cx_upload_stream(cx):
+        # A readable stream for cx, which may already be a file object or string, a list or any other iterable of
+        # CX aspect fragments, or an iterable of encoded byte chunks.  Aspects are encoded as the stream is read.
+        if hasattr(cx, 'read') or isinstance(cx, (bytes, basestring)):
+            return cx
+        chunks = iter(cx)
+        try:
+            first = next(chunks)
+        except StopIteration:
             raise IndexError("Cannot save empty CX.  Please provide a non-empty CX document.")
+        chunks = itertools.chain([first], chunks)
+        if isinstance(first, bytes):
+            return CXByteStream(chunks)
+        if isinstance(first, basestring):
+            return CXByteStream(chunk.encode('utf-8') for chunk in chunks)
+        return CXByteStream(write_cx_chunks(Ndex._with_status(chunks)))
+
+    def save_new_network (self, cx, visibility=None, indexed_fields=None, progress=None):
+        ''' Create a new network from cx.
+
+        The CX is encoded while it is uploaded, so neither cx nor its encoding has to be held in memory as a whole.
+        A successful status aspect is appended if the CX does not end with one.
+
+        :param cx: The network, a list or any other iterable of CX aspect fragments, or an iterable of encoded byte chunks.
+        :param progress: Called as progress(bytes_sent, seconds_elapsed) while the network is uploaded. (Optional)
+        :type progress: callable
+        :return: The URL of the new network.
+        :rtype: str
+        '''
+        if isinstance(cx, list) and len(cx) > 0 and cx[len(cx) - 1] is None:
+            cx = cx[:-1]
+        return self.save_cx_stream_as_new_network(self._cx_upload_stream(cx), visibility=visibility,
+                                                  indexed_fields=indexed_fields, progress=progress)
 
     # CX Methods
     # Create a network based on a stream from a source CX format
-    def save_cx_stream_as_new_network (self, cx_stream, visibility=None, indexed_fields=None):
+    def save_cx_stream_as_new_network (self, cx_stream, visibility=None, indexed_fields=None, progress=None):
         ''' Create a new network from a CX stream, optionally providing a provenance history object to be included in the new network.
 
-        :param cx_stream: The network stream.
+        :param cx_stream: The network stream. Any of the CX forms accepted by save_new_network can be used as well.
+        :param progress: Called as progress(bytes_sent, seconds_elapsed) while the network is uploaded. (Optional)
+        :type progress: callable
         :return: The response.
         :rtype: `response object <http://docs.python-requests.org/en/master/user/quickstart/#response-content>`_
         '''
         self.require_auth()
+        cx_stream = self._cx_upload_stream(cx_stream)
         route = ''
         fields = {}
         query_string = None
@@ -308,22 +917,24 @@ class Ndex:
                 'CXNetworkStream': ('filename', cx_stream, 'application/octet-stream')
             }
 
-        return self.post_multipart(route, fields, query_string=query_string)
+        return self.post_multipart(route, fields, query_string=query_string, progress=progress)
 
     # Create a network based on a JSON string or Dict in CX format
-    def update_cx_network(self, cx_stream, network_id):
+    def update_cx_network(self, cx_stream, network_id, progress=None):
         '''Update the network specified by UUID network_id using the CX stream cx_stream.
 
-        :param cx_stream: The network stream.
+        :param cx_stream: The network stream. Any of the CX forms accepted by save_new_network can be used as well.
         :param network_id: The UUID of the network.
         :type network_id: str
+        :param progress: Called as progress(bytes_sent, seconds_elapsed) while the network is uploaded. (Optional)
+        :type progress: callable
         :return: The response.
         :rtype: `response object <http://docs.python-requests.org/en/master/user/quickstart/#response-content>`_
 
         '''
         self.require_auth()
         fields = {
-            'CXNetworkStream': ('filename', cx_stream, 'application/octet-stream')
+            'CXNetworkStream': ('filename', self._cx_upload_stream(cx_stream), 'application/octet-stream')
         }
 
         if(self.version == "2.0"):
@@ -331,7 +942,7 @@ class Ndex:
         else:
             route = '/network/asCX/%s' % (network_id)
 
-        return self.put_multipart(route, fields)
+        return self.put_multipart(route, fields, progress=progress)
 
     # Get a CX stream for a network
     def get_network_as_cx_stream(self, network_id):
@@ -368,7 +979,7 @@ class Ndex:
         else:
             route = "/network/%s/asCX" % (network_id)
 
-        return self.get_stream(route)
+        return self._cached_get(route, stream=True)
 
     def get_neighborhood_as_cx_stream(self, network_id, search_string, search_depth=1, edge_limit=2500):
         ''' Get a CX stream for a subnetwork of the network specified by UUID network_id and a traversal of search_depth steps around the nodes found by search_string.
@@ -452,6 +1063,53 @@ class Ndex:
         post_json = json.dumps(post_data)
         return self.post(route, post_json)
 
+    def iter_networks(self, search_string="", account_name=None, page_size=SEARCH_PAGE_SIZE, limit=None,
+                      include_groups=False, prefetch=True):
+        '''Generate the summaries of all networks that search_networks finds, page by page.
+
+        While the summaries of one page are being consumed, the next page is requested in a background thread,
+        so the caller's processing overlaps the round trip to the server.
+
+        :param search_string: The text to search for.
+        :type search_string: str
+        :param account_name: The account to search
+        :type account_name: str
+        :param page_size: The number of summaries requested at a time.
+        :type page_size: int
+        :param limit: The maximum number of summaries to generate.  (Optional)
+        :type limit: int
+        :param prefetch: If False, request each page only when the previous one has been consumed.
+        :type prefetch: bool
+        :return: The network summaries.
+        :rtype: generator of dict
+        '''
+        if limit is not None:
+            page_size = max(1, min(page_size, limit))
+
+        def fetch(block):
+            page = self.search_networks(search_string, account_name, start=block, size=page_size,
+                                        include_groups=include_groups)
+            if isinstance(page, dict):
+                return page.get('networks') or [], page.get('numFound')
+            return page or [], None
+
+        count = 0
+        block = 0
+        networks, found = fetch(block)
+        while True:
+            block += 1
+            more = len(networks) == page_size and (found is None or block * page_size < found) and \
+                (limit is None or count + len(networks) < limit)
+            next_page = _Prefetch(fetch, block) if more and prefetch else None
+            for network in networks:
+                if limit is not None and count >= limit:
+                    return
+                count += 1
+                yield network
+            if not more:
+                return
+            networks, found = next_page.result() if next_page is not None else fetch(block)
+
     def search_network_nodes(self, network_id, search_string='', account_name=None, limit=5):
         post_data = {"searchString" : search_string}
         if self.version == "2.0":
@@ -492,12 +1150,7 @@ class Ndex:
         :rtype: `response object <http://docs.python-requests.org/en/master/user/quickstart/#response-content>`_
 
         '''
-        if(self.version == "2.0"):
-            route = "/network/%s/summary" % (network_id)
-        else:
-            route = "/network/%s" % (network_id)
-
-        return self.get(route)
+        return self._cached_get(self._summary_route(network_id))
 
     def make_network_public(self, network_id):
         ''' Makes the network specified by the network_id public.
@@ -536,25 +1189,29 @@ class Ndex:
         return self.get(route)
 
     def delete_network(self, network_id, retry=5):
+        '''Deletes the network with UUID network_id.
+
+        A network that is locked (for example while the server is still processing it after an upload) is retried
+        with backoff, following the client's retry policy.
+
+        :param network_id: The UUID of the network.
+        :type network_id: str
+        :param retry: The maximum number of times the deletion is retried.
+        :type retry: int
+        '''
         self.require_auth()
         route = "/network/%s" % (network_id)
-        count = 0
-        while count < retry:
-            try:
-                return self.delete(route)
-            except Exception as inst:
-                d = json.loads(inst.response.content)
-                if d.get('errorCode').startswith("NDEx_Concurrent_Modification"):
-                    print("retry deleting network in 1 second(" + str(count) + ")")
-                    count += 1
-                    time.sleep(1)
-                else:
-                    raise inst
-        raise Exception("Network is locked after " + retry + " retry.")
+        policy = (self.retry_policy or DEFAULT_RETRY_POLICY).copy(retries=retry)
+        try:
+            return self.delete(route, retry_policy=policy)
+        except req_except.HTTPError as inst:
+            if RetryPolicy.is_lock_conflict(inst.response):
+                raise Exception("Network is locked after %d retries." % retry)
+            raise
 
     def get_provenance(self, network_id):
         route = "/network/%s/provenance" % (network_id)
-        return self.get(route)
+        return self._cached_get(route)
 
     def set_provenance(self, network_id, provenance):
         self.require_auth()
@@ -589,7 +1246,7 @@ class Ndex:
 
     def get_sample_network(self, network_id):
         route = "/network/%s/sample" % (network_id)
-        return self.get(route)
+        return self._cached_get(route)
 
 
     def set_network_sample(self, network_id, sample_cx_network_str):
@@ -680,22 +1337,14 @@ class Ndex:
 
     def get_user_by_username(self, username):
         route = "/user?username=%s" % (username)
-        return self.get(route)
-
-    def get_network_summaries_for_user(self, username):
-        network_summaries = self.search_networks("", username, size=1000)
-
-        if (network_summaries and network_summaries['networks']):
-            network_summaries_list = network_summaries['networks']
-        else:
-            network_summaries_list = []
-
-        return network_summaries_list
+        return self._cached_get(route)
 
-    def get_network_ids_for_user(self, username):
-        network_summaries_list = self.get_network_summaries_for_user(username)
+    def get_network_summaries_for_user(self, username, limit=None):
+        return list(self.iter_networks("", username, page_size=USER_PAGE_SIZE, limit=limit))
 
-        return self.network_summaries_to_ids(network_summaries_list)
+    def get_network_ids_for_user(self, username, limit=None):
+        return [network['externalId'] for network in self.iter_networks("", username, page_size=USER_PAGE_SIZE,
+                                                                         limit=limit)]
 
     def grant_network_to_user_by_username(self, username, network_id, permission):
         user = self.get_user_by_username(username).json
@@ -35,28 +35,124 @@ def subnetworks(G, subnetwork_id, view_id):
     return result
 
 
-def nodes(G):
-    return [
-        {'nodes': [{'@id': n[0], 'n': n[1]['name'], 'r': n[1]['represents']}]} if 'name' in n[1] and 'represents' in n[
-            1] else
-        {'nodes': [{'@id': n[0], 'n': n[1]['name']}]} if 'name' in n[1] and 'represents' not in n[1] else
-        {'nodes': [{'@id': n[0], 'r': n[1]['represents']}]} if 'name' not in n[1] and 'represents' in n[1] else
-        {'nodes': [{'@id': n[0]}]}
-        for n in G.nodes_iter(data=True)]
-
-
-def edges(G):
-    return [
-        {'edges': [{'i': e[3]['interaction'], 'k': e[3]['keep'], 's': e[0], '@id': e[2], 't': e[1]}]}
-        if 'interaction' in e[3] and 'keep' in e[3] else
-        {'edges': [{'i': e[3]['interaction'], 's': e[0], '@id': e[2], 't': e[1]}]}
-        if 'interaction' in e[3] and 'keep' not in e[3] else
-        {'edges': [{'s': e[0], '@id': e[2], 't': e[1]}]}
-        for e in G.edges_iter(data=True, keys=True)]
+def fragments(aspect_name, elements, fragment_size=None):
+    """Split the elements of an aspect into aspect fragments.
+
+    :param aspect_name: The name of the aspect, e.g. 'nodes'.
+    :param elements: The elements of the aspect.
+    :type elements: iterable
+    :param fragment_size: The maximum number of elements per fragment.  If None, all elements go in one fragment.
+    :type fragment_size: int
+    :return: The fragments, none if there are no elements.
+    :rtype: list of dict
+    """
+    elements = list(elements)
+    if not elements:
+        return []
+    if not fragment_size or len(elements) <= fragment_size:
+        return [{aspect_name: elements}]
+    return [{aspect_name: elements[i:i + fragment_size]} for i in range(0, len(elements), fragment_size)]
 
 
-def network_attributes(G, has_single_subnetwork):
-    elements = []
+def node_elements(G):
+    for node_id, attributes in G.nodes_iter(data=True):
+        element = {'@id': node_id}
+        if 'name' in attributes:
+            element['n'] = attributes['name']
+        if 'represents' in attributes:
+            element['r'] = attributes['represents']
+        yield element
+
+
+def nodes(G, fragment_size=None):
+    return fragments('nodes', node_elements(G), fragment_size)
+
+
+def edge_elements(G):
+    for source, target, edge_id, attributes in G.edges_iter(data=True, keys=True):
+        element = {'s': source, '@id': edge_id, 't': target}
+        if 'interaction' in attributes:
+            element['i'] = attributes['interaction']
+            if 'keep' in attributes:
+                element['k'] = attributes['keep']
+        yield element
+
+
+def edges(G, fragment_size=None):
+    return fragments('edges', edge_elements(G), fragment_size)
+
+
+def attribute_element(element_id, name, value, subnetwork_id=None):
+    """The nodeAttributes or edgeAttributes element of the attribute name of the node or edge element_id.
+
+    :param subnetwork_id: The subnetwork the attribute belongs to, if the network has a single one.
+    :return: The attribute element, with the data type of values other than strings.
+    :rtype: dict
+    """
+    element = {'po': element_id, 'n': name, 'v': value}
+    if not isinstance(value, string_types):
+        element['d'] = domain(value)
+    if subnetwork_id is not None:
+        element['s'] = subnetwork_id
+    return element
+
+
+def attribute_store_elements(G, store_name, subnetwork_id=None):
+    """The attribute elements of G's attribute store store_name ('node_attribute_store' or 'edge_attribute_store'),
+    none if G keeps its attributes in the networkx dicts."""
+    store = getattr(G, store_name, None)
+    if store is None:
+        return []
+    return store.elements(subnetwork_id)
+
+
+def node_aspect_elements(G, has_single_subnetwork):
+    """The elements of the nodes and the nodeAttributes aspects, built in one pass over the nodes.
+
+    :return: The node elements and the node attribute elements.
+    :rtype: tuple of two lists
+    """
+    subnetwork_id = G.subnetwork_id if has_single_subnetwork else None
+    nodes = []
+    attributes = []
+    for node_id, node_attributes in G.nodes_iter(data=True):
+        element = {'@id': node_id}
+        for attribute_name, attribute_value in node_attributes.items():
+            if attribute_name == 'name':
+                element['n'] = attribute_value
+            elif attribute_name == 'represents':
+                element['r'] = attribute_value
+            else:
+                attributes.append(attribute_element(node_id, attribute_name, attribute_value, subnetwork_id))
+        nodes.append(element)
+    attributes.extend(attribute_store_elements(G, 'node_attribute_store', subnetwork_id))
+    return nodes, attributes
+
+
+def edge_aspect_elements(G, has_single_subnetwork):
+    """The elements of the edges and the edgeAttributes aspects, built in one pass over the edges.
+
+    :return: The edge elements and the edge attribute elements.
+    :rtype: tuple of two lists
+    """
+    subnetwork_id = G.subnetwork_id if has_single_subnetwork else None
+    edges = []
+    attributes = []
+    for source, target, edge_id, edge_attributes in G.edges_iter(data=True, keys=True):
+        element = {'s': source, '@id': edge_id, 't': target}
+        for attribute_name, attribute_value in edge_attributes.items():
+            if attribute_name == 'interaction':
+                element['i'] = attribute_value
+                if 'keep' in edge_attributes:
+                    element['k'] = edge_attributes['keep']
+            else:
+                attributes.append(attribute_element(edge_id, attribute_name, attribute_value, subnetwork_id))
+        edges.append(element)
+    attributes.extend(attribute_store_elements(G, 'edge_attribute_store', subnetwork_id))
+    return edges, attributes
+
+
+def network_attribute_elements(G, has_single_subnetwork):
     for attribute in G.graph:
         value = G.graph[attribute]
         element = {'n': attribute, 'v': value}
@@ -69,8 +165,11 @@ def network_attributes(G, has_single_subnetwork):
             element["d"] = d
         if has_single_subnetwork:
             element["s"] = G.subnetwork_id
-        elements.append(element)
-    return [{'networkAttributes': elements}]
+        yield element
+
+
+def network_attributes(G, has_single_subnetwork):
+    return [{'networkAttributes': list(network_attribute_elements(G, has_single_subnetwork))}]
 
     # return [{'networkAttributes': [
     #     {'n': k, 'v': G.graph[k]} if isinstance(G.graph[k], string_types) else
@@ -78,29 +177,23 @@ def network_attributes(G, has_single_subnetwork):
     #     for k in G.graph]}]
 
 
-def node_attributes(G, has_single_subnetwork):
-    elements = []
-    try:
-        for node_id, attributes in G.nodes_iter(data=True):
-            for attribute_name in attributes:
-                if attribute_name != "name" and attribute_name != "represents":
-                    attribute_value = attributes[attribute_name]
-                    element = {'po': node_id, 'n': attribute_name, 'v': attribute_value}
-
-                    if not isinstance(attribute_value, string_types):
-                        element['d'] = domain(attribute_value)
-
-                    if has_single_subnetwork:
-                        element['s'] = G.subnetwork_id
-
-                    elements.append(element)
-        if len(elements) == 0:
-            return None
-        else:
-            return [{"nodeAttributes": elements}]
+def node_attribute_elements(G, has_single_subnetwork):
+    subnetwork_id = G.subnetwork_id if has_single_subnetwork else None
+    for node_id, attributes in G.nodes_iter(data=True):
+        for attribute_name in attributes:
+            if attribute_name != "name" and attribute_name != "represents":
+                yield attribute_element(node_id, attribute_name, attributes[attribute_name], subnetwork_id)
 
-    except Exception as e:
-        print(e.message)
+    for element in attribute_store_elements(G, 'node_attribute_store', subnetwork_id):
+        yield element
+
+
+def node_attributes(G, has_single_subnetwork):
+    elements = list(node_attribute_elements(G, has_single_subnetwork))
+    if len(elements) == 0:
+        return None
+    else:
+        return [{"nodeAttributes": elements}]
 
 
     # return [{'nodeAttributes': [
@@ -113,23 +206,19 @@ def node_attributes(G, has_single_subnetwork):
     #         ('name' not in n[1] and 'represents' not in n[1] and len(n[1]) > 0)]
 
 
-def edge_attributes(G, has_single_subnetwork):
-    elements = []
+def edge_attribute_elements(G, has_single_subnetwork):
+    subnetwork_id = G.subnetwork_id if has_single_subnetwork else None
     for source, target, edge_id, attributes in G.edges_iter(data=True, keys=True):
         for attribute_name in attributes:
-            if attribute_name == 'interaction':
-                continue
-            attribute_value = attributes[attribute_name]
-            element = {'po': edge_id, 'n': attribute_name, 'v': attribute_value}
-
-            if not isinstance(attribute_value, string_types):
-                element['d'] = domain(attribute_value)
+            if attribute_name != 'interaction':
+                yield attribute_element(edge_id, attribute_name, attributes[attribute_name], subnetwork_id)
 
-            if has_single_subnetwork:
-                element['s'] = G.subnetwork_id
+    for element in attribute_store_elements(G, 'edge_attribute_store', subnetwork_id):
+        yield element
 
-            elements.append(element)
 
+def edge_attributes(G, has_single_subnetwork):
+    elements = list(edge_attribute_elements(G, has_single_subnetwork))
     if len(elements) == 0:
         return None
     else:
@@ -147,72 +236,79 @@ def cartesian(G, id):
         for n in G.pos
         ]}]
 
+def cartesian_elements(G):
+    for n in G.pos:
+        yield {'node': n, 'x': float(G.pos[n][0]), 'y': float(G.pos[n][1])}
+
 def cartesian(G):
-    return [{'cartesianLayout': [
-        {'node': n, 'x': float(G.pos[n][0]), 'y': float(G.pos[n][1])}
-        for n in G.pos
-        ]}]
+    return [{'cartesianLayout': list(cartesian_elements(G))}]
 
-def citations(G):
-    citations = []
+def citation_elements(G):
     for citation_id in G.citation_map:
         citation = G.citation_map[citation_id]
         citation["@id"] = citation_id
-        citations.append(citation)
-    return [{"citations": citations}]
+        yield citation
 
 
-def node_citations(G):
-    node_citations = []
+def citations(G):
+    return [{"citations": list(citation_elements(G))}]
+
+
+def node_citation_elements(G):
     for node_id in G.node_citation_map:
         citations = G.node_citation_map[node_id]
-        node_citations.append({"citations": citations, "po": [node_id]})
-    return [{"nodeCitations": node_citations}]
+        yield {"citations": citations, "po": [node_id]}
 
 
-def edge_citations(G):
-    edge_citations = []
+def node_citations(G):
+    return [{"nodeCitations": list(node_citation_elements(G))}]
+
+
+def edge_citation_elements(G):
     for edge_id in G.edge_citation_map:
         citations = G.edge_citation_map[edge_id]
-        edge_citations.append({"citations": citations, "po": [edge_id]})
-    return [{"edgeCitations": edge_citations}]
+        yield {"citations": citations, "po": [edge_id]}
 
 
-def supports(G):
-    supports = []
+def edge_citations(G):
+    return [{"edgeCitations": list(edge_citation_elements(G))}]
+
+
+def support_elements(G):
     for support_id in G.support_map:
         support = G.support_map[support_id]
         support["@id"] = support_id
-        supports.append(support)
-    return [{"supports": supports}]
+        yield support
 
 
-def node_supports(G):
-    node_supports = []
+def supports(G):
+    return [{"supports": list(support_elements(G))}]
+
+
+def node_support_elements(G):
     for node_id in G.node_support_map:
         supports = G.node_support_map[node_id]
-        node_supports.append({"supports": supports, "po": [node_id]})
-    return [{"nodeSupports": node_supports}]
+        yield {"supports": supports, "po": [node_id]}
 
 
-def edge_supports(G):
-    edge_supports = []
+def node_supports(G):
+    return [{"nodeSupports": list(node_support_elements(G))}]
+
+
+def edge_support_elements(G):
     for edge_id in G.edge_support_map:
         supports = G.edge_support_map[edge_id]
-        edge_supports.append({"supports": supports, "po": [edge_id]})
-    return [{"edgeSupports": edge_supports}]
+        yield {"supports": supports, "po": [edge_id]}
+
+
+def edge_supports(G):
+    return [{"edgeSupports": list(edge_support_elements(G))}]
 
 def function_terms(G):
-    function_terms = []
-    for po in G.function_term_map:
-        function_terms.append(G.function_term_map[po])
-    return [{"functionTerms": function_terms}]
+    return [{"functionTerms": list(G.function_term_map.values())}]
 
 def reified_edges(G):
-    reified_edges = []
-    for n,re in G.reified_edges.items():
-        reified_edges.append(re)
-    return [{"reifiedEdges": reified_edges}]
+    return [{"reifiedEdges": list(G.reified_edges.values())}]
 
 def provenance(G):
     if G.get_provenance():
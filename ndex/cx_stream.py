@@ -0,0 +1,326 @@
+"""Incremental reading and writing of CX documents.
+
+A CX document is a JSON list of aspect fragments, each a single-key object
+mapping an aspect name to a list of elements::
+
+    [ {"nodes": [ {...}, {...} ]}, {"edges": [ ... ]}, ... ]
+
+read_cx_fragments turns a stream of text or byte chunks (for example
+``response.iter_content()`` of a streamed requests response) into aspect
+fragments without holding the whole document in memory.  Only one element
+is decoded at a time; the elements of large aspects are handed out in
+fragments of at most batch_size elements.
+
+write_cx_chunks does the reverse: it encodes aspect fragments whose element
+lists may be generators into UTF-8 byte chunks, and CXByteStream wraps such
+chunks in a read-only file object for APIs that expect one.
+"""
+
+import codecs
+import io
+import json
+import re
+
+#: Default chunk size, in bytes, used when reading CX from an HTTP response.
+CX_CHUNK_SIZE = 64 * 1024
+
+#: Aspects whose elements are independent of each other and may therefore be
+#: split over several fragments.  All other aspects are read as one fragment.
+ELEMENT_ASPECTS = frozenset([
+    'nodes', 'edges', 'networkAttributes', 'nodeAttributes', 'edgeAttributes', 'cartesianLayout',
+    'citations', 'supports', 'nodeCitations', 'edgeCitations', 'nodeSupports', 'edgeSupports',
+    'functionTerms', 'reifiedEdges'])
+
+_WHITESPACE = ' \t\n\r'
+
+# The characters that open or close arrays, objects and strings
+_STRUCTURE = re.compile(r'[\[\]{}"]')
+
+# The rest of a string up to its closing quote or a backslash at the end of the text
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+
+class _ValueScanner(object):
+    """Finds the end of a JSON array, object or string in text given piece by piece, without decoding it."""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+
+    def end(self, text, pos=0):
+        """The index in text just past the end of the value, scanning from pos, or None if it ends in a later piece."""
+        length = len(text)
+        while pos < length:
+            if self.escape:
+                # A backslash ended the previous piece.
+                self.escape = False
+                pos += 1
+            elif self.in_string:
+                pos = _STRING_BODY.match(text, pos).end()
+                if pos < length:
+                    if text[pos] == '"':
+                        self.in_string = False
+                        pos += 1
+                        if self.depth == 0:
+                            return pos
+                    else:
+                        self.escape = True
+                        pos += 1
+            else:
+                match = _STRUCTURE.search(text, pos)
+                if match is None:
+                    return None
+                pos = match.end()
+                c = match.group()
+                if c == '"':
+                    self.in_string = True
+                elif c in '[{':
+                    self.depth += 1
+                else:
+                    self.depth -= 1
+                    if self.depth == 0:
+                        return pos
+        return None
+
+
+class _CXTokenizer(object):
+    """Decodes JSON values one at a time from a growing text buffer."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buffer = u''
+        self._pos = 0
+        self._eof = False
+
+    def _next_text(self):
+        # The text of the next non-empty chunk, or None once the input is exhausted.
+        while not self._eof:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self._eof = True
+                text = self._decoder.decode(b'', True)
+            else:
+                if isinstance(chunk, bytes):
+                    text = self._decoder.decode(chunk)
+                else:
+                    text = chunk
+            if text:
+                return text
+        return None
+
+    def _fill(self):
+        # Append the next chunk to the buffer, dropping what was already consumed.
+        # Returns False once the input is exhausted.
+        text = self._next_text()
+        if text is None:
+            return False
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it, or '' at the end of input."""
+        while True:
+            buffer = self._buffer
+            pos = self._pos
+            end = len(buffer)
+            while pos < end and buffer[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < end:
+                return buffer[pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, characters):
+        c = self.peek()
+        if not c or c not in characters:
+            raise ValueError("Invalid CX: expected one of '%s' but found '%s' at offset %d of the current buffer"
+                             % (characters, c, self._pos))
+        self._pos += 1
+        return c
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        c = self.peek()
+        if c and c in '[{"':
+            try:
+                value, self._pos = self._json.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                return self._long_value()
+            return value
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                # The number or literal continues in the next chunk.
+                if not self._fill():
+                    raise
+                continue
+            if end == len(self._buffer) and self._fill():
+                # A number at the end of the buffer may have more digits in the next chunk.
+                continue
+            self._pos = end
+            return value
+
+    def _long_value(self):
+        # An array, object or string that continues past the buffer: find its end chunk by chunk and decode it
+        # once, rather than decoding the growing buffer again after every chunk.
+        scanner = _ValueScanner()
+        pieces = [self._buffer[self._pos:]]
+        end = scanner.end(pieces[0])
+        while end is None:
+            text = self._next_text()
+            if text is None:
+                break
+            pieces.append(text)
+            end = scanner.end(text)
+        rest = u''
+        if end is not None:
+            rest = pieces[-1][end:]
+            pieces[-1] = pieces[-1][:end]
+        value, _ = self._json.raw_decode(u''.join(pieces))
+        self._buffer = rest
+        self._pos = 0
+        return value
+
+
+def read_cx_fragments(chunks, batch_size=1000):
+    """Generate the aspect fragments of a CX document read from chunks.
+
+    :param chunks: The document as an iterable of byte (UTF-8) or text chunks.
+    :type chunks: iterable
+    :param batch_size: The maximum number of elements per fragment for aspects in ELEMENT_ASPECTS.
+    :type batch_size: int
+    :return: Aspect fragments, e.g. {'nodes': [...]}, in document order.
+    :rtype: generator of dict
+
+    """
+    tokens = _CXTokenizer(chunks)
+    tokens.expect('[')
+    if tokens.peek() == ']':
+        return
+    while True:
+        tokens.expect('{')
+        if tokens.peek() == '}':
+            tokens.expect('}')
+            yield {}
+        else:
+            while True:
+                name = tokens.value()
+                tokens.expect(':')
+                if name in ELEMENT_ASPECTS and tokens.peek() == '[':
+                    tokens.expect('[')
+                    elements = []
+                    if tokens.peek() == ']':
+                        tokens.expect(']')
+                    else:
+                        while True:
+                            elements.append(tokens.value())
+                            if tokens.expect(',]') == ']':
+                                break
+                            if len(elements) >= batch_size:
+                                yield {name: elements}
+                                elements = []
+                    yield {name: elements}
+                else:
+                    yield {name: tokens.value()}
+                if tokens.expect(',}') == '}':
+                    break
+        if tokens.expect(',]') == ']':
+            break
+
+
+def write_cx_chunks(fragments, chunk_size=CX_CHUNK_SIZE):
+    """Generate a CX document as UTF-8 byte chunks.
+
+    :param fragments: Aspect fragments, each a dict mapping an aspect name to its elements.  A list of elements
+        is always written, even when empty; an aspect whose elements come from any other iterable (typically a
+        generator) is only written if it produces at least one element.
+    :type fragments: iterable of dict
+    :param chunk_size: The approximate size of the generated chunks, in bytes.
+    :type chunk_size: int
+    :return: The encoded document.
+    :rtype: generator of bytes
+
+    """
+    encode = json.JSONEncoder(separators=(',', ':')).encode
+    parts = [u'[']
+    size = 1
+    separator = u''
+    for fragment in fragments:
+        for name, elements in fragment.items():
+            head = separator + u'{' + encode(name) + u':'
+            if isinstance(elements, (dict, str, bytes, type(u''))) or not hasattr(elements, '__iter__'):
+                parts.append(head + encode(elements) + u'}')
+                separator = u','
+                continue
+            if isinstance(elements, (list, tuple)):
+                parts.append(head + u'[')
+                separator = u','
+                element_separator = u''
+            else:
+                element_separator = None
+            for element in elements:
+                if element_separator is None:
+                    # First element of a lazily produced aspect: open the fragment now.
+                    parts.append(head + u'[')
+                    separator = u','
+                    element_separator = u''
+                text = element_separator + encode(element)
+                element_separator = u','
+                parts.append(text)
+                size += len(text)
+                if size >= chunk_size:
+                    yield u''.join(parts).encode('utf-8')
+                    parts = []
+                    size = 0
+            if element_separator is not None:
+                parts.append(u']}')
+    parts.append(u']')
+    yield u''.join(parts).encode('utf-8')
+
+
+class CXByteStream(io.RawIOBase):
+    """A read-only, non-seekable file object over an iterable of byte chunks.
+
+    Iterating over the stream returns the remaining chunks as they are, rather than lines.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = b''
+
+    def readable(self):
+        return True
+
+    def _next_chunk(self):
+        if self._pending:
+            chunk, self._pending = self._pending, b''
+            return chunk
+        for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b''
+
+    def readinto(self, b):
+        chunk = self._next_chunk()
+        n = min(len(b), len(chunk))
+        b[:n] = chunk[:n]
+        self._pending = chunk[n:]
+        return n
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        chunk = self._next_chunk()
+        if not chunk:
+            raise StopIteration
+        return chunk
+
+    next = __next__
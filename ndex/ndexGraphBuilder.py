@@ -1,4 +1,4 @@
-import networkn
+from ndex import networkn
 
 
 class ndexGraphBuilder:
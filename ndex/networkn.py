@@ -5,8 +5,12 @@ import io
 import json
 import copy
 import ndex.client as nc
+from ndex.cx_stream import read_cx_fragments, write_cx_chunks, CXByteStream, CX_CHUNK_SIZE
+from ndex.attribute_store import AttributeStore, AttributeIndex
+import ndex.snapshot as snapshot
+from collections import deque
 from time import time
-from six import string_types
+from six import string_types, integer_types
 import sys
 
 try:
@@ -43,65 +47,116 @@ def parse_attribute(attribute):
     return value
 
 
-def data_to_type(data, data_type):
-    return_data = None
+def parse_attributes(attributes):
+    """Parse the values of a list of attribute elements, as parse_attribute does for each of them.
+
+    :param attributes: CX attribute elements, e.g. the elements of a nodeAttributes aspect.
+    :type attributes: list
+    :return: The parsed values, in the order of the elements.
+    :rtype: list
+    """
+    coercions = _DATA_TYPE_COERCIONS
+    values = []
+    append = values.append
+    for attribute in attributes:
+        if 'd' in attribute:
+            d = attribute['d']
+            try:
+                coerce = coercions.get(d)
+            except TypeError:
+                # not a data type name
+                coerce = None
+            append(coerce(attribute['v']) if coerce else data_to_type(attribute['v'], d))
+        else:
+            append(attribute['v'])
+    return values
+
+
+def _to_boolean(data):
+    if type(data) is str:
+        return data.lower() == 'true'
+    return bool(data)
+
+
+def _to_boolean_list(data):
+    # Assumption: if the first element is a string then so are the rest...
+    if type(data[0]) is str:
+        return [s.lower() == 'true' for s in data]
+    return [bool(s) for s in data]
+
+
+# CX data type -> conversion of a value, after a string value has had its brackets removed and, for the list
+# types, been split at commas.
+_DATA_TYPE_CONVERTERS = {
+    'boolean': _to_boolean,
+    'byte': lambda data: str(data).encode(),
+    'char': str,
+    'double': float,
+    'float': float,
+    'integer': int,
+    'long': int,
+    'short': int,
+    'string': str,
+    'list_of_boolean': _to_boolean_list,
+    'list_of_byte': lambda data: [bytes(s) for s in data],
+    'list_of_char': lambda data: [str(s) for s in data],
+    'list_of_double': lambda data: list(map(float, data)),
+    'list_of_float': lambda data: list(map(float, data)),
+    'list_of_integer': lambda data: list(map(int, data)),
+    'list_of_long': lambda data: list(map(int, data)),
+    'list_of_short': lambda data: list(map(int, data)),
+    'list_of_string': lambda data: list(map(str, data)),
+}
+
+# The type of the values the scalar converters return, where converting such a value gives it back unchanged.
+_DATA_TYPE_RESULTS = {
+    'boolean': bool,
+    'double': float,
+    'float': float,
+    'integer': int,
+    'long': int,
+    'short': int,
+}
+
+
+def _coercion(data_type):
+    # The complete conversion of a value of data_type, as done by data_to_type.
+    convert = _DATA_TYPE_CONVERTERS[data_type]
+    result_type = _DATA_TYPE_RESULTS.get(data_type)
+    if data_type.startswith('list_of'):
+        def coerce(data):
+            if type(data) is str:
+                data = data.replace('[', '').replace(']','').split(',')
+            return convert(data)
+    else:
+        def coerce(data):
+            data_class = type(data)
+            if data_class is result_type:
+                return data
+            if data_class is str:
+                data = data.replace('[', '').replace(']','')
+            return convert(data)
+    return coerce
+
+
+_DATA_TYPE_COERCIONS = dict((data_type, _coercion(data_type)) for data_type in _DATA_TYPE_CONVERTERS)
 
+
+def data_to_type(data, data_type):
     if(type(data) is str):
         data = data.replace('[', '').replace(']','')
         if('list_of' in data_type):
             data = data.split(',')
 
-    if data_type == "boolean":
-        if(type(data) is str):
-            return_data = data.lower() == 'true'
-        else:
-            return_data = bool(data)
-    elif data_type == "byte":
-        return_data = str(data).encode()
-    elif data_type == "char":
-        return_data = str(data)
-    elif data_type == "double":
-        return_data = float(data)
-    elif data_type == "float":
-        return_data = float(data)
-    elif data_type == "integer":
-        return_data = int(data)
-    elif data_type == "long":
-        return_data = int(data)
-    elif data_type == "short":
-        return_data = int(data)
-    elif data_type == "string":
-        return_data = str(data)
-    elif data_type == "list_of_boolean":
-        # Assumption: if the first element is a string then so are the rest...
-        if(type(data[0]) is str):
-            return_data = [s.lower() == 'true' for s in data]
-        else:
-            return_data = [bool(s) for s in data]
-    elif data_type == "list_of_byte":
-        return_data = [bytes(s) for s in data]
-    elif data_type == "list_of_char":
-        return_data = [str(s) for s in data]
-    elif data_type == "list_of_double":
-        return_data = [float(s) for s in data]
-    elif data_type == "list_of_float":
-        return_data = [float(s) for s in data]
-    elif data_type == "list_of_integer":
-        return_data = [int(s) for s in data]
-    elif data_type == "list_of_long":
-        return_data = [int(s) for s in data]
-    elif data_type == "list_of_short":
-        return_data = [int(s) for s in data]
-    elif data_type == "list_of_string":
-        return_data = [str(s) for s in data]
-    else:
+    convert = _DATA_TYPE_CONVERTERS.get(data_type) if isinstance(data_type, basestring) else None
+    if convert is None:
         return None
-
-    return return_data
+    return convert(data)
 
 class NdexGraph (MultiDiGraph):
     """A graph compatible with NDEx"""
-    def __init__(self, cx=None, server=None, username=None, password=None, uuid=None, networkx_G=None, data=None, **attr):
+    def __init__(self, cx=None, server=None, username=None, password=None, uuid=None, networkx_G=None, data=None,
+                 columnar_attributes=False, cache=None, **attr):
         """There are generally four ways to create a graph.
 
             1. An empty graph. G = NdexGraph()
@@ -111,12 +166,24 @@ class NdexGraph (MultiDiGraph):
             4. Just like any other NetworkX MultiDiGraph().
             5. From an existing networkx graph. G = NdexGraph(networkx_G=networkx_G)
 
+        With columnar_attributes=True, node and edge attributes are kept in an AttributeStore (see
+        use_attribute_store) rather than in the networkx attribute dicts.
+
+        A network loaded from a server with a cache (an ndex.cache.NetworkCache) is loaded from the cache if its
+        modificationTime has not changed since it was stored there, and stored there otherwise.
+
         """
+        # The id counters, edge count and node index are used by add_node and add_edge, which
+        # MultiDiGraph.__init__ may call for data, so they have to exist first.  None means not known yet.
+        self.max_node_id = None
+        self.max_edge_id = None
+        self._edge_count = None
+        self.node_index = None
         MultiDiGraph.__init__(self, data, **attr)
+        if data is None:
+            self._edge_count = 0
         self.subnetwork_id = None
         self.view_id = None
-        self.max_node_id = None
-        self.max_edge_id = None
         self.max_citation_id = None
         self.max_support_id = None
         self.pos = {}
@@ -133,6 +200,9 @@ class NdexGraph (MultiDiGraph):
         self.edge_support_map = {}
         self.function_term_map = {}
         self.reified_edges = {}
+        # Edge id -> reified edge nodes, see _reified_edge_index()
+        self._reified_edge_nodes = None
+        self._reified_edge_count = 0
         self.provenance = None
         self.namespaces = {}
      #   self.edge_type_map = {}  # stores the mapping from cx edgeId to its 'i' attribute
@@ -141,6 +211,12 @@ class NdexGraph (MultiDiGraph):
         # Maps edge ids to node ids. e.g. { edge1: (source_node, target_node), edge2: (source_node, target_node) }
         self.edgemap = {}
 
+        # Columnar node and edge attributes, if enabled by use_attribute_store()
+        self.node_attribute_store = None
+        self.edge_attribute_store = None
+        if columnar_attributes:
+            self.use_attribute_store()
+
         if networkx_G is not None:
             node_id_x = 0
             node_dict_x = {}
@@ -168,246 +244,302 @@ class NdexGraph (MultiDiGraph):
                 for s, t, data in networkx_G.edges_iter(data=True):
                     self.add_edge(s, t, self.max_edge_id, data)
                     self.max_edge_id += 1
+            if columnar_attributes:
+                self.use_attribute_store()
             return
 
+        modification_time = None
         if not cx and server and uuid:
             ndex = nc.Ndex(server,username,password)
-            cx = ndex.get_network_as_cx_stream(uuid).json()
-            if not cx:
+            # Graphs with columnar attributes are cached apart from the others.
+            cache_key = uuid + ('/columnar' if columnar_attributes else '')
+            if cache is not None:
+                modification_time = ndex.get_network_summary(uuid).get('modificationTime')
+                cached = None
+                if modification_time is not None:
+                    cached = cache.get(ndex.host, cache_key, modification_time)
+                if cached is not None:
+                    self.__dict__.update(cached.__dict__)
+                    return
+            response = ndex.get_network_as_cx_stream(uuid)
+            if not response:
                 raise RuntimeError("Failed to retrieve network with uuid " + uuid + " from " + server)
-            else:
-                metadata_temp = next((item for item in cx if item.get("metaData") is not None))
-                if(metadata_temp is not None):
-                    self.metadata_original = metadata_temp["metaData"]
+            # Feed the aspects to the loader as they arrive instead of parsing the whole body first.
+            cx = read_cx_fragments(response.iter_content(chunk_size=CX_CHUNK_SIZE))
 
         # If there is no CX to process, just return.
         if cx == None:
             return
 
-        # First pass, get information about subnetworks.
-        for aspect in cx:
-            if 'status' in aspect :
-                if aspect['status'][0]['success']:
-                    continue
-                else:
-                    raise RuntimeError("Error in CX status aspect: " + aspect['status'][0]['error'])
-            if "numberVerification" in aspect:
-                # new status and numberVerification will be added when the network is output to_cx
-                continue
-            if 'subNetworks' in aspect:
-                for subnetwork in aspect.get('subNetworks'):
-                    id = subnetwork.get('@id')
-                    if self.subnetwork_id != None:
-                        raise ValueError("networkn does not support collections!")
-                    self.subnetwork_id = id
-            elif 'cyViews' in aspect:
-                for cyViews in aspect.get('cyViews'):
-                    id = cyViews.get('@id')
-                    if self.view_id != None:
-                        raise ValueError("networkn does not support more than one view!")
-                    self.view_id = id
-            elif 'metaData' in aspect:
-                self.metadata_original = aspect["metaData"]
-                # Strip metaData
-                continue
-            elif 'provenanceHistory' in aspect:
-                elements = aspect['provenanceHistory']
-                if len(elements) > 0:
-                    if len(elements)>1 or self.provenance :
-                        raise RuntimeError('profenanceHistory aspect can only have one element.')
-                    else :
-                        self.provenance = elements[0]
-            elif '@context' in aspect :
-                elements = aspect['@context']
-                if len(elements) > 0:
-                    if  len(elements) > 1 or self.namespaces:
-                        raise RuntimeError('@context aspect can only have one element')
-                    else :
-                        self.namespaces = elements[0]
-            # TODO elif if it's an aspect we want to keep out we put an elif for that aspect
-            else:
-                self.unclassified_cx.append(aspect)
+        self._load_cx(cx)
+        if modification_time is not None:
+            cache.put(ndex.host, cache_key, modification_time, self)
+        print('')
 
-            cx = self.unclassified_cx
+    #------------------------------------------
+    #       CX INPUT
+    #------------------------------------------
 
-        # Second pass, just build basic graph.
-        self.unclassified_cx = []
-        for aspect in cx:
-            if 'nodes' in aspect:
-                for node in aspect.get('nodes'):
-                    id = node.get('@id')
-                    name = node['n'] if 'n' in node else None
-                    if name:
-                        self.add_node(id, name=name)
-                    else:
-                        self.add_node(id)
-                    represents = node.get('r') if 'r' in node else None
-                    if represents:
-                        self.node.get(id)['represents'] = represents
-
-            elif 'edges' in aspect:
-                for edge in aspect.get('edges'):
-                    id = edge.get('@id')
-                    interaction = edge['i'] if 'i' in edge else None
-                    s = edge['s']
-                    t = edge['t']
-                    self.edgemap[id] = (s, t)
-                    if interaction:
-                        self.add_edge(s, t, key=id, interaction=interaction)
-                    else:
-                        self.add_edge(s, t, key=id)
-            else:
-                self.unclassified_cx.append(aspect)
-        cx = self.unclassified_cx
+    # Aspects whose elements refer to elements of other aspects.  CX does not
+    # guarantee any aspect order, so these are queued while the CX is read and
+    # applied once all nodes, edges, citations and supports are known.  The
+    # attribute queue is drained before the reference queue because edge
+    # citations are stored in the 'ndex:citation' edge attribute.
+    _CX_ATTRIBUTE_ASPECTS = ('nodeAttributes', 'edgeAttributes')
+    _CX_REFERENCE_ASPECTS = ('nodeCitations', 'edgeCitations', 'nodeSupports', 'edgeSupports')
 
-        # Third pass, handle attributes
-        # Notes. Not handled, datatypes.
-        self.unclassified_cx = []
-        for aspect in cx:
-            if 'networkAttributes' in aspect:
-                for networkAttribute in aspect['networkAttributes']:
-                    name = networkAttribute['n']
-                    # special: ignore selected
-           #         if name == 'selected':
-           #             continue
-                    value = parse_attribute(networkAttribute)
-                    value = networkAttribute['v']
-                    if value is not None:
-                        if 's' in networkAttribute or name not in self.graph:
-                            self.graph[name] = value
+    def _load_cx(self, cx):
+        """Build this graph from CX in a single pass over the aspect fragments.
 
-            elif 'nodeAttributes' in aspect:
-                for nodeAttribute in aspect['nodeAttributes']:
-                    id = nodeAttribute['po']
-                    name = nodeAttribute['n']
-                    value = parse_attribute(nodeAttribute)
-                    if value is not None:
-                        if 's' in nodeAttribute or name not in self.node[id]:
-                            self.node[id][name] = value
+        :param cx: The aspect fragments, e.g. a parsed CX document.
+        :type cx: iterable of dict
 
-            elif 'edgeAttributes' in aspect:
-                for edgeAttribute in aspect['edgeAttributes']:
-                    id = edgeAttribute['po']
-                    s, t = self.edgemap[id]
-                    name = edgeAttribute['n']
-                    value = parse_attribute(edgeAttribute)
-                    if value is not None:
-                        if 's' in edgeAttribute or name not in self[s][t][id]:
-                            self[s][t][id][name] = value
-            else:
-                self.unclassified_cx.append(aspect)
+        """
+        dispatch = {
+            'status': self._load_cx_status,
+            'numberVerification': self._load_cx_skip,
+            'subNetworks': self._load_cx_subnetworks,
+            'cyViews': self._load_cx_views,
+            'metaData': self._load_cx_metadata,
+            'provenanceHistory': self._load_cx_provenance,
+            '@context': self._load_cx_context,
+            'nodes': self._load_cx_nodes,
+            'edges': self._load_cx_edges,
+            'networkAttributes': self._load_cx_network_attributes,
+            'cartesianLayout': self._load_cx_cartesian_layout,
+            'citations': self._load_cx_citations,
+            'supports': self._load_cx_supports,
+            'functionTerms': self._load_cx_function_terms,
+            'reifiedEdges': self._load_cx_reified_edges,
+            'visualProperties': self._load_cx_visual_properties,
+            'cyVisualProperties': self._load_cx_visual_properties,
+        }
+        attribute_queue = deque()
+        reference_queue = deque()
+        for name in self._CX_ATTRIBUTE_ASPECTS:
+            dispatch[name] = attribute_queue.append
+        for name in self._CX_REFERENCE_ASPECTS:
+            dispatch[name] = reference_queue.append
 
-        cx = self.unclassified_cx
         self.unclassified_cx = []
-
-        # Fourth pass, node locations
         self.pos = {}
         for aspect in cx:
-            if 'cartesianLayout' in aspect:
-                for nodeLayout in aspect['cartesianLayout']:
-                    id = nodeLayout['node']
-                    x = nodeLayout['x']
-                    y = nodeLayout['y']
-                    self.pos[id] = [x,y]
-            else:
+            handler = None
+            for name in aspect:
+                handler = dispatch.get(name)
+                break
+            if handler is None:
                 self.unclassified_cx.append(aspect)
-
-        cx = self.unclassified_cx
-        self.unclassified_cx = []
-
-        # Fifth pass, citations
-        for aspect in cx:
-            if 'citations' in aspect:
-                for citation in aspect['citations']:
-                    attributes = copy.deepcopy(citation)
-                    attributes.pop("@id")
-                    self.citation_map[citation["@id"]] = attributes
-                    self.citation_reference_map[citation["@id"]] = 0
             else:
-                self.unclassified_cx.append(aspect)
-
-        cx = self.unclassified_cx
-        self.unclassified_cx = []
-
-        # Sixth pass, supports, the attributes include the mapping to their citation (if any) by its id
-        for aspect in cx:
-            if 'supports' in aspect:
-                for support in aspect['supports']:
-                    attributes = copy.deepcopy(support)
-                    attributes.pop("@id")
-                    self.support_map[support["@id"]] = attributes
-                    self.support_reference_map[support["@id"]] = 0
+                handler(aspect)
 
+        # Drain the queues front to back so that applied fragments can be freed.
+        while attribute_queue:
+            aspect = attribute_queue.popleft()
+            if 'nodeAttributes' in aspect:
+                self._load_cx_node_attributes(aspect)
             else:
-                self.unclassified_cx.append(aspect)
+                self._load_cx_edge_attributes(aspect)
 
-        cx = self.unclassified_cx
-        self.unclassified_cx = []
-        # Seventh pass, map supports and citations to nodes and edges
-        for aspect in cx:
+        while reference_queue:
+            aspect = reference_queue.popleft()
             if 'nodeCitations' in aspect:
-                for node_citation in aspect['nodeCitations']:
-                    for node in node_citation["po"]:
-                        self.node_citation_map[node] = node_citation["citations"]
-                        for citation_id in node_citation["citations"]:
-                            cit_ref = self.citation_reference_map.get(citation_id)
-                            if(cit_ref is not None):
-                                self.citation_reference_map[citation_id] += 1
+                self._load_cx_node_citations(aspect)
             elif 'edgeCitations' in aspect:
-                for edge_citation in aspect['edgeCitations']:
-                    for edge in edge_citation["po"]:
-                        edge_citation_added = False
-                        for citation_id in edge_citation["citations"]:
-                            citation_tmp = self.citation_map.get(citation_id)
-                            if citation_tmp is not None and isinstance(citation_tmp, dict):
-                                self.add_citation_to_edge(edge, citation_tmp.get('dc:identifier'))
-                                edge_citation_added = True
-                            if citation_tmp is not None and isinstance(citation_tmp, basestring):
-                                self.add_citation_to_edge(edge, citation_tmp)
-                                edge_citation_added = True
-
-                            cit_ref = self.citation_reference_map.get(citation_id)
-                            if(cit_ref is not None):
-                                self.citation_reference_map[citation_id] += 1
-
-                        if not edge_citation_added:
-                            self.edge_citation_map[edge] = edge_citation["citations"]
-
+                self._load_cx_edge_citations(aspect)
             elif 'nodeSupports' in aspect:
-                for node_support in aspect['nodeSupports']:
-                    for node_sup_po in node_support["po"]:
-                        self.node_support_map[node_sup_po] = node_support["supports"]
-                        for supports_id in node_support["supports"]:
-                            sup_ref = self.support_reference_map.get(supports_id)
-                            if(sup_ref is not None):
-                                self.support_reference_map[supports_id] += 1
-            elif 'edgeSupports' in aspect:
-                for edge_support in aspect['edgeSupports']:
-                    for edge_sup in edge_support["po"]:
-                        self.edge_support_map[edge_sup] = edge_support["supports"]
-                        for supports_id in edge_support["supports"]:
-                            sup_ref = self.support_reference_map.get(supports_id)
-                            if(sup_ref is not None):
-                                self.support_reference_map[supports_id] += 1
-            elif 'functionTerms' in aspect:
-                for function_term in aspect['functionTerms']:
-                    self.function_term_map[function_term["po"]] = function_term
-            elif 'reifiedEdges' in aspect:
-                for reified_edge in aspect["reifiedEdges"]:
-                    self.reified_edges [reified_edge['node']] = reified_edge
-            elif 'visualProperties' in aspect:
-                # remove all references to view id
-                for visual_properties in aspect["visualProperties"]:
-                    visual_properties.pop('view', None)
-                self.unclassified_cx.append(aspect)
-            elif 'cyVisualProperties' in aspect:
-                # remove all references to view id
-                for visual_properties in aspect["cyVisualProperties"]:
-                    visual_properties.pop('view', None)
-                self.unclassified_cx.append(aspect)
+                self._load_cx_node_supports(aspect)
             else:
-                self.unclassified_cx.append(aspect)
-        print('')
+                self._load_cx_edge_supports(aspect)
+
+    def _load_cx_skip(self, aspect):
+        # new status and numberVerification will be added when the network is output to_cx
+        pass
+
+    def _load_cx_status(self, aspect):
+        if not aspect['status'][0]['success']:
+            raise RuntimeError("Error in CX status aspect: " + aspect['status'][0]['error'])
+
+    def _load_cx_subnetworks(self, aspect):
+        for subnetwork in aspect.get('subNetworks'):
+            id = subnetwork.get('@id')
+            if self.subnetwork_id != None:
+                raise ValueError("networkn does not support collections!")
+            self.subnetwork_id = id
+
+    def _load_cx_views(self, aspect):
+        for cyViews in aspect.get('cyViews'):
+            id = cyViews.get('@id')
+            if self.view_id != None:
+                raise ValueError("networkn does not support more than one view!")
+            self.view_id = id
+
+    def _load_cx_metadata(self, aspect):
+        # Strip metaData
+        self.metadata_original = aspect["metaData"]
+
+    def _load_cx_provenance(self, aspect):
+        elements = aspect['provenanceHistory']
+        if len(elements) > 0:
+            if len(elements)>1 or self.provenance :
+                raise RuntimeError('profenanceHistory aspect can only have one element.')
+            else :
+                self.provenance = elements[0]
+
+    def _load_cx_context(self, aspect):
+        elements = aspect['@context']
+        if len(elements) > 0:
+            if  len(elements) > 1 or self.namespaces:
+                raise RuntimeError('@context aspect can only have one element')
+            else :
+                self.namespaces = elements[0]
+
+    def _load_cx_nodes(self, aspect):
+        for node in aspect.get('nodes'):
+            id = node.get('@id')
+            name = node['n'] if 'n' in node else None
+            if name:
+                self.add_node(id, name=name)
+            else:
+                self.add_node(id)
+            represents = node.get('r') if 'r' in node else None
+            if represents:
+                self.node.get(id)['represents'] = represents
+
+    def _load_cx_edges(self, aspect):
+        for edge in aspect.get('edges'):
+            id = edge.get('@id')
+            interaction = edge['i'] if 'i' in edge else None
+            s = edge['s']
+            t = edge['t']
+            self.edgemap[id] = (s, t)
+            if interaction:
+                self.add_edge(s, t, key=id, interaction=interaction)
+            else:
+                self.add_edge(s, t, key=id)
+
+    def _load_cx_network_attributes(self, aspect):
+        for networkAttribute in aspect['networkAttributes']:
+            name = networkAttribute['n']
+            # special: ignore selected
+   #         if name == 'selected':
+   #             continue
+            value = parse_attribute(networkAttribute)
+            value = networkAttribute['v']
+            if value is not None:
+                if 's' in networkAttribute or name not in self.graph:
+                    self.graph[name] = value
+
+    def _load_cx_node_attributes(self, aspect):
+        store = self.node_attribute_store
+        elements = aspect['nodeAttributes']
+        for nodeAttribute, value in zip(elements, parse_attributes(elements)):
+            id = nodeAttribute['po']
+            name = nodeAttribute['n']
+            if value is not None:
+                if store is not None and name not in self._NODE_CORE_ATTRIBUTES:
+                    if 's' in nodeAttribute or not store.has(id, name):
+                        store.set(id, name, value, nodeAttribute.get('d'))
+                elif 's' in nodeAttribute or name not in self.node[id]:
+                    self.node[id][name] = value
+
+    def _load_cx_edge_attributes(self, aspect):
+        store = self.edge_attribute_store
+        elements = aspect['edgeAttributes']
+        for edgeAttribute, value in zip(elements, parse_attributes(elements)):
+            id = edgeAttribute['po']
+            s, t = self.edgemap[id]
+            name = edgeAttribute['n']
+            if value is not None:
+                if store is not None and name not in self._EDGE_CORE_ATTRIBUTES:
+                    if 's' in edgeAttribute or not store.has(id, name):
+                        store.set(id, name, value, edgeAttribute.get('d'))
+                elif 's' in edgeAttribute or name not in self[s][t][id]:
+                    self[s][t][id][name] = value
+
+    def _load_cx_cartesian_layout(self, aspect):
+        for nodeLayout in aspect['cartesianLayout']:
+            id = nodeLayout['node']
+            x = nodeLayout['x']
+            y = nodeLayout['y']
+            self.pos[id] = [x,y]
+
+    def _load_cx_citations(self, aspect):
+        for citation in aspect['citations']:
+            attributes = copy.deepcopy(citation)
+            attributes.pop("@id")
+            self.citation_map[citation["@id"]] = attributes
+            self.citation_reference_map[citation["@id"]] = 0
+
+    # the attributes include the mapping to their citation (if any) by its id
+    def _load_cx_supports(self, aspect):
+        for support in aspect['supports']:
+            attributes = copy.deepcopy(support)
+            attributes.pop("@id")
+            self.support_map[support["@id"]] = attributes
+            self.support_reference_map[support["@id"]] = 0
+
+    def _load_cx_node_citations(self, aspect):
+        for node_citation in aspect['nodeCitations']:
+            for node in node_citation["po"]:
+                self.node_citation_map[node] = node_citation["citations"]
+                for citation_id in node_citation["citations"]:
+                    cit_ref = self.citation_reference_map.get(citation_id)
+                    if(cit_ref is not None):
+                        self.citation_reference_map[citation_id] += 1
+
+    def _load_cx_edge_citations(self, aspect):
+        for edge_citation in aspect['edgeCitations']:
+            for edge in edge_citation["po"]:
+                edge_citation_added = False
+                for citation_id in edge_citation["citations"]:
+                    citation_tmp = self.citation_map.get(citation_id)
+                    if citation_tmp is not None and isinstance(citation_tmp, dict):
+                        self.add_citation_to_edge(edge, citation_tmp.get('dc:identifier'))
+                        edge_citation_added = True
+                    if citation_tmp is not None and isinstance(citation_tmp, basestring):
+                        self.add_citation_to_edge(edge, citation_tmp)
+                        edge_citation_added = True
+
+                    cit_ref = self.citation_reference_map.get(citation_id)
+                    if(cit_ref is not None):
+                        self.citation_reference_map[citation_id] += 1
+
+                if not edge_citation_added:
+                    self.edge_citation_map[edge] = edge_citation["citations"]
+
+    def _load_cx_node_supports(self, aspect):
+        for node_support in aspect['nodeSupports']:
+            for node_sup_po in node_support["po"]:
+                self.node_support_map[node_sup_po] = node_support["supports"]
+                for supports_id in node_support["supports"]:
+                    sup_ref = self.support_reference_map.get(supports_id)
+                    if(sup_ref is not None):
+                        self.support_reference_map[supports_id] += 1
+
+    def _load_cx_edge_supports(self, aspect):
+        for edge_support in aspect['edgeSupports']:
+            for edge_sup in edge_support["po"]:
+                self.edge_support_map[edge_sup] = edge_support["supports"]
+                for supports_id in edge_support["supports"]:
+                    sup_ref = self.support_reference_map.get(supports_id)
+                    if(sup_ref is not None):
+                        self.support_reference_map[supports_id] += 1
+
+    def _load_cx_function_terms(self, aspect):
+        for function_term in aspect['functionTerms']:
+            self.function_term_map[function_term["po"]] = function_term
+
+    def _load_cx_reified_edges(self, aspect):
+        for reified_edge in aspect["reifiedEdges"]:
+            self.reified_edges [reified_edge['node']] = reified_edge
+
+    def _load_cx_visual_properties(self, aspect):
+        # remove all references to view id
+        for name in aspect:
+            for visual_properties in aspect[name]:
+                visual_properties.pop('view', None)
+        self.unclassified_cx.append(aspect)
 
     def networkx_to_NdexGraph(networkx_G):
         """Converts a NetworkX into a NdexGraph object"""
@@ -447,6 +579,9 @@ class NdexGraph (MultiDiGraph):
         """
         self.pos = {}
         #self.unclassified_cx = []
+        # Attributes are set directly below; let the node index be rebuilt when next queried.
+        if self.node_index is not None:
+            self.node_index.clear()
 
         if 'subNetworks' == aspect_type:
             for subnetwork in aspect:
@@ -588,6 +723,7 @@ class NdexGraph (MultiDiGraph):
         self.view_id = None
         self.max_node_id = None
         self.max_edge_id = None
+        self._edge_count = 0
         self.max_citation_id = None
         self.max_support_id = None
         self.pos = None
@@ -599,6 +735,38 @@ class NdexGraph (MultiDiGraph):
         self.support_map = {}
         self.node_support_map = {}
         self.edge_support_map = {}
+        # clear() may be called by networkx before __init__ has created the stores.
+        if getattr(self, 'node_attribute_store', None) is not None:
+            self.node_attribute_store.clear()
+            self.edge_attribute_store.clear()
+        if getattr(self, 'node_index', None) is not None:
+            self.node_index.clear()
+
+    # Attributes that stay in the networkx attribute dicts when an attribute store is used, because they belong to
+    # the CX node and edge elements themselves.
+    _NODE_CORE_ATTRIBUTES = ('name', 'represents')
+    _EDGE_CORE_ATTRIBUTES = ('interaction',)
+
+    def use_attribute_store(self):
+        """Keep node and edge attributes in columnar AttributeStores instead of the networkx attribute dicts.
+
+        Attributes already set are moved to the stores.  The node 'name' and 'represents' and the edge
+        'interaction' attributes stay in the attribute dicts.  Attributes in the stores are only seen through the
+        NdexGraph attribute methods (set_node_attribute, get_node_attribute_value_by_id, ...) and in the CX
+        output, not through the networkx API.
+
+        """
+        if self.node_attribute_store is None:
+            self.node_attribute_store = AttributeStore()
+            self.edge_attribute_store = AttributeStore()
+        store = self.node_attribute_store
+        for node_id, attributes in self.nodes_iter(data=True):
+            for name in [name for name in attributes if name not in self._NODE_CORE_ATTRIBUTES]:
+                store.set(node_id, name, attributes.pop(name))
+        store = self.edge_attribute_store
+        for _, _, edge_id, attributes in self.edges_iter(keys=True, data=True):
+            for name in [name for name in attributes if name not in self._EDGE_CORE_ATTRIBUTES]:
+                store.set(edge_id, name, attributes.pop(name))
 
     def set_name(self, name):
         """Set the name of this graph
@@ -649,9 +817,12 @@ class NdexGraph (MultiDiGraph):
     #       OUTPUT
     #------------------------------------------
 
-    def to_cx(self, md_dict=None):
+    def to_cx(self, md_dict=None, fragment_size=None):
         """Convert this network to a CX dictionary
 
+        :param fragment_size: The maximum number of nodes or edges per aspect fragment.  If None, all nodes are
+            written in one fragment and all edges in another.
+        :type fragment_size: int
         :return: The cx dictionary that represents this network.
         :rtype: dict
         """
@@ -664,77 +835,24 @@ class NdexGraph (MultiDiGraph):
         if (self.subnetwork_id and not self.view_id) or (not self.subnetwork_id and self.view_id):
             raise ValueError("subnetwork and view inconsistent. subnetwork id = %s and view id = %s" % (self.subnetwork_id, self.view_id))
 
-        G = self
-        cx = []
-        cx += ca.number_verification()
-        cx += self.generate_metadata(G, self.unclassified_cx) #ca.metadata(metadata_dict=md_dict)
-
-        #always add context first.
-        if self.namespaces:
-            cx += ca.namespaces(G)
-
-        network_attributes = ca.network_attributes(G, has_single_subnetwork)
-        cx += network_attributes
-
-        if has_single_subnetwork:
-            cx += ca.subnetworks(G, self.subnetwork_id, self.view_id)
-        # - don't output subnetworks if the NdexGraph doesn't know about them.
-        # - All operations that add aspects for visual properties, cartesian coordinates,
-        #   or otherwise refer to subnetworks must ensure that subnetwork and view ids are set
-        # else:
-        #     cx += ca.subnetworks(G, 0, 0)
-        cx += ca.nodes(G)
-        cx += ca.edges(G)
-        node_att = ca.node_attributes(G, has_single_subnetwork)
-        if(node_att is not None):
-            cx += node_att
-
-        edge_att = ca.edge_attributes(G, has_single_subnetwork)
-        if(edge_att is not None):
-            cx += edge_att
-
-        if self.pos and len(self.pos):
-            if has_single_subnetwork:
-                cx += ca.cartesian(G)#, self.view_id)
-            else:
-                cx += ca.cartesian(G)
-                #raise ValueError("NdexGraph positions (g.pos) set without setting view and subnetwork ids")
-
-        if len(self.citation_map) > 0:
-            cx += ca.citations(G)
-        if len(self.node_citation_map) > 0:
-            cx += ca.node_citations(G)
-        if len(self.edge_citation_map) > 0:
-            cx += ca.edge_citations(G)
-        if len(self.support_map) > 0:
-            cx += ca.supports(G)
-        if len(self.node_support_map) > 0:
-            cx += ca.node_supports(G)
-        if len(self.edge_support_map) > 0:
-            cx += ca.edge_supports(G)
-        if len(self.function_term_map) > 0:
-            cx += ca.function_terms(G)
-        if len(self.reified_edges) > 0:
-            cx += ca.reified_edges(G)
-        if self.provenance:
-            cx += ca.provenance(G)
-
-        for fragment in self.unclassified_cx:
-            # filter out redundant networkRelations
-            if not "networkRelations" in fragment:
-                cx += [fragment]
-
-        #cx += self.unclassified_cx
-        cx += [self.status]
-
-        return cx
+        return list(self._cx_fragments(has_single_subnetwork, fragment_size))
 
     # Obsolete?
     def add_status(self, status):
         if(len(self.status['status']) == 0):
             self.status['status'].append(status)
 
-    def generate_metadata(self, G, unclassified_cx):
+    def generate_metadata(self, G, unclassified_cx, attribute_counts=None):
+        """The metaData aspect of the CX of G.
+
+        :param attribute_counts: The number of node attribute and edge attribute elements, if already known.
+            They are counted on the graph otherwise.
+        :type attribute_counts: tuple
+        :return: The metaData aspect fragment, in a list.
+        :rtype: list
+        """
+        if attribute_counts is None:
+            attribute_counts = (G._count_node_attributes(), G._count_edge_attributes())
         return_metadata = []
         consistency_group = 1
         if(self.metadata_original is not None):
@@ -764,14 +882,12 @@ class NdexGraph (MultiDiGraph):
         #========================
         # Nodes metadata
         #========================
-        node_ids = [n[0] for n in G.nodes_iter(data=True)]
-        if(len(node_ids) < 1):
-            node_ids = [0]
+        # An empty aspect is counted as one element with id 0.
         return_metadata.append(
             {
                 "consistencyGroup" : consistency_group,
-                "elementCount" : len(node_ids),
-                "idCounter": max(node_ids),
+                "elementCount" : G.number_of_nodes() or 1,
+                "idCounter": G._node_id_counter(),
                 "name" : "nodes",
                 "properties" : [ ],
                 "version" : "1.0"
@@ -781,14 +897,11 @@ class NdexGraph (MultiDiGraph):
         #========================
         # Edges metadata
         #========================
-        edge_ids = [e[2]for e in G.edges_iter(data=True, keys=True)]
-        if(len(edge_ids) < 1):
-            edge_ids = [0]
         return_metadata.append(
             {
                 "consistencyGroup" : consistency_group,
-                "elementCount" : len(edge_ids),
-                "idCounter": max(edge_ids),
+                "elementCount" : G.number_of_edges() or 1,
+                "idCounter": G._edge_id_counter(),
                 "name" : "edges",
                 "properties" : [ ],
                 "version" : "1.0"
@@ -812,23 +925,7 @@ class NdexGraph (MultiDiGraph):
         #===========================
         # Node Attributes metadata
         #===========================
-        #id_max = 0
-        attr_count = 0
-        for node_id , attributes in G.nodes_iter(data=True):
-            for attribute_name in attributes:
-                if attribute_name != "name" and attribute_name != "represents":
-                    attr_count += 1
-
-
-
-        #
-        # for n, nattr in G.nodes(data=True):
-        #     if(bool(nattr)):
-        #         attr_count += len(nattr.keys())
-        #
-        #     if(n > id_max):
-        #         id_max = n
-
+        attr_count = attribute_counts[0]
         if(attr_count > 0):
             return_metadata.append(
                 {
@@ -844,18 +941,7 @@ class NdexGraph (MultiDiGraph):
         #===========================
         # Edge Attributes metadata
         #===========================
-        #id_max = 0
-        attr_count = 0
-        for s, t, id, a in G.edges(data=True, keys=True):
-            if(bool(a)):
-                for attribute_name in a:
-                    if attribute_name != "interaction":
-                        attr_count += 1
-                #attr_count += len(a.keys())
-
-            # if(id > id_max):
-            #     id_max = id
-
+        attr_count = attribute_counts[1]
         if(attr_count > 0):
             return_metadata.append(
                 {
@@ -1044,29 +1130,121 @@ class NdexGraph (MultiDiGraph):
         return [{'metaData': return_metadata}]
 
 
-    def to_cx_stream(self, md_dict=None):
-        """Convert this network to a CX stream
+    def _count_node_attributes(self):
+        count = 0
+        core = self._NODE_CORE_ATTRIBUTES
+        for attributes in self.node.values():
+            count += len(attributes)
+            for name in core:
+                if name in attributes:
+                    count -= 1
+        if self.node_attribute_store is not None:
+            count += len(self.node_attribute_store)
+        return count
+
+    def _count_edge_attributes(self):
+        count = 0
+        for neighbors in self.succ.values():
+            for keydict in neighbors.values():
+                for attributes in keydict.values():
+                    count += len(attributes)
+                    if 'interaction' in attributes:
+                        count -= 1
+        if self.edge_attribute_store is not None:
+            count += len(self.edge_attribute_store)
+        return count
+
+    def _cx_fragments(self, has_single_subnetwork=False, fragment_size=None, lazy=False):
+        # The aspect fragments of the CX of this network, in document order: to_cx collects them, to_cx_chunks
+        # encodes them as they come.  Lazy fragments generate the elements of the node, edge and attribute aspects
+        # from the graph while they are encoded, and write_cx_chunks leaves such an aspect out if it is empty, as
+        # to_cx does.  Otherwise one pass over the nodes and one over the edges give both their aspects and the
+        # attribute counts of the metadata.
+        G = self
+        if lazy:
+            aspects = [('nodes', ca.node_elements(G)), ('edges', ca.edge_elements(G)),
+                       ('nodeAttributes', ca.node_attribute_elements(G, has_single_subnetwork)),
+                       ('edgeAttributes', ca.edge_attribute_elements(G, has_single_subnetwork))]
+            attribute_counts = None
+            elements = iter
+        else:
+            nodes, node_attributes = ca.node_aspect_elements(G, has_single_subnetwork)
+            edges, edge_attributes = ca.edge_aspect_elements(G, has_single_subnetwork)
+            aspects = [('nodes', nodes), ('edges', edges), ('nodeAttributes', node_attributes),
+                       ('edgeAttributes', edge_attributes)]
+            attribute_counts = (len(node_attributes), len(edge_attributes))
+            elements = list
+
+        for fragment in ca.number_verification():
+            yield fragment
+        for fragment in self.generate_metadata(G, self.unclassified_cx, attribute_counts=attribute_counts):
+            yield fragment
+
+        #always add context first.
+        for fragment in ca.namespaces(G):
+            yield fragment
 
-        :return: The CX stream representation of this network.
-        :rtype: io.BytesIO
+        for fragment in ca.network_attributes(G, has_single_subnetwork):
+            yield fragment
+
+        if has_single_subnetwork:
+            for fragment in ca.subnetworks(G, self.subnetwork_id, self.view_id):
+                yield fragment
+        # - don't output subnetworks if the NdexGraph doesn't know about them.
+        # - All operations that add aspects for visual properties, cartesian coordinates,
+        #   or otherwise refer to subnetworks must ensure that subnetwork and view ids are set
+
+        for name, aspect in aspects:
+            if lazy:
+                yield {name: aspect}
+            else:
+                for fragment in ca.fragments(name, aspect, fragment_size if name in ('nodes', 'edges') else None):
+                    yield fragment
+
+        for name, present, aspect in (
+                ('cartesianLayout', self.pos, ca.cartesian_elements),
+                ('citations', self.citation_map, ca.citation_elements),
+                ('nodeCitations', self.node_citation_map, ca.node_citation_elements),
+                ('edgeCitations', self.edge_citation_map, ca.edge_citation_elements),
+                ('supports', self.support_map, ca.support_elements),
+                ('nodeSupports', self.node_support_map, ca.node_support_elements),
+                ('edgeSupports', self.edge_support_map, ca.edge_support_elements),
+                ('functionTerms', self.function_term_map, lambda G: G.function_term_map.values()),
+                ('reifiedEdges', self.reified_edges, lambda G: G.reified_edges.values())):
+            if present:
+                yield {name: elements(aspect(G))}
+        for fragment in ca.provenance(G):
+            yield fragment
+
+        for fragment in self.unclassified_cx:
+            # filter out redundant networkRelations
+            if not "networkRelations" in fragment:
+                yield fragment
+
+        yield self.status
+
+    def to_cx_chunks(self, chunk_size=CX_CHUNK_SIZE):
+        """Generate the CX of this network as UTF-8 encoded chunks.
+
+        The aspects are encoded element by element straight from the graph, so the complete CX never has to be
+        held in memory.
+
+        :param chunk_size: The approximate size of each chunk, in bytes.
+        :type chunk_size: int
+        :return: The CX document in chunks.
+        :rtype: generator of bytes
 
         """
-        cx = self.to_cx(md_dict)
+        return write_cx_chunks(self._cx_fragments(lazy=True), chunk_size)
 
-        if sys.version_info.major == 3:
-            return io.BytesIO(json.dumps(cx).encode('utf-8'))
-        else:
-            return_bytes = None
-            try:
-                return_bytes = io.BytesIO(json.dumps(cx))
-            except UnicodeDecodeError as err1:
-                print("Detected invalid encoding. Trying latin-1 encoding.")
-                return_bytes = io.BytesIO(json.dumps(cx, encoding="latin-1"))
-                print("Success")
-            except Exception as err2:
-                print(err2.message)
+    def to_cx_stream(self, md_dict=None):
+        """Convert this network to a CX stream
+
+        :return: The CX stream representation of this network. The CX is encoded as the stream is read.
+        :rtype: ndex.cx_stream.CXByteStream
 
-            return return_bytes
+        """
+        return CXByteStream(self.to_cx_chunks())
 
     def write_to(self, filename):
         """Write this network as a CX file to the specified filename.
@@ -1075,8 +1253,33 @@ class NdexGraph (MultiDiGraph):
         :type filename: str
 
         """
-        with open(filename, 'w') as outfile:
-            json.dump(self.to_cx(), outfile, indent=4)
+        with open(filename, 'wb') as outfile:
+            for chunk in self.to_cx_chunks():
+                outfile.write(chunk)
+
+    def write_snapshot(self, filename):
+        """Write this network as a binary snapshot (see ndex.snapshot) to the specified filename.
+
+        A snapshot is smaller than the CX of the network and is read back several times faster by read_snapshot.
+
+        :param filename: The name of the file to write to.
+        :type filename: str
+
+        """
+        with open(filename, 'wb') as outfile:
+            snapshot.dump(self, outfile)
+
+    @staticmethod
+    def read_snapshot(filename):
+        """Read a network written by write_snapshot.
+
+        :param filename: The name of the file to read.
+        :type filename: str
+        :rtype: NdexGraph
+
+        """
+        with open(filename, 'rb') as infile:
+            return snapshot.load(infile)
 
     def upload_to(self, server, username, password, visibility=None, indexed_fields=None):
         """ Upload this network to the specified server to the account specified by username and password.
@@ -1095,7 +1298,7 @@ class NdexGraph (MultiDiGraph):
         """
 
         ndex = nc.Ndex(server,username,password)
-        return ndex.save_new_network(self.to_cx(), visibility=visibility, indexed_fields=indexed_fields)
+        return ndex.save_cx_stream_as_new_network(self.to_cx_stream(), visibility=visibility, indexed_fields=indexed_fields)
 
     def update_to(self, uuid, server, username, password):
         """ Upload this network to the specified server to the account specified by username and password.
@@ -1112,32 +1315,79 @@ class NdexGraph (MultiDiGraph):
         Example:
             ndexGraph.upload_to('http://test.ndexbio.org', 'myusername', 'mypassword')
         """
-        cx = self.to_cx()
         ndex = nc.Ndex(server,username,password)
-
-        if(len(cx) > 0):
-            if(cx[len(cx) - 1] is not None):
-                if(cx[len(cx) - 1].get('status') is None):
-                    # No STATUS element in the array.  Append a new status
-                    cx.append({"status" : [ {"error" : "","success" : True} ]})
-                else:
-                    if(len(cx[len(cx) - 1].get('status')) < 1):
-                        # STATUS element found, but the status was empty
-                        cx[len(cx) - 1].get('status').append({"error" : "","success" : True})
-
-            if sys.version_info.major == 3:
-                stream = io.BytesIO(json.dumps(cx).encode('utf-8'))
-            else:
-                stream = io.BytesIO(json.dumps(cx))
-
-            return ndex.update_cx_network(stream, uuid)
-        else:
-            raise IndexError("Cannot save empty CX.  Please provide a non-empty CX document.")
+        return ndex.update_cx_network(self.to_cx_stream(), uuid)
 
     #------------------------------------------
     #       NODES
     #------------------------------------------
 
+    def _count_node_id(self, n):
+        # Keep max_node_id, the largest node id used so far, up to date for a node about to be added.
+        max_id = self.max_node_id
+        if max_id is None:
+            if not self.node:
+                self.max_node_id = n
+        else:
+            try:
+                if n > max_id:
+                    self.max_node_id = n
+            except TypeError:
+                # ids that cannot be compared; leave it to add_new_node to fail as it always did
+                self.max_node_id = None
+
+    def add_node(self, n, attr_dict=None, **attr):
+        self._count_node_id(n)
+        index = self.node_index
+        if index is None or not index.keys:
+            return super(NdexGraph, self).add_node(n, attr_dict, **attr)
+        # Existing nodes are updated, so unindex their current values first.
+        self._unindex_node(n)
+        super(NdexGraph, self).add_node(n, attr_dict, **attr)
+        for name in index.keys:
+            if self._has_node_attribute(n, name):
+                index.add(n, name, self._get_node_attribute(n, name))
+
+    def add_nodes_from(self, nodes, **attr):
+        node_count = len(self.node)
+        super(NdexGraph, self).add_nodes_from(nodes, **attr)
+        if len(self.node) != node_count:
+            # the new ids are not known here
+            self.max_node_id = None
+            if self.node_index is not None:
+                self.node_index.clear()
+
+    def use_node_index(self):
+        """Answer get_node_ids and get_edge_ids_by_node_attribute from an index of node attribute values.
+
+        An attribute is indexed when it is first queried.  The index is kept up to date by set_node_attribute,
+        add_new_node, add_cx_node, add_node, remove_node and remove_nodes_from, but not when node attribute dicts
+        are changed directly.
+
+        """
+        if self.node_index is None:
+            self.node_index = AttributeIndex()
+
+    def _has_node_attribute(self, node_id, name):
+        if name in self.node[node_id]:
+            return True
+        return self.node_attribute_store is not None and self.node_attribute_store.has(node_id, name)
+
+    def _node_attribute_items(self, name):
+        for node_id, attributes in self.nodes_iter(data=True):
+            if name in attributes:
+                yield node_id, attributes[name]
+        if self.node_attribute_store is not None:
+            for item in self.node_attribute_store.items(name):
+                yield item
+
+    def _unindex_node(self, n):
+        index = self.node_index
+        if n in self.node:
+            for name in index.keys:
+                if self._has_node_attribute(n, name):
+                    index.discard(n, name, self._get_node_attribute(n, name))
+
     def add_new_node(self, name=None, attr_dict=None, **attr):
         """Add a cx node, possibly with a particular name, to the graph.
 
@@ -1148,16 +1398,11 @@ class NdexGraph (MultiDiGraph):
         :param attr: Set or change attributes using key=value.
 
         """
-        if self.max_node_id == None:
-            if self.number_of_nodes() > 0:
-                self.max_node_id = max(self.nodes())
-            else:
-                self.max_node_id = 0
-        self.max_node_id += 1
+        node_id = self._node_id_counter() + 1
         if name:
             attr['name'] = name
-        self.add_node(self.max_node_id, attr_dict, **attr)
-        return self.max_node_id
+        self.add_node(node_id, attr_dict, **attr)
+        return node_id
 
     def add_cx_node(self, id, name=None, represents = None, attr_dict=None):
 
@@ -1173,20 +1418,78 @@ class NdexGraph (MultiDiGraph):
         return self.node[id]
 
     def remove_nodes_from(self, nbunch):
-        for n in nbunch:
-            self.pos.pop(n, None)
-            self.function_term_map.pop(n, None)
-        super(MultiDiGraph, self).remove_nodes_from(nbunch)
+        """Remove the nodes in nbunch and the edges incident to them, along with everything the graph holds for
+        them: layout positions, function terms, reified edges, attributes and citation and support references.
+        Nodes that are not in the graph are ignored.
 
-    def remove_node(self, n):
-        self.reified_edges.pop(n,None)
+        The incident edges are collected once for all nodes and reference counts are released in aggregate, so
+        this is much faster than removing the nodes one at a time.
 
-        if(self.function_term_map.get(n) is not None):
+        :param nbunch: The ids of the nodes to remove.
+        :type nbunch: iterable
+        """
+        node = self.node
+        nodes = set(n for n in nbunch if n in node)
+        if not nodes:
+            return
+        succ = self.succ
+        pred = self.pred
+
+        edge_ids = []
+        for n in nodes:
+            for keydict in succ[n].values():
+                edge_ids.extend(keydict)
+            for u, keydict in pred[n].items():
+                if u not in nodes:
+                    edge_ids.extend(keydict)
+
+        if self.node_index is not None and self.node_index.keys:
+            for n in nodes:
+                self._unindex_node(n)
+        if self.node_attribute_store is not None:
+            for n in nodes:
+                self.node_attribute_store.remove(n)
+        self._release_edges(edge_ids)
+
+        reified_edges = self.reified_edges
+        reified_edge_nodes = self._reified_edge_nodes
+        for n in nodes:
+            self.pos.pop(n, None)
             self.function_term_map.pop(n, None)
+            reified_edge = reified_edges.pop(n, None)
+            if reified_edge is not None and reified_edge_nodes is not None:
+                reified = reified_edge_nodes.get(reified_edge['edge'])
+                if reified and n in reified:
+                    reified.remove(n)
+                    self._reified_edge_count -= 1
+
+        # remove citation and support references to nodes
+        node_support_map = self.node_support_map
+        self._release_references([node_support_map.pop(n) for n in nodes if n in node_support_map],
+                                 self.support_reference_map, self.support_map)
+        node_citation_map = self.node_citation_map
+        self._release_references([node_citation_map.pop(n) for n in nodes if n in node_citation_map],
+                                 self.citation_reference_map, self.citation_map)
+
+        # networkX remove nodes, unlinking each neighbor once
+        for n in nodes:
+            for v in succ[n]:
+                if v not in nodes:
+                    del pred[v][n]
+            for u in pred[n]:
+                if u not in nodes:
+                    del succ[u][n]
+        for n in nodes:
+            del succ[n]
+            del pred[n]
+            del node[n]
+        if self._edge_count is not None:
+            self._edge_count -= len(edge_ids)
 
-        self.remove_citation_and_support_node_references(n)
-
-        super(MultiDiGraph, self).remove_node(n)
+    def remove_node(self, n):
+        if n not in self.node:
+            raise nx.NetworkXError("The node %s is not in the graph." % (n,))
+        self.remove_nodes_from([n])
 
     def remove_citation_and_support_node_references(self, node_id):
 
@@ -1233,14 +1536,10 @@ class NdexGraph (MultiDiGraph):
             self.node_citation_map.pop(node_id, None)
 
     def remove_orphan_nodes(self):
-        #   remove nodes with no edges
-        for node_id in self.nodes():
-            #node_name = network.get_node_attribute_value_by_id(node_id)
-            degree = self.degree([node_id])[node_id]
-            #print node_name + " : " + str()
-            if degree is 0:
-                #print " -- removing " + str(node_name) + " " + str(node_id)
-                self.remove_node(node_id)
+        """Remove the nodes that have no edges."""
+        succ = self.succ
+        pred = self.pred
+        self.remove_nodes_from([n for n in self.nodes_iter() if not succ[n] and not pred[n]])
 
     def get_node_ids(self, value, query_key='name'):
         """Returns a list of node ids of all nodes in which query_key has the specified value.
@@ -1251,7 +1550,14 @@ class NdexGraph (MultiDiGraph):
             :rtype: list
 
         """
+        index = self.node_index
+        if index is not None:
+            if query_key not in index:
+                index.build(query_key, self._node_attribute_items(query_key))
+            return index.find(query_key, value)
         nodes = [n[0] for n in self.nodes_iter(data=True) if query_key in n[1] and n[1][query_key] == value]
+        if self.node_attribute_store is not None and query_key in self.node_attribute_store:
+            nodes += self.node_attribute_store.find(query_key, value)
         return nodes
 
 
@@ -1266,7 +1572,29 @@ class NdexGraph (MultiDiGraph):
             :type attribute_value: any
 
         """
-        self.node[id][attribute_key] = attribute_value
+        index = self.node_index
+        if index is not None and attribute_key in index:
+            if self._has_node_attribute(id, attribute_key):
+                index.discard(id, attribute_key, self._get_node_attribute(id, attribute_key))
+            index.add(id, attribute_key, attribute_value)
+        if self.node_attribute_store is not None and attribute_key not in self._NODE_CORE_ATTRIBUTES:
+            self.node[id].pop(attribute_key, None)
+            self.node_attribute_store.set(id, attribute_key, attribute_value)
+        else:
+            self.node[id][attribute_key] = attribute_value
+
+    def _node_attribute_exists(self, query_key):
+        if self.node_attribute_store is not None and query_key in self.node_attribute_store:
+            return True
+        return len(nx.get_node_attributes(self, query_key)) > 0
+
+    def _get_node_attribute(self, node_id, query_key):
+        attributes = self.node[node_id]
+        if query_key in attributes:
+            return attributes[query_key]
+        if self.node_attribute_store is not None:
+            return self.node_attribute_store.get(node_id, query_key)
+        return None
 
     def get_node_attribute_value_by_id(self, node_id, query_key='name', error=False):
         """Get the value of a particular node attribute based on the id.
@@ -1281,10 +1609,9 @@ class NdexGraph (MultiDiGraph):
         """
         if node_id not in self.node:
             raise ValueError("Your ID is not in the network")
-        node_attributes = nx.get_node_attributes(self, query_key)
-        if error and len(node_attributes) == 0:
+        if error and not self._node_attribute_exists(query_key):
             raise ValueError("That node attribute name does not exist ANYWHERE in the network.")
-        return self.node[node_id][query_key] if query_key in self.node[node_id] else None
+        return self._get_node_attribute(node_id, query_key)
 
     def get_node_attribute_values_by_id_list(self, id_list, query_key='name'):
         """Returns a list of attribute values that correspond with the attribute key using the nodes in id_list.
@@ -1298,10 +1625,9 @@ class NdexGraph (MultiDiGraph):
         for id in id_list:
             if id not in self.node:
                 raise ValueError("Your ID list has IDs that are not in the network")
-        node_attributes = nx.get_node_attributes(self, query_key)
-        if len(node_attributes) == 0:
+        if not self._node_attribute_exists(query_key):
             raise ValueError("That node attribute name does not exist ANYWHERE in the network.")
-        return [self.node[id][query_key] if query_key in self.node[id] else None for id in id_list]
+        return [self._get_node_attribute(id, query_key) for id in id_list]
 
     def get_node_names_by_id_list(self, id_list):
         """Given a list of node ids, return a list of node names.
@@ -1336,6 +1662,8 @@ class NdexGraph (MultiDiGraph):
         for _, attributes in self.nodes_iter(data=True):
             for key, value in attributes.items():
                 keys.add(key)
+        if self.node_attribute_store is not None:
+            keys.update(self.node_attribute_store.names())
         return list(keys)
 
 
@@ -1343,6 +1671,85 @@ class NdexGraph (MultiDiGraph):
     #       Edges
     #------------------------------------------
 
+    def add_edge(self, u, v, key=None, attr_dict=None, **attr):
+        keydict = self.succ[u].get(v) if u in self.succ else None
+        if key is None:
+            # the key MultiDiGraph.add_edge would choose
+            key = 0
+            if keydict:
+                key = len(keydict)
+                while key in keydict:
+                    key += 1
+        if u not in self.node:
+            self._count_node_id(u)
+        if v not in self.node:
+            self._count_node_id(v)
+        if not keydict or key not in keydict:
+            max_id = self.max_edge_id
+            if max_id is None:
+                if self._edge_count == 0:
+                    self.max_edge_id = key
+            else:
+                try:
+                    if key > max_id:
+                        self.max_edge_id = key
+                except TypeError:
+                    self.max_edge_id = None
+            if self._edge_count is not None:
+                self._edge_count += 1
+        super(NdexGraph, self).add_edge(u, v, key, attr_dict, **attr)
+
+    def remove_edge(self, u, v, key=None):
+        if key is None and self.edge_attribute_store is not None:
+            # the key MultiDiGraph.remove_edge would remove: the last one added
+            keydict = self.succ.get(u, {}).get(v)
+            if keydict:
+                key = next(reversed(list(keydict)))
+        super(NdexGraph, self).remove_edge(u, v, key)
+        if self._edge_count is not None:
+            self._edge_count -= 1
+        if self.edge_attribute_store is not None:
+            self.edge_attribute_store.remove(key)
+
+    def number_of_edges(self, u=None, v=None):
+        if u is None and v is None:
+            if self._edge_count is None:
+                self._edge_count = super(NdexGraph, self).number_of_edges()
+            return self._edge_count
+        return super(NdexGraph, self).number_of_edges(u, v)
+
+    def subgraph(self, nbunch):
+        H = super(NdexGraph, self).subgraph(nbunch)
+        # MultiDiGraph.subgraph fills in H directly, so its counters have to be recomputed when needed.
+        H.max_node_id = None
+        H.max_edge_id = None
+        H._edge_count = None
+        self._copy_attribute_stores(H)
+        return H
+
+    def reverse(self, copy=True):
+        H = super(NdexGraph, self).reverse(copy)
+        if copy:
+            self._copy_attribute_stores(H)
+        return H
+
+    def _copy_attribute_stores(self, H):
+        # networkx builds subgraphs and reversed graphs from its own dicts; give H the attributes of its nodes and
+        # edges that are kept in the attribute stores.
+        if self.node_attribute_store is not None:
+            H.node_attribute_store = self.node_attribute_store.subset(H.nodes_iter())
+            H.edge_attribute_store = self.edge_attribute_store.subset(key for _, _, key in H.edges_iter(keys=True))
+
+    def _node_id_counter(self):
+        if self.max_node_id is None and self.node:
+            self.max_node_id = max(self.nodes_iter())
+        return self.max_node_id or 0
+
+    def _edge_id_counter(self):
+        if self.max_edge_id is None and self.number_of_edges() > 0:
+            self.max_edge_id = max(key for _, _, key in self.edges_iter(keys=True))
+        return self.max_edge_id or 0
+
     def get_edge_ids_by_node_attribute(self, source_node_value, target_node_value, attribute_key='name'):
         """Returns a list of edge ids of all edges where both the source node and target node have the specified values for attribute_key.
 
@@ -1354,11 +1761,21 @@ class NdexGraph (MultiDiGraph):
             """
         source_node_ids = self.get_node_ids(source_node_value, attribute_key)
         target_node_ids = self.get_node_ids(target_node_value, attribute_key)
+        # Position of each target, so that edges come out in source, then target order.
+        target_order = {}
+        for i, t in enumerate(target_node_ids):
+            target_order.setdefault(t, i)
         edge_keys = []
         for s in source_node_ids:
-            for t in target_node_ids:
-                if s in self and t in self[s]:
-                    edge_keys += list(self[s][t].keys())
+            if s not in self:
+                continue
+            successors = self[s]
+            if len(successors) < len(target_order):
+                found = sorted((target_order[t], t) for t in successors if t in target_order)
+            else:
+                found = [(i, t) for i, t in enumerate(target_node_ids) if t in successors]
+            for _, t in found:
+                edge_keys += list(successors[t].keys())
         return edge_keys
 
     def add_edge_between(self, source_node_id, target_node_id, interaction='interacts_with', attr_dict=None, **attr):
@@ -1379,15 +1796,10 @@ class NdexGraph (MultiDiGraph):
         if target_node_id not in self.node:
             raise ValueError('target_node_id = %d is not in the network' % target_node_id)
 
-        if self.max_edge_id == None:
-            if self.number_of_edges() > 0:
-                self.max_edge_id = max([x[2] for x in self.edges(keys=True)])
-            else:
-                self.max_edge_id = 0
-        self.max_edge_id += 1
-        self.add_edge(source_node_id, target_node_id, self.max_edge_id, interaction=interaction, attr_dict=attr_dict, **attr)
-        self.edgemap[self.max_edge_id] = (source_node_id, target_node_id)
-        return self.max_edge_id
+        edge_id = self._edge_id_counter() + 1
+        self.add_edge(source_node_id, target_node_id, edge_id, interaction=interaction, attr_dict=attr_dict, **attr)
+        self.edgemap[edge_id] = (source_node_id, target_node_id)
+        return edge_id
 
     def get_node_ids_by_edge_id(self, edge_id):
         if edge_id in self.edgemap:
@@ -1397,28 +1809,91 @@ class NdexGraph (MultiDiGraph):
             raise Exception("edge id " + str(edge_id) + " not found in network")
         
     def remove_edge_by_id(self, edge_id):
-        source_id, target_id = self.get_node_ids_by_edge_id(edge_id)
-
-        # remove edge from edge map
-        self.edgemap.pop(edge_id, None)
-        pop_these_reified_edges = []
+        self.remove_edges_by_ids([edge_id])
 
-        for n,re in self.reified_edges.items():
-            if(re["edge"] == edge_id):
-                pop_these_reified_edges.append(n)
-                # This causes problems when editing the dictionary while iterating over it --> self.reified_edges.pop(n,None)
+    def remove_edges_by_ids(self, edge_ids):
+        """Remove the edges with the given ids, together with their reified edge nodes entries and their
+        citation and support references.
 
-        for n in pop_these_reified_edges:
-            self.reified_edges.pop(n,None)
+        All ids are checked before anything is removed.
 
-        #self.edge_citation_map.pop(edge_id, None)
-        #self.edge_support_map.pop(edge_id, None)
+        :param edge_ids: The ids of the edges to remove.
+        :type edge_ids: iterable
+        """
+        edges = {}
+        for edge_id in edge_ids:
+            if edge_id not in edges:
+                edges[edge_id] = self.get_node_ids_by_edge_id(edge_id)
+        succ = self.succ
+        for edge_id, (source_id, target_id) in edges.items():
+            if edge_id not in succ.get(source_id, {}).get(target_id, ()):
+                raise nx.NetworkXError("The edge %s-%s with key %s is not in the graph." % (source_id, target_id, edge_id))
+
+        self._release_edges(edges)
+
+        # networkX remove edges; successor and predecessor share the key dict of a node pair
+        pred = self.pred
+        for edge_id, (source_id, target_id) in edges.items():
+            keydict = succ[source_id][target_id]
+            del keydict[edge_id]
+            if not keydict:
+                del succ[source_id][target_id]
+                del pred[target_id][source_id]
+        if self._edge_count is not None:
+            self._edge_count -= len(edges)
+
+    def _release_edges(self, edge_ids):
+        # Drop what the side maps hold for edges that are about to be removed from the graph.
+        # remove edges from edge map
+        for edge_id in edge_ids:
+            self.edgemap.pop(edge_id, None)
+        if self.edge_attribute_store is not None:
+            for edge_id in edge_ids:
+                self.edge_attribute_store.remove(edge_id)
+
+        index = self._reified_edge_index()
+        for edge_id in edge_ids:
+            for n in index.pop(edge_id, ()):
+                self.reified_edges.pop(n, None)
+        self._reified_edge_count = len(self.reified_edges)
 
         # remove citation and support references to edges
-        self.remove_citation_and_support_edge_references(edge_id)
-
-        # networkX remove edge
-        self.remove_edge(source_id, target_id, edge_id)
+        edge_support_map = self.edge_support_map
+        self._release_references([edge_support_map.pop(e) for e in edge_ids if e in edge_support_map],
+                                 self.support_reference_map, self.support_map)
+        edge_citation_map = self.edge_citation_map
+        self._release_references([edge_citation_map.pop(e) for e in edge_ids if e in edge_citation_map],
+                                 self.citation_reference_map, self.citation_map)
+
+    def _reified_edge_index(self):
+        # Edge id -> ids of the nodes that reify the edge.  Rebuilt when reified_edges has been changed
+        # other than through NdexGraph.
+        if self._reified_edge_nodes is None or self._reified_edge_count != len(self.reified_edges):
+            index = {}
+            for n, reified_edge in self.reified_edges.items():
+                nodes = index.get(reified_edge['edge'])
+                if nodes is None:
+                    nodes = index[reified_edge['edge']] = []
+                nodes.append(n)
+            self._reified_edge_nodes = index
+            self._reified_edge_count = len(self.reified_edges)
+        return self._reified_edge_nodes
+
+    def _release_references(self, reference_lists, reference_map, element_map):
+        # Decrement the reference counts of the citations or supports in reference_lists and drop those whose
+        # count reaches 0; the same as releasing the lists one after the other.
+        released = {}
+        for reference_ids in reference_lists:
+            for reference_id in reference_ids:
+                released[reference_id] = released.get(reference_id, 0) + 1
+        for reference_id, count in released.items():
+            references = reference_map.get(reference_id)
+            if references is not None:
+                if 0 < references <= count:
+                    element_map.pop(reference_id)
+                    reference_map.pop(reference_id)
+                else:
+                    reference_map[reference_id] = references - count
 
     def remove_citation_and_support_edge_references(self, edge_id):
         citation_ids = None
@@ -1545,7 +2020,15 @@ class NdexGraph (MultiDiGraph):
         # if len(edge_attributes) == 0:
         #     raise ValueError("That node edge name does not exist ANYWHERE in the network.")
         source_id, target_id = self.get_node_ids_by_edge_id(edge_id)
-        return self[source_id][target_id][edge_id][attribute_key] if attribute_key in self[source_id][target_id][edge_id] else None
+        return self._get_edge_attribute(source_id, target_id, edge_id, attribute_key)
+
+    def _get_edge_attribute(self, source_id, target_id, edge_id, attribute_key):
+        attributes = self[source_id][target_id][edge_id]
+        if attribute_key in attributes:
+            return attributes[attribute_key]
+        if self.edge_attribute_store is not None:
+            return self.edge_attribute_store.get(edge_id, attribute_key)
+        return None
 
     #TODO Check args
     def set_edge_attribute(self, edge_id, attribute_key, attribute_value):
@@ -1560,7 +2043,11 @@ class NdexGraph (MultiDiGraph):
 
         """
         source_id, target_id = self.get_node_ids_by_edge_id(edge_id)
-        self.edge[source_id][target_id][edge_id][attribute_key] = attribute_value
+        if self.edge_attribute_store is not None and attribute_key not in self._EDGE_CORE_ATTRIBUTES:
+            self.edge[source_id][target_id][edge_id].pop(attribute_key, None)
+            self.edge_attribute_store.set(edge_id, attribute_key, attribute_value)
+        else:
+            self.edge[source_id][target_id][edge_id][attribute_key] = attribute_value
 
     def get_edge_ids_by_source_target(self, source_id, target_id):
         edge_ids =[]
@@ -1584,12 +2071,11 @@ class NdexGraph (MultiDiGraph):
                 raise ValueError("edge id list error: edge id " + str(edge_id) + " not found in network")
             
         edge_keys = {id: self.edgemap[id] for id in edge_id_list}
-        edge_attributes = nx.get_edge_attributes(self, attribute_key)
-        if len(edge_attributes) == 0:
+        in_store = self.edge_attribute_store is not None and attribute_key in self.edge_attribute_store
+        if not in_store and len(nx.get_edge_attributes(self, attribute_key)) == 0:
             raise ValueError("the attribute name " + str(attribute_key) + " is not used ANYWHERE in the network.")
         
-        return [self[v[0]][v[1]][k][attribute_key] if attribute_key in self[v[0]][v[1]][k] else None for k, v in
-                edge_keys.items()]
+        return [self._get_edge_attribute(v[0], v[1], k, attribute_key) for k, v in edge_keys.items()]
 
     def get_all_edge_attribute_keys(self):
         """Get the unique list of all attribute keys used in at least one edge in the network.
@@ -1602,6 +2088,8 @@ class NdexGraph (MultiDiGraph):
         for _, _, attributes in self.edges_iter(data=True):
             for key, value in attributes.items():
                 keys.add(key)
+        if self.edge_attribute_store is not None:
+            keys.update(self.edge_attribute_store.names())
         return list(keys)
 
 
@@ -1643,11 +2131,11 @@ class NdexGraph (MultiDiGraph):
         #TODO check edge attriutes for ndex:citation.  Add list if not exist otherwise append.  No duplicates
         #self.set_edge_attribute(edge_id, 'ndex:citation', citation_string)
 
-        source_id, target_id = self.get_node_ids_by_edge_id(edge_id)
-        if self.edge[source_id][target_id][edge_id].get('ndex:citation') is None:
-            self.edge[source_id][target_id][edge_id]['ndex:citation'] = [citation_string]
+        citations = self.get_edge_attribute_value_by_id(edge_id, 'ndex:citation')
+        if citations is None:
+            self.set_edge_attribute(edge_id, 'ndex:citation', [citation_string])
         else:
-            self.edge[source_id][target_id][edge_id]['ndex:citation'].append(citation_string)
+            citations.append(citation_string)
 
 
     def add_edge_citation_ref(self, edge_id, citation_id, override=None):
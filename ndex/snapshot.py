@@ -0,0 +1,221 @@
+"""Binary snapshots of NdexGraphs.
+
+A snapshot holds everything an NdexGraph holds: the nodes, the edges with
+their keys, the node, edge and network attributes with their Python types
+(and, in attribute stores, their CX data types), the layout, the citation
+and support maps, the unclassified CX, the provenance and the namespaces.
+It is written with msgpack, the typed attribute columns as raw arrays, and
+is read back much faster than the CX of the same network::
+
+    G.write_snapshot('checkpoint.ndexsnap')
+    G = NdexGraph.read_snapshot('checkpoint.ndexsnap')
+
+Values must be of the types NdexGraph attributes have: None, booleans,
+numbers, strings, lists, tuples and dicts of these.
+
+Requires msgpack (pip install msgpack).
+"""
+
+import gc
+import sys
+from array import array
+from six import integer_types, string_types, text_type
+
+from ndex.attribute_store import AttributeColumn, AttributeStore
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+#: The first bytes of a snapshot
+MAGIC = b'NDEXSNAP'
+
+#: The version of the snapshot format written
+FORMAT_VERSION = 1
+
+# msgpack extension type of tuples, which msgpack would otherwise read back as lists
+_TUPLE = 1
+
+# The NdexGraph attributes stored as they are, besides the nodes, edges, edgemap and attribute stores.
+_FIELDS = ('max_node_id', 'max_edge_id', '_edge_count', 'subnetwork_id', 'view_id', 'max_citation_id',
+           'max_support_id', 'pos', 'unclassified_cx', 'metadata_original', 'status', 'citation_map',
+           'node_citation_map', 'citation_reference_map', 'edge_citation_map', 'support_map',
+           'support_reference_map', 'node_support_map', 'edge_support_map', 'function_term_map', 'reified_edges',
+           '_reified_edge_count', 'provenance', 'namespaces')
+
+
+def _require_msgpack():
+    if msgpack is None:
+        raise ImportError("msgpack is required for snapshots (pip install msgpack)")
+
+
+def _default(value):
+    # Called by msgpack for the values it does not pack itself, types are checked strictly so that tuples get here.
+    if isinstance(value, tuple):
+        return msgpack.ExtType(_TUPLE, _pack(list(value)))
+    if isinstance(value, integer_types):
+        return int(value)
+    if isinstance(value, float):
+        return float(value)
+    if isinstance(value, string_types):
+        return text_type(value)
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return list(value)
+    raise TypeError("a snapshot cannot hold a %s" % type(value).__name__)
+
+
+def _ext_hook(code, data):
+    if code == _TUPLE:
+        return tuple(_unpack(data))
+    raise ValueError("unknown msgpack extension type %d" % code)
+
+
+def _pack(value):
+    return msgpack.packb(value, use_bin_type=True, strict_types=True, default=_default)
+
+
+def _unpack(data):
+    return msgpack.unpackb(data, raw=False, strict_map_key=False, ext_hook=_ext_hook)
+
+
+def _store_state(store):
+    if store is None:
+        return None
+    columns = {}
+    for name, column in store.columns.items():
+        if column.value_type is None:
+            columns[name] = [column.data_type, None, column.values, bytes(column.present), column.count]
+        else:
+            values = column.values.tobytes() if hasattr(column.values, 'tobytes') else column.values.tostring()
+            columns[name] = [column.data_type, column.values.typecode, values, bytes(column.present), column.count]
+    return {'ids': store._ids, 'free': store._free, 'columns': columns}
+
+
+def _restore_store(state, byteorder):
+    if state is None:
+        return None
+    store = AttributeStore()
+    store._ids = state['ids']
+    store._free = state['free']
+    store._rows = dict((element_id, row) for row, element_id in enumerate(store._ids) if element_id is not None)
+    for name, (data_type, typecode, values, present, count) in state['columns'].items():
+        column = AttributeColumn(data_type)
+        if typecode is None:
+            column.values = values
+            column.value_type = None
+        else:
+            column.values = array(typecode)
+            if hasattr(column.values, 'frombytes'):
+                column.values.frombytes(values)
+            else:
+                column.values.fromstring(values)
+            if byteorder != sys.byteorder:
+                column.values.byteswap()
+        column.present = bytearray(present)
+        column.count = count
+        store.columns[name] = column
+    return store
+
+
+def dumps(G):
+    """The snapshot of NdexGraph G, as bytes."""
+    _require_msgpack()
+    sources, targets, keys, data = [], [], [], []
+    for u, neighbors in G.succ.items():
+        for v, keydict in neighbors.items():
+            for key, attributes in keydict.items():
+                sources.append(u)
+                targets.append(v)
+                keys.append(key)
+                data.append(attributes)
+    edgemap = G.edgemap or {}
+    state = {
+        'version': FORMAT_VERSION,
+        'byteorder': sys.byteorder,
+        'graph': G.graph,
+        'nodes': list(G.node.keys()),
+        'node_data': list(G.node.values()),
+        'edges': [sources, targets, keys, data],
+        'edgemap': [list(edgemap.keys()), [st[0] for st in edgemap.values()], [st[1] for st in edgemap.values()]],
+        'fields': dict((name, getattr(G, name)) for name in _FIELDS),
+        'node_attribute_store': _store_state(G.node_attribute_store),
+        'edge_attribute_store': _store_state(G.edge_attribute_store),
+        'node_index': G.node_index is not None,
+    }
+    return MAGIC + _pack(state)
+
+
+def loads(data):
+    """The NdexGraph in a snapshot.
+
+    :param data: The snapshot, as written by dumps.
+    :type data: bytes
+    :raises: ValueError if data is not a snapshot or is of a later format.
+    :rtype: ndex.networkn.NdexGraph
+    """
+    _require_msgpack()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not an NdexGraph snapshot")
+    # Reading creates millions of dicts and lists, none of them garbage; collecting while it goes on takes longer
+    # than the reading itself.
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return _load_state(data)
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def _load_state(data):
+    from ndex.networkn import NdexGraph
+    try:
+        state = _unpack(data[len(MAGIC):])
+    except Exception as e:
+        raise ValueError("corrupt NdexGraph snapshot: %s" % e)
+    version = state.get('version') if isinstance(state, dict) else None
+    if version != FORMAT_VERSION:
+        raise ValueError("unsupported NdexGraph snapshot version %r" % (version,))
+
+    try:
+        return _build(NdexGraph(), state)
+    except (KeyError, IndexError, TypeError, AttributeError) as e:
+        raise ValueError("corrupt NdexGraph snapshot: %r" % e)
+
+
+def _build(G, state):
+    G.graph.update(state['graph'])
+    # Fill the networkx dicts directly: add_node and add_edge would update the counters, which are restored below.
+    nodes = state['nodes']
+    G.node.update(zip(nodes, state['node_data']))
+    succ, pred = G.succ, G.pred
+    for n in nodes:
+        succ[n] = {}
+        pred[n] = {}
+    for u, v, key, attributes in zip(*state['edges']):
+        keydict = succ[u].get(v)
+        if keydict is None:
+            keydict = succ[u][v] = pred[v][u] = {}
+        keydict[key] = attributes
+    edge_ids, sources, targets = state['edgemap']
+    G.edgemap = dict(zip(edge_ids, zip(sources, targets)))
+    for name in _FIELDS:
+        setattr(G, name, state['fields'][name])
+    G.node_attribute_store = _restore_store(state['node_attribute_store'], state['byteorder'])
+    G.edge_attribute_store = _restore_store(state['edge_attribute_store'], state['byteorder'])
+    if state['node_index']:
+        G.use_node_index()
+    return G
+
+
+def dump(G, f):
+    """Write the snapshot of NdexGraph G to the binary file f."""
+    f.write(dumps(G))
+
+
+def load(f):
+    """Read the NdexGraph in the snapshot in the binary file f."""
+    return loads(f.read())
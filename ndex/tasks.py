@@ -0,0 +1,201 @@
+"""Waiting for server-side tasks.
+
+A TaskWaiter polls any number of NDEx tasks (exports, bulk operations ...)
+from one background thread and hands out a future for each, resolved with
+the task once it reaches a terminal state::
+
+    waiter = TaskWaiter(my_ndex)
+    futures = [waiter.wait(task_id) for task_id in task_ids]
+    for task in waiter.wait_all(task_ids, timeout=600):
+        print("%s %s" % (task['externalId'], task['status']))
+    waiter.close()
+
+Each task is polled quickly at first, then at exponentially growing
+intervals.  Tasks that fall due at about the same time are polled in one
+round, and a task waited for more than once is polled only once.  In
+asyncio code, ``await waiter.wait_async(task_id)``.
+
+Requires concurrent.futures (the ``futures`` package on Python 2).
+"""
+
+import heapq
+import threading
+import time
+
+try:
+    from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
+except ImportError:
+    Future = ThreadPoolExecutor = wait_futures = None
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+#: The task states after which a task does not change any more
+TERMINAL_STATES = frozenset(['COMPLETED', 'FAILED'])
+
+
+class _WaitedTask(object):
+    # A task being waited for: the future of its waiters and the number of times it has been polled.
+
+    def __init__(self, task_id):
+        self.task_id = task_id
+        self.future = Future()
+        self.polls = 0
+
+
+class TaskWaiter(object):
+    """Polls NDEx tasks until they reach a terminal state.
+
+    A task is polled first_interval seconds after it is first waited for, fast_polls times at that interval,
+    then at intervals multiplied by backoff each time, up to max_interval.  Polls that fall due within coalesce
+    seconds of each other are sent in the same round, by up to workers threads.
+    """
+
+    def __init__(self, ndex, first_interval=0.25, fast_polls=4, backoff=1.5, max_interval=5.0, coalesce=0.25,
+                 workers=4, terminal_states=TERMINAL_STATES):
+        """
+        :param ndex: The client to poll with.  The tasks belong to its account.
+        :type ndex: ndex.client.Ndex
+        :param first_interval: The interval between the first polls, in seconds.
+        :type first_interval: float
+        :param fast_polls: The number of polls at first_interval.
+        :type fast_polls: int
+        :param backoff: The factor the interval grows by after that.
+        :type backoff: float
+        :param max_interval: The longest interval between two polls of a task, in seconds.
+        :type max_interval: float
+        :param coalesce: How early a task may be polled to join a round of polls, in seconds.
+        :type coalesce: float
+        :param workers: The maximum number of polls sent at the same time.
+        :type workers: int
+        :param terminal_states: The task states to wait for.
+        :type terminal_states: set of str
+        """
+        if Future is None:
+            raise ImportError("concurrent.futures is required (pip install futures)")
+        self.ndex = ndex
+        self.first_interval = first_interval
+        self.fast_polls = fast_polls
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.coalesce = coalesce
+        self.terminal_states = frozenset(terminal_states)
+        self._condition = threading.Condition()
+        self._tasks = {}
+        self._schedule = []
+        self._closed = False
+        self._executor = ThreadPoolExecutor(workers)
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def interval(self, polls):
+        """The number of seconds to wait before polling a task that has been polled polls times."""
+        if polls < self.fast_polls:
+            return self.first_interval
+        return min(self.first_interval * self.backoff ** (polls - self.fast_polls + 1), self.max_interval)
+
+    def wait(self, task_id):
+        """A future resolved with the task (a dict) when it reaches a terminal state.
+
+        The future fails with the exception of the poll request if the task can't be read, and is cancelled if
+        the waiter is closed first.
+
+        :param task_id: The UUID of the task.
+        :type task_id: str
+        :rtype: concurrent.futures.Future
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("the task waiter is closed")
+            task = self._tasks.get(task_id)
+            if task is None:
+                task = self._tasks[task_id] = _WaitedTask(task_id)
+                heapq.heappush(self._schedule, (time.time() + self.interval(0), task_id))
+                self._condition.notify()
+            return task.future
+
+    def wait_async(self, task_id, loop=None):
+        """An asyncio future for wait(task_id)."""
+        return asyncio.wrap_future(self.wait(task_id), loop=loop)
+
+    def wait_all(self, task_ids, timeout=None):
+        """Wait for all tasks and return them in the order of task_ids.
+
+        :param task_ids: The UUIDs of the tasks.
+        :type task_ids: iterable of str
+        :param timeout: The longest time to wait, in seconds.  (Optional)
+        :type timeout: float
+        :raises: concurrent.futures.TimeoutError if a task is not done in time, or the exception a poll failed with.
+        :rtype: list of dict
+        """
+        futures = [self.wait(task_id) for task_id in task_ids]
+        deadline = None if timeout is None else time.time() + timeout
+        return [future.result(None if deadline is None else max(0, deadline - time.time())) for future in futures]
+
+    def close(self):
+        """Stop polling and cancel the futures of the tasks that are not done."""
+        with self._condition:
+            self._closed = True
+            tasks = list(self._tasks.values())
+            self._tasks.clear()
+            del self._schedule[:]
+            self._condition.notify()
+        for task in tasks:
+            task.future.cancel()
+        self._thread.join()
+        self._executor.shutdown()
+
+    def _due(self):
+        # Wait for the next round and take the tasks due in it off the schedule; None once closed.
+        with self._condition:
+            while not self._closed:
+                now = time.time()
+                if self._schedule and self._schedule[0][0] <= now:
+                    batch = []
+                    while self._schedule and self._schedule[0][0] <= now + self.coalesce:
+                        task = self._tasks.get(heapq.heappop(self._schedule)[1])
+                        if task is not None:
+                            batch.append(task)
+                    return batch
+                self._condition.wait(self._schedule[0][0] - now if self._schedule else None)
+            return None
+
+    def _poll(self, task):
+        task.polls += 1
+        try:
+            state = self.ndex.get_task_by_id(task.task_id)
+        except Exception as e:
+            self._finish(task, error=e)
+            return
+        if (state or {}).get('status') in self.terminal_states:
+            self._finish(task, state)
+        else:
+            with self._condition:
+                if task.task_id in self._tasks:
+                    heapq.heappush(self._schedule, (time.time() + self.interval(task.polls), task.task_id))
+
+    def _finish(self, task, state=None, error=None):
+        with self._condition:
+            if self._tasks.get(task.task_id) is not task:
+                return
+            del self._tasks[task.task_id]
+        if error is not None:
+            task.future.set_exception(error)
+        else:
+            task.future.set_result(state)
+
+    def _run(self):
+        while True:
+            batch = self._due()
+            if batch is None:
+                return
+            wait_futures([self._executor.submit(self._poll, task) for task in batch])
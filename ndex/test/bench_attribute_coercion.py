@@ -0,0 +1,114 @@
+"""Benchmark: attribute value parsing, per element with the previous elif chain
+versus parse_attributes with its table of converters.
+
+    python -m ndex.test.bench_attribute_coercion [attributes]
+
+The values are checked to be the same before the timings are reported.
+"""
+
+import random
+import sys
+
+from ndex.networkn import parse_attributes
+from ndex.test.bench_util import best_of
+
+
+def legacy_data_to_type(data, data_type):
+    return_data = None
+
+    if(type(data) is str):
+        data = data.replace('[', '').replace(']','')
+        if('list_of' in data_type):
+            data = data.split(',')
+
+    if data_type == "boolean":
+        if(type(data) is str):
+            return_data = data.lower() == 'true'
+        else:
+            return_data = bool(data)
+    elif data_type == "byte":
+        return_data = str(data).encode()
+    elif data_type == "char":
+        return_data = str(data)
+    elif data_type == "double":
+        return_data = float(data)
+    elif data_type == "float":
+        return_data = float(data)
+    elif data_type == "integer":
+        return_data = int(data)
+    elif data_type == "long":
+        return_data = int(data)
+    elif data_type == "short":
+        return_data = int(data)
+    elif data_type == "string":
+        return_data = str(data)
+    elif data_type == "list_of_boolean":
+        if(type(data[0]) is str):
+            return_data = [s.lower() == 'true' for s in data]
+        else:
+            return_data = [bool(s) for s in data]
+    elif data_type == "list_of_byte":
+        return_data = [bytes(s) for s in data]
+    elif data_type == "list_of_char":
+        return_data = [str(s) for s in data]
+    elif data_type == "list_of_double":
+        return_data = [float(s) for s in data]
+    elif data_type == "list_of_float":
+        return_data = [float(s) for s in data]
+    elif data_type == "list_of_integer":
+        return_data = [int(s) for s in data]
+    elif data_type == "list_of_long":
+        return_data = [int(s) for s in data]
+    elif data_type == "list_of_short":
+        return_data = [int(s) for s in data]
+    elif data_type == "list_of_string":
+        return_data = [str(s) for s in data]
+    else:
+        return None
+
+    return return_data
+
+
+def legacy_parse(attributes):
+    values = []
+    for attribute in attributes:
+        value = attribute['v']
+        if 'd' in attribute:
+            value = legacy_data_to_type(value, attribute['d'])
+        values.append(value)
+    return values
+
+
+def make_attributes(count, seed=1):
+    rnd = random.Random(seed)
+    makers = [
+        lambda: {'v': 'protein'},
+        lambda: {'v': rnd.random(), 'd': 'double'},
+        lambda: {'v': rnd.randrange(1000), 'd': 'integer'},
+        lambda: {'v': rnd.random() > 0.5, 'd': 'boolean'},
+        lambda: {'v': ['db%d' % rnd.randrange(5)], 'd': 'list_of_string'},
+        lambda: {'v': [rnd.random() for _ in range(rnd.randrange(1, 6))], 'd': 'list_of_double'},
+        lambda: {'v': 'HGNC:%d' % rnd.randrange(1000), 'd': 'string'},
+    ]
+    attributes = []
+    for i in range(count):
+        attribute = makers[i % len(makers)]()
+        attribute.update({'po': i, 'n': 'a%d' % (i % len(makers))})
+        attributes.append(attribute)
+    return attributes
+
+
+def main(count=200000):
+    attributes = make_attributes(count)
+    legacy_time, legacy = best_of(9, legacy_parse, attributes)
+    table_time, values = best_of(9, parse_attributes, attributes)
+    if legacy != values:
+        raise AssertionError("parse_attributes disagrees with the elif chain")
+    print("%d attribute elements" % count)
+    print("elif chain:       %8.3f s" % legacy_time)
+    print("parse_attributes: %8.3f s" % table_time)
+    print("speedup: %.2fx" % (legacy_time / table_time))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
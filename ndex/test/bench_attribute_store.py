@@ -0,0 +1,70 @@
+"""Benchmark: memory used by node and edge attributes, dicts versus AttributeStore.
+
+    python -m ndex.test.bench_attribute_store [edges] [attributes]
+
+A synthetic network is loaded from encoded CX three times: without
+attributes, with attributes in the networkx dicts and with columnar
+attributes.  Memory is measured with tracemalloc (Python 3) and reported for
+the attributes alone, i.e. above the graph without attributes.  The time to
+select the nodes with a score above 0.5 is reported for both layouts.
+"""
+
+import gc
+import json
+import sys
+import tracemalloc
+
+from ndex.attribute_store import numpy
+from ndex.cx_stream import read_cx_fragments
+from ndex.networkn import NdexGraph
+from ndex.test.bench_util import make_cx, best_of
+
+
+def _load(data, **kwargs):
+    gc.collect()
+    tracemalloc.start()
+    G = NdexGraph(read_cx_fragments([data]), **kwargs)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return used, G
+
+
+def _select(G):
+    # The nodes with a score above 0.5, from the networkx dicts.
+    return [n for n, a in G.nodes_iter(data=True) if a.get('score 1', 0) > 0.5]
+
+
+def _encode(cx):
+    return json.dumps(cx).encode('utf-8')
+
+
+def main(edges=500000, attributes=10):
+    nodes = edges // 2
+    cx = make_cx(nodes, edges, node_attribute_count=attributes, edge_attribute_count=attributes,
+                 citation_count=0, fragment_size=10000)
+    bare = _encode([f for f in cx if 'nodeAttributes' not in f and 'edgeAttributes' not in f])
+    data = _encode(cx)
+    del cx
+
+    base, _ = _load(bare)
+    dict_used, G = _load(data)
+    dict_filter, selected = best_of(3, _select, G)
+    del G
+    store_used, G = _load(data, columnar_attributes=True)
+    store = G.node_attribute_store
+    ids_where = store.ids_where_array if numpy is not None else store.ids_where
+    store_filter, columnar_selected = best_of(3, ids_where, 'score 1', lambda v: v > 0.5)
+    assert sorted(selected) == sorted(columnar_selected)
+
+    mb = 1024.0 * 1024.0
+    print("%d nodes, %d edges, %d attributes per node and per edge" % (nodes, edges, attributes))
+    print("%-10s %14s %16s %12s" % ("layout", "total (MB)", "attributes (MB)", "filter (s)"))
+    print("%-10s %14.1f %16s %12s" % ("none", base / mb, "-", "-"))
+    print("%-10s %14.1f %16.1f %12.4f" % ("dicts", dict_used / mb, (dict_used - base) / mb, dict_filter))
+    print("%-10s %14.1f %16.1f %12.4f" % ("columnar", store_used / mb, (store_used - base) / mb, store_filter))
+    print("attribute memory ratio: %.1fx" % (float(dict_used - base) / (store_used - base)))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
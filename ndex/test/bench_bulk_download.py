@@ -0,0 +1,80 @@
+"""Benchmark: downloading many networks with download_networks.
+
+    python -m ndex.test.bench_bulk_download [networks] [nodes] [latency ms]
+
+A local stand-in server serves synthetic networks, waiting latency ms before
+each response to stand in for the round trip to a remote server.  The
+networks are fetched one at a time with get_network_as_cx_stream().json(),
+as a mirroring script does today, then with download_networks: saved to a
+directory by a growing number of threads, and parsed into NdexGraphs by
+threads and by processes.
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import time
+
+import ndex.client as nc
+from ndex.bulk import download_networks
+from ndex.test.bench_util import make_cx
+from ndex.test.stub_server import StubNdexServer, StubResponse
+
+
+def serve(server, network_ids, data, latency):
+    def respond(request):
+        time.sleep(latency)
+        return StubResponse(data[i:i + 64 * 1024] for i in range(0, len(data), 64 * 1024))
+    for network_id in network_ids:
+        server.add_route('GET', '/v2/network/' + network_id, respond)
+
+
+def sequential(client, network_ids):
+    for network_id in network_ids:
+        client.get_network_as_cx_stream(network_id).json()
+
+
+def bulk(client, network_ids, **kwargs):
+    for result in download_networks(client, network_ids, **kwargs):
+        if result.error is not None:
+            raise result.error
+
+
+def timed(function, *args, **kwargs):
+    start = time.time()
+    function(*args, **kwargs)
+    return time.time() - start
+
+
+def main(networks=64, nodes=300, latency_ms=50):
+    network_ids = ['network-%d' % n for n in range(networks)]
+    data = json.dumps(make_cx(nodes, nodes * 2)).encode('utf-8')
+    directory = tempfile.mkdtemp()
+    try:
+        with StubNdexServer() as server:
+            serve(server, network_ids, data, latency_ms / 1000.0)
+            registry = nc.NdexRegistry()
+            client = nc.Ndex(server.url, registry=registry, pool_maxsize=16)
+            client.version  # detect the server version before timing
+
+            print("%d networks of %d nodes (%.0f KB), %d ms latency" % (networks, nodes, len(data) / 1024.0,
+                                                                        latency_ms))
+            print("%-36s %10s %12s" % ("", "time (s)", "networks/s"))
+            rows = [("sequential .json()", timed(sequential, client, network_ids))]
+            for workers in (1, 2, 4, 8, 16):
+                rows.append(("to disk, %d threads" % workers,
+                             timed(bulk, client, network_ids, directory=directory, workers=workers)))
+            for workers in (1, 4):
+                rows.append(("NdexGraph, %d threads" % workers, timed(bulk, client, network_ids, workers=workers)))
+                rows.append(("NdexGraph, %d processes" % workers,
+                             timed(bulk, client, network_ids, workers=workers, processes=True)))
+            for label, elapsed in rows:
+                print("%-36s %10.2f %12.1f" % (label, elapsed, networks / elapsed))
+            registry.clear()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
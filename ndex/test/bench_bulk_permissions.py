@@ -0,0 +1,51 @@
+"""Benchmark: granting a group permission on many networks.
+
+    python -m ndex.test.bench_bulk_permissions [networks] [latency ms]
+
+A local stand-in server answers PUT /network/{id}/permission, waiting
+latency ms before each response to stand in for the round trip to a remote
+server.  Ndex.grant_networks_to_group, which sends one request after the
+other, is compared with ndex.bulk.grant_networks_to_group with a growing
+number of worker threads, and with a rate limit.
+"""
+
+import sys
+import time
+
+import ndex.bulk as bulk
+import ndex.client as nc
+from ndex.test.stub_server import StubNdexServer, StubResponse
+
+
+def main(networks=600, latency_ms=30):
+    network_ids = ['network-%d' % n for n in range(networks)]
+
+    def grant(request):
+        time.sleep(latency_ms / 1000.0)
+        return StubResponse(b'', status=204)
+
+    with StubNdexServer() as server:
+        for network_id in network_ids:
+            server.add_route('PUT', '/v2/network/%s/permission' % network_id, grant)
+        registry = nc.NdexRegistry()
+        client = nc.Ndex(server.url, 'user', 'password', registry=registry, pool_maxsize=32)
+        client.version  # detect the server version before timing
+
+        print("%d networks, %d ms latency" % (networks, latency_ms))
+        print("%-36s %10s %12s" % ("", "time (s)", "requests/s"))
+        start = time.time()
+        client.grant_networks_to_group('group', network_ids)
+        rows = [("Ndex.grant_networks_to_group", time.time() - start)]
+        for workers, rate in ((4, None), (16, None), (32, None), (32, 200)):
+            outcome = bulk.grant_networks_to_group(client, 'group', network_ids, workers=workers, rate=rate)
+            if not outcome.ok:
+                raise AssertionError(outcome.errors)
+            label = "bulk, %d threads" % workers + (", %d/s limit" % rate if rate else "")
+            rows.append((label, outcome.seconds))
+        for label, elapsed in rows:
+            print("%-36s %10.2f %12.1f" % (label, elapsed, networks / elapsed))
+        registry.clear()
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
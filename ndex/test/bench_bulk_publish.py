@@ -0,0 +1,89 @@
+"""Benchmark: publishing many networks with publish_networks.
+
+    python -m ndex.test.bench_bulk_publish [networks] [nodes] [latency ms]
+
+A local stand-in server accepts uploads and the visibility, property and
+permission requests that follow, waiting latency ms before each response to
+stand in for the round trip to (and the work of) a remote server.  The
+networks are published one at a time, as a nightly publish script does
+today, then with publish_networks and a growing number of worker threads,
+with and without a worker process for the CX encoding.
+"""
+
+import sys
+import time
+
+import ndex.client as nc
+from ndex.bulk import publish_networks
+from ndex.networkn import NdexGraph
+from ndex.test.bench_util import make_cx
+from ndex.test.stub_server import StubNdexServer, StubResponse
+
+PROPERTIES = [{'predicateString': 'version', 'value': '1.0'}]
+
+
+def serve(server, latency):
+    created = []
+
+    def respond(response):
+        def handler(request):
+            time.sleep(latency)
+            return response(request) if callable(response) else response
+        return handler
+
+    def create(request):
+        created.append(None)
+        return StubResponse(('http://127.0.0.1/v2/network/net%d' % len(created)).encode('ascii'),
+                            content_type='text/plain')
+
+    server.add_route('POST', '/v2/network', respond(create))
+    for network in range(1, 10000):
+        for route in ('systemproperty', 'properties', 'permission'):
+            server.add_route('PUT', '/v2/network/net%d/%s' % (network, route),
+                             respond(StubResponse(b'', status=204)))
+
+
+def sequential(client, graphs):
+    for graph in graphs:
+        url = client.save_new_network(graph.to_cx_stream())
+        network_id = url.rsplit('/', 1)[-1]
+        client.make_network_public(network_id)
+        client.set_network_properties(network_id, PROPERTIES)
+        client.update_network_group_permission('group', network_id, 'READ')
+
+
+def bulk(client, graphs, **kwargs):
+    for result in publish_networks(client, graphs, visibility='PUBLIC', properties=PROPERTIES,
+                                   group_permissions={'group': 'READ'}, **kwargs):
+        if result.error is not None:
+            raise result.error
+
+
+def timed(function, *args, **kwargs):
+    start = time.time()
+    function(*args, **kwargs)
+    return time.time() - start
+
+
+def main(networks=48, nodes=300, latency_ms=50):
+    graph = NdexGraph(make_cx(nodes, nodes * 2))
+    graphs = [graph] * networks
+    with StubNdexServer() as server:
+        serve(server, latency_ms / 1000.0)
+        registry = nc.NdexRegistry()
+        client = nc.Ndex(server.url, 'user', 'password', registry=registry, pool_maxsize=16)
+        client.version  # detect the server version before timing
+
+        print("%d networks of %d nodes, 4 requests each, %d ms latency" % (networks, nodes, latency_ms))
+        print("%-36s %10s %12s" % ("", "time (s)", "networks/s"))
+        rows = [("sequential", timed(sequential, client, graphs))]
+        for workers in (1, 4, 8, 16):
+            rows.append(("%d threads" % workers, timed(bulk, client, graphs, workers=workers)))
+        rows.append(("16 threads, 1 encoding process", timed(bulk, client, graphs, workers=16, processes=1)))
+        for label, elapsed in rows:
+            print("%-36s %10.2f %12.1f" % (label, elapsed, networks / elapsed))
+        registry.clear()
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
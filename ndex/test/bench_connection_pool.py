@@ -0,0 +1,72 @@
+"""Benchmark: connection reuse for sequential and concurrent requests.
+
+    python -m ndex.test.bench_connection_pool [calls] [threads]
+
+A local stand-in server answers GET /v2/admin/status and multipart POSTs to
+/v2/network.  The calls are made sequentially and from a number of threads,
+with a new connection per call (keep_alive=False, as with the module-level
+requests functions the upload methods used to call) and through the pooled
+session, with a pool smaller than and as large as the number of threads.  The
+number of TCP connections the server saw is reported with the wall time.
+"""
+
+import sys
+import threading
+import time
+
+import ndex.client as nc
+from ndex.test.stub_server import StubNdexServer
+
+CX = [{'nodes': [{'@id': n, 'n': 'node %d' % n} for n in range(20)]}]
+
+
+def call(client, i):
+    if i % 2:
+        client.update_status()
+    else:
+        client.save_new_network(list(CX))
+
+
+def run(server, calls, threads, **pool):
+    registry = nc.NdexRegistry()
+    client = nc.Ndex(server.url, 'user', 'password', registry=registry, **pool)
+    client.update_status()
+    del server.requests[:]
+    server.connections.clear()
+
+    def worker(offset):
+        for i in range(offset, calls, threads):
+            call(client, i)
+
+    start = time.time()
+    workers = [threading.Thread(target=worker, args=(offset,)) for offset in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.time() - start
+    registry.clear()
+    if len(server.requests) != calls:
+        raise AssertionError("%d of %d calls reached the server" % (len(server.requests), calls))
+    return elapsed, len(server.connections)
+
+
+def main(calls=400, threads=8):
+    with StubNdexServer() as server:
+        server.add_route('GET', '/v2/admin/status', {'networkCount': 1})
+        server.add_route('POST', '/v2/network', b'http://127.0.0.1/v2/network/abc')
+
+        print("%d calls (status and multipart uploads)" % calls)
+        print("%-36s %10s %12s" % ("", "time (s)", "connections"))
+        for label, thread_count, pool in (
+                ("sequential, connection per call", 1, {'keep_alive': False}),
+                ("sequential, pooled", 1, {}),
+                ("%d threads, connection per call" % threads, threads, {'keep_alive': False}),
+                ("%d threads, pool of 2" % threads, threads, {'pool_maxsize': 2}),
+                ("%d threads, pool of %d" % (threads, threads), threads, {'pool_maxsize': threads})):
+            elapsed, connections = run(server, calls, thread_count, **pool)
+            print("%-36s %10.2f %12d" % (label, elapsed, connections))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
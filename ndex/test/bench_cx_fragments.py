@@ -0,0 +1,62 @@
+"""Benchmark: size and encode time of the nodes and edges aspects.
+
+    python -m ndex.test.bench_cx_fragments [nodes] [edges]
+
+The nodes and edges aspects of a synthetic network are built as
+create_aspect.nodes/edges did before (one fragment per element, from a
+four-way conditional comprehension) and as they are now (one fragment per
+aspect, or fragments of 10000 elements), then encoded with json.dumps.
+"""
+
+import json
+import sys
+
+from ndex import create_aspect as ca
+from ndex.networkn import NdexGraph
+from ndex.test.bench_util import make_cx, best_of
+
+
+def legacy_nodes(G):
+    return [
+        {'nodes': [{'@id': n[0], 'n': n[1]['name'], 'r': n[1]['represents']}]} if 'name' in n[1] and 'represents' in n[
+            1] else
+        {'nodes': [{'@id': n[0], 'n': n[1]['name']}]} if 'name' in n[1] and 'represents' not in n[1] else
+        {'nodes': [{'@id': n[0], 'r': n[1]['represents']}]} if 'name' not in n[1] and 'represents' in n[1] else
+        {'nodes': [{'@id': n[0]}]}
+        for n in G.nodes_iter(data=True)]
+
+
+def legacy_edges(G):
+    return [
+        {'edges': [{'i': e[3]['interaction'], 'k': e[3]['keep'], 's': e[0], '@id': e[2], 't': e[1]}]}
+        if 'interaction' in e[3] and 'keep' in e[3] else
+        {'edges': [{'i': e[3]['interaction'], 's': e[0], '@id': e[2], 't': e[1]}]}
+        if 'interaction' in e[3] and 'keep' not in e[3] else
+        {'edges': [{'s': e[0], '@id': e[2], 't': e[1]}]}
+        for e in G.edges_iter(data=True, keys=True)]
+
+
+def legacy_aspects(G):
+    return legacy_nodes(G) + legacy_edges(G)
+
+
+def aspects(G, fragment_size=None):
+    return ca.nodes(G, fragment_size) + ca.edges(G, fragment_size)
+
+
+def main(nodes=200000, edges=1000000):
+    G = NdexGraph(make_cx(nodes, edges, node_attribute_count=0, edge_attribute_count=0, citation_count=0,
+                          fragment_size=10000))
+
+    print("%d nodes, %d edges" % (nodes, edges))
+    print("%-24s %10s %10s %10s %10s" % ("", "fragments", "build (s)", "encode (s)", "size (MB)"))
+    for label, function, args in (("one per element, before", legacy_aspects, ()),
+                                  ("one per aspect", aspects, ()),
+                                  ("10000 per fragment", aspects, (10000,))):
+        build_time, cx = best_of(3, function, G, *args)
+        encode_time, text = best_of(3, json.dumps, cx)
+        print("%-24s %10d %10.2f %10.2f %10.1f" % (label, len(cx), build_time, encode_time, len(text) / 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
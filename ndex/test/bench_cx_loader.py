@@ -0,0 +1,267 @@
+"""Benchmark: single-pass CX loader versus the previous seven-pass loader.
+
+    python -m ndex.test.bench_cx_loader [max_edges]
+
+Both loaders are run on synthetic CX of increasing size; the resulting graphs
+are compared before the timings are reported.
+"""
+
+import copy
+import sys
+
+from ndex.networkn import NdexGraph, parse_attribute, basestring
+from ndex.test.bench_util import make_cx, best_of
+
+
+class LegacyNdexGraph(NdexGraph):
+    """NdexGraph with the seven-pass CX loader it used before the single-pass one."""
+
+    def _load_cx(self, cx):
+        # First pass, get information about subnetworks.
+        for aspect in cx:
+            if 'status' in aspect :
+                if aspect['status'][0]['success']:
+                    continue
+                else:
+                    raise RuntimeError("Error in CX status aspect: " + aspect['status'][0]['error'])
+            if "numberVerification" in aspect:
+                # new status and numberVerification will be added when the network is output to_cx
+                continue
+            if 'subNetworks' in aspect:
+                for subnetwork in aspect.get('subNetworks'):
+                    id = subnetwork.get('@id')
+                    if self.subnetwork_id != None:
+                        raise ValueError("networkn does not support collections!")
+                    self.subnetwork_id = id
+            elif 'cyViews' in aspect:
+                for cyViews in aspect.get('cyViews'):
+                    id = cyViews.get('@id')
+                    if self.view_id != None:
+                        raise ValueError("networkn does not support more than one view!")
+                    self.view_id = id
+            elif 'metaData' in aspect:
+                self.metadata_original = aspect["metaData"]
+                # Strip metaData
+                continue
+            elif 'provenanceHistory' in aspect:
+                elements = aspect['provenanceHistory']
+                if len(elements) > 0:
+                    if len(elements)>1 or self.provenance :
+                        raise RuntimeError('profenanceHistory aspect can only have one element.')
+                    else :
+                        self.provenance = elements[0]
+            elif '@context' in aspect :
+                elements = aspect['@context']
+                if len(elements) > 0:
+                    if  len(elements) > 1 or self.namespaces:
+                        raise RuntimeError('@context aspect can only have one element')
+                    else :
+                        self.namespaces = elements[0]
+            # TODO elif if it's an aspect we want to keep out we put an elif for that aspect
+            else:
+                self.unclassified_cx.append(aspect)
+
+            cx = self.unclassified_cx
+
+        # Second pass, just build basic graph.
+        self.unclassified_cx = []
+        for aspect in cx:
+            if 'nodes' in aspect:
+                for node in aspect.get('nodes'):
+                    id = node.get('@id')
+                    name = node['n'] if 'n' in node else None
+                    if name:
+                        self.add_node(id, name=name)
+                    else:
+                        self.add_node(id)
+                    represents = node.get('r') if 'r' in node else None
+                    if represents:
+                        self.node.get(id)['represents'] = represents
+
+            elif 'edges' in aspect:
+                for edge in aspect.get('edges'):
+                    id = edge.get('@id')
+                    interaction = edge['i'] if 'i' in edge else None
+                    s = edge['s']
+                    t = edge['t']
+                    self.edgemap[id] = (s, t)
+                    if interaction:
+                        self.add_edge(s, t, key=id, interaction=interaction)
+                    else:
+                        self.add_edge(s, t, key=id)
+            else:
+                self.unclassified_cx.append(aspect)
+        cx = self.unclassified_cx
+
+        # Third pass, handle attributes
+        # Notes. Not handled, datatypes.
+        self.unclassified_cx = []
+        for aspect in cx:
+            if 'networkAttributes' in aspect:
+                for networkAttribute in aspect['networkAttributes']:
+                    name = networkAttribute['n']
+                    # special: ignore selected
+           #         if name == 'selected':
+           #             continue
+                    value = parse_attribute(networkAttribute)
+                    value = networkAttribute['v']
+                    if value is not None:
+                        if 's' in networkAttribute or name not in self.graph:
+                            self.graph[name] = value
+
+            elif 'nodeAttributes' in aspect:
+                for nodeAttribute in aspect['nodeAttributes']:
+                    id = nodeAttribute['po']
+                    name = nodeAttribute['n']
+                    value = parse_attribute(nodeAttribute)
+                    if value is not None:
+                        if 's' in nodeAttribute or name not in self.node[id]:
+                            self.node[id][name] = value
+
+            elif 'edgeAttributes' in aspect:
+                for edgeAttribute in aspect['edgeAttributes']:
+                    id = edgeAttribute['po']
+                    s, t = self.edgemap[id]
+                    name = edgeAttribute['n']
+                    value = parse_attribute(edgeAttribute)
+                    if value is not None:
+                        if 's' in edgeAttribute or name not in self[s][t][id]:
+                            self[s][t][id][name] = value
+            else:
+                self.unclassified_cx.append(aspect)
+
+        cx = self.unclassified_cx
+        self.unclassified_cx = []
+
+        # Fourth pass, node locations
+        self.pos = {}
+        for aspect in cx:
+            if 'cartesianLayout' in aspect:
+                for nodeLayout in aspect['cartesianLayout']:
+                    id = nodeLayout['node']
+                    x = nodeLayout['x']
+                    y = nodeLayout['y']
+                    self.pos[id] = [x,y]
+            else:
+                self.unclassified_cx.append(aspect)
+
+        cx = self.unclassified_cx
+        self.unclassified_cx = []
+
+        # Fifth pass, citations
+        for aspect in cx:
+            if 'citations' in aspect:
+                for citation in aspect['citations']:
+                    attributes = copy.deepcopy(citation)
+                    attributes.pop("@id")
+                    self.citation_map[citation["@id"]] = attributes
+                    self.citation_reference_map[citation["@id"]] = 0
+            else:
+                self.unclassified_cx.append(aspect)
+
+        cx = self.unclassified_cx
+        self.unclassified_cx = []
+
+        # Sixth pass, supports, the attributes include the mapping to their citation (if any) by its id
+        for aspect in cx:
+            if 'supports' in aspect:
+                for support in aspect['supports']:
+                    attributes = copy.deepcopy(support)
+                    attributes.pop("@id")
+                    self.support_map[support["@id"]] = attributes
+                    self.support_reference_map[support["@id"]] = 0
+
+            else:
+                self.unclassified_cx.append(aspect)
+
+        cx = self.unclassified_cx
+        self.unclassified_cx = []
+        # Seventh pass, map supports and citations to nodes and edges
+        for aspect in cx:
+            if 'nodeCitations' in aspect:
+                for node_citation in aspect['nodeCitations']:
+                    for node in node_citation["po"]:
+                        self.node_citation_map[node] = node_citation["citations"]
+                        for citation_id in node_citation["citations"]:
+                            cit_ref = self.citation_reference_map.get(citation_id)
+                            if(cit_ref is not None):
+                                self.citation_reference_map[citation_id] += 1
+            elif 'edgeCitations' in aspect:
+                for edge_citation in aspect['edgeCitations']:
+                    for edge in edge_citation["po"]:
+                        edge_citation_added = False
+                        for citation_id in edge_citation["citations"]:
+                            citation_tmp = self.citation_map.get(citation_id)
+                            if citation_tmp is not None and isinstance(citation_tmp, dict):
+                                self.add_citation_to_edge(edge, citation_tmp.get('dc:identifier'))
+                                edge_citation_added = True
+                            if citation_tmp is not None and isinstance(citation_tmp, basestring):
+                                self.add_citation_to_edge(edge, citation_tmp)
+                                edge_citation_added = True
+
+                            cit_ref = self.citation_reference_map.get(citation_id)
+                            if(cit_ref is not None):
+                                self.citation_reference_map[citation_id] += 1
+
+                        if not edge_citation_added:
+                            self.edge_citation_map[edge] = edge_citation["citations"]
+
+            elif 'nodeSupports' in aspect:
+                for node_support in aspect['nodeSupports']:
+                    for node_sup_po in node_support["po"]:
+                        self.node_support_map[node_sup_po] = node_support["supports"]
+                        for supports_id in node_support["supports"]:
+                            sup_ref = self.support_reference_map.get(supports_id)
+                            if(sup_ref is not None):
+                                self.support_reference_map[supports_id] += 1
+            elif 'edgeSupports' in aspect:
+                for edge_support in aspect['edgeSupports']:
+                    for edge_sup in edge_support["po"]:
+                        self.edge_support_map[edge_sup] = edge_support["supports"]
+                        for supports_id in edge_support["supports"]:
+                            sup_ref = self.support_reference_map.get(supports_id)
+                            if(sup_ref is not None):
+                                self.support_reference_map[supports_id] += 1
+            elif 'functionTerms' in aspect:
+                for function_term in aspect['functionTerms']:
+                    self.function_term_map[function_term["po"]] = function_term
+            elif 'reifiedEdges' in aspect:
+                for reified_edge in aspect["reifiedEdges"]:
+                    self.reified_edges [reified_edge['node']] = reified_edge
+            elif 'visualProperties' in aspect:
+                # remove all references to view id
+                for visual_properties in aspect["visualProperties"]:
+                    visual_properties.pop('view', None)
+                self.unclassified_cx.append(aspect)
+            elif 'cyVisualProperties' in aspect:
+                # remove all references to view id
+                for visual_properties in aspect["cyVisualProperties"]:
+                    visual_properties.pop('view', None)
+                self.unclassified_cx.append(aspect)
+            else:
+                self.unclassified_cx.append(aspect)
+
+
+def graph_state(G):
+    return (sorted(G.nodes(data=True)), sorted(G.edges(keys=True, data=True), key=lambda e: e[2]), G.graph,
+            G.pos, G.edgemap, G.citation_map, G.citation_reference_map, G.node_citation_map,
+            G.edge_citation_map, G.support_map, G.support_reference_map, G.node_support_map,
+            G.edge_support_map, G.unclassified_cx, G.metadata_original)
+
+
+def main(max_edges=200000):
+    print("%10s %10s %12s %12s %8s" % ("nodes", "edges", "7-pass (s)", "1-pass (s)", "speedup"))
+    edges = 1000
+    while edges <= max_edges:
+        nodes = edges // 2
+        cx = make_cx(nodes, edges)
+        legacy_time, legacy = best_of(3, LegacyNdexGraph, copy.deepcopy(cx))
+        single_time, single = best_of(3, NdexGraph, copy.deepcopy(cx))
+        if graph_state(legacy) != graph_state(single):
+            raise AssertionError("loaders disagree on %d edges" % edges)
+        print("%10d %10d %12.3f %12.3f %7.2fx" % (nodes, edges, legacy_time, single_time, legacy_time / single_time))
+        edges *= 4
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,74 @@
+"""Benchmark: removing most of the edges of a network.
+
+    python -m ndex.test.bench_edge_removal [nodes] [edges] [fraction]
+
+A synthetic network with one reified edge node per 20 edges is loaded, and a
+random fraction of its edges is removed one at a time as remove_edge_by_id did
+before (a scan of reified_edges per edge) and with one remove_edges_by_ids
+call.  Both must leave the same graph behind.
+"""
+
+import random
+import sys
+
+from ndex.networkn import NdexGraph
+from ndex.test.bench_util import make_cx, best_of
+
+
+def legacy_remove_edge_by_id(G, edge_id):
+    source_id, target_id = G.get_node_ids_by_edge_id(edge_id)
+    G.edgemap.pop(edge_id, None)
+    pop_these_reified_edges = []
+    for n, re in G.reified_edges.items():
+        if(re["edge"] == edge_id):
+            pop_these_reified_edges.append(n)
+    for n in pop_these_reified_edges:
+        G.reified_edges.pop(n, None)
+    G.remove_citation_and_support_edge_references(edge_id)
+    G.remove_edge(source_id, target_id, edge_id)
+
+
+def legacy_remove(cx, edge_ids):
+    G = NdexGraph(cx)
+    for edge_id in edge_ids:
+        legacy_remove_edge_by_id(G, edge_id)
+    return G
+
+
+def batch_remove(cx, edge_ids):
+    G = NdexGraph(cx)
+    G.remove_edges_by_ids(edge_ids)
+    return G
+
+
+def load(cx):
+    return NdexGraph(cx)
+
+
+def state(G):
+    return (sorted(G.edges(keys=True)), sorted(G.edgemap), sorted(G.reified_edges),
+            sorted(G.support_reference_map.items()), G.number_of_edges())
+
+
+def main(nodes=20000, edges=50000, fraction=0.8):
+    cx = make_cx(nodes, edges, fragment_size=1000)
+    reified_node_ids = range(nodes, nodes + edges // 20)
+    cx.append({'nodes': [{'@id': n} for n in reified_node_ids]})
+    cx.append({'reifiedEdges': [{'edge': e * 20, 'node': n} for e, n in enumerate(reified_node_ids)]})
+    edge_ids = random.Random(1).sample(range(edges), int(edges * fraction))
+
+    load_time, _ = best_of(3, load, cx)
+    batch_time, batched = best_of(3, batch_remove, cx, edge_ids)
+    legacy_time, legacy = best_of(1, legacy_remove, cx, edge_ids)
+    if state(legacy) != state(batched):
+        raise AssertionError("edge removal results differ")
+
+    print("%d nodes, %d edges, %d reified edges; removing %d edges" % (nodes, edges, len(reified_node_ids),
+                                                                          len(edge_ids)))
+    print("%-26s %10s" % ("", "time (s)"))
+    print("%-26s %10.3f" % ("per edge, before", legacy_time - load_time))
+    print("%-26s %10.3f" % ("remove_edges_by_ids", batch_time - load_time))
+
+
+if __name__ == '__main__':
+    main(*[float(a) if '.' in a else int(a) for a in sys.argv[1:]])
@@ -0,0 +1,68 @@
+"""Benchmark: id allocation, edge counting and node/edge metadata with the
+incrementally maintained counters.
+
+    python -m ndex.test.bench_id_counters [edges]
+
+A graph is built node by node with add_new_node and add_edge_between.  The
+node and edge metadata are then generated as before (full id lists and max()
+over them) and from the counters, and the edge count is taken as
+MultiDiGraph.number_of_edges computes it and from the counter.
+"""
+
+import random
+import sys
+import time
+
+from networkx import MultiDiGraph
+
+from ndex.networkn import NdexGraph
+from ndex.test.bench_util import best_of
+
+
+def legacy_node_edge_metadata(G):
+    node_ids = [n[0] for n in G.nodes_iter(data=True)]
+    if(len(node_ids) < 1):
+        node_ids = [0]
+    edge_ids = [e[2]for e in G.edges_iter(data=True, keys=True)]
+    if(len(edge_ids) < 1):
+        edge_ids = [0]
+    return len(node_ids), max(node_ids), len(edge_ids), max(edge_ids)
+
+
+def node_edge_metadata(G):
+    return G.number_of_nodes() or 1, G._node_id_counter(), G.number_of_edges() or 1, G._edge_id_counter()
+
+
+def build(edges):
+    rnd = random.Random(1)
+    G = NdexGraph()
+    nodes = []
+    for e in range(edges):
+        if len(nodes) < 2 or rnd.random() < 0.5:
+            nodes.append(G.add_new_node('node %d' % len(nodes)))
+        G.add_edge_between(rnd.choice(nodes), nodes[-1])
+    return G
+
+
+def main(edges=1000000):
+    start = time.time()
+    G = build(edges)
+    build_time = time.time() - start
+
+    legacy_time, legacy = best_of(3, legacy_node_edge_metadata, G)
+    counter_time, counted = best_of(3, node_edge_metadata, G)
+    if legacy != counted:
+        raise AssertionError("metadata differs: %s != %s" % (legacy, counted))
+    scan_count_time, scanned = best_of(3, MultiDiGraph.number_of_edges, G)
+    count_time, count = best_of(3, G.number_of_edges)
+    assert scanned == count
+
+    print("%d nodes, %d edges built node by node in %.1f s (%.1f us per edge)"
+          % (G.number_of_nodes(), edges, build_time, build_time * 1e6 / edges))
+    print("%-28s %12s %12s" % ("", "before (s)", "counters (s)"))
+    print("%-28s %12.4f %12.6f" % ("node and edge metadata", legacy_time, counter_time))
+    print("%-28s %12.4f %12.6f" % ("number_of_edges()", scan_count_time, count_time))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
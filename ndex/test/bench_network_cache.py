@@ -0,0 +1,51 @@
+"""Benchmark: loading an unchanged network with NdexGraph(server=..., uuid=...).
+
+    python -m ndex.test.bench_network_cache [nodes] [edges] [loads]
+
+A local stand-in server serves a synthetic network and its summary.  The
+network is loaded loads times, as worker processes do when they start,
+without a cache and with a NetworkCache; the first load with the cache
+downloads the network and stores it, the others only read the summary.
+"""
+
+import json
+import shutil
+import sys
+import tempfile
+import time
+
+from ndex.cache import NetworkCache
+from ndex.networkn import NdexGraph
+from ndex.test.bench_util import make_cx
+from ndex.test.stub_server import StubNdexServer, StubResponse
+
+
+def load(url, loads, cache=None):
+    times = []
+    for _ in range(loads):
+        start = time.time()
+        NdexGraph(server=url, uuid='network', cache=cache)
+        times.append(time.time() - start)
+    return times
+
+
+def main(node_count=20000, edge_count=40000, loads=5):
+    data = json.dumps(make_cx(node_count, edge_count, fragment_size=1000)).encode('utf-8')
+    directory = tempfile.mkdtemp()
+    with StubNdexServer() as server:
+        server.add_route('GET', '/v2/network/network',
+                         lambda request: StubResponse(data[i:i + 64 * 1024] for i in range(0, len(data), 64 * 1024)))
+        server.add_route('GET', '/v2/network/network/summary', {'externalId': 'network', 'modificationTime': 1000})
+
+        print("%d nodes, %d edges, %.1f MB of CX, %d loads" % (node_count, edge_count, len(data) / 1e6, loads))
+        print("%-28s %12s %12s %12s" % ("", "first (s)", "others (s)", "total (s)"))
+        cache = NetworkCache(directory)
+        for label, times in (("no cache", load(server.url, loads)),
+                             ("NetworkCache", load(server.url, loads, cache))):
+            print("%-28s %12.2f %12.2f %12.2f" % (label, times[0], sum(times[1:]) / (len(times) - 1), sum(times)))
+        print("NetworkCache: " + cache.report())
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
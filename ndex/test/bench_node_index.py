@@ -0,0 +1,61 @@
+"""Benchmark: annotating nodes from a table, with and without the node index.
+
+    python -m ndex.test.bench_node_index [rows] [sample]
+
+This is the work toolbox.annotate does for each row of an annotation file:
+look the nodes up by name with get_node_ids and set the row's attributes with
+set_node_attribute.  Without the index every lookup scans all nodes, so only
+the first sample rows are run and the time for all rows is extrapolated.
+"""
+
+import random
+import sys
+import time
+
+from ndex.networkn import NdexGraph
+
+COLUMNS = ['type', 'score', 'source']
+
+
+def _graph(rows):
+    G = NdexGraph()
+    for i in range(rows):
+        G.add_new_node('gene %d' % i)
+    return G
+
+
+def _annotate(G, table):
+    for row in table:
+        for n in G.get_node_ids(row[0], 'name'):
+            for key, value in zip(COLUMNS, row[1:]):
+                G.set_node_attribute(n, key, value)
+
+
+def main(rows=100000, sample=500):
+    rnd = random.Random(1)
+    table = [('gene %d' % i, rnd.choice(['protein', 'rna']), str(rnd.random()), 'db%d' % rnd.randrange(5))
+             for i in range(rows)]
+    rnd.shuffle(table)
+
+    G = _graph(rows)
+    start = time.time()
+    _annotate(G, table[:sample])
+    scan = (time.time() - start) * rows / sample
+
+    indexed = _graph(rows)
+    indexed.use_node_index()
+    start = time.time()
+    _annotate(indexed, table)
+    index = time.time() - start
+
+    for name, _, _, _ in table[:sample]:
+        n = G.get_node_ids(name)[0]
+        assert G.node[n] == indexed.node[n]
+    print("%d rows, %d nodes" % (rows, rows))
+    print("scan:  %10.1f s (extrapolated from %d rows)" % (scan, sample))
+    print("index: %10.1f s" % index)
+    print("speedup: %.0fx" % (scan / index))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,107 @@
+"""Benchmark: removing many nodes, and removing orphan nodes.
+
+    python -m ndex.test.bench_node_removal [nodes] [edges] [removed]
+
+A synthetic network with node citations and edge supports is loaded, and a
+random sample of its nodes is removed with one remove_nodes_from call and one
+at a time as before: remove_node per node, after removing the incident edges
+with remove_edge_by_id (remove_node left them in edgemap and kept their
+supports) and dropping the layout position.  The orphan nodes left behind are
+then removed as remove_orphan_nodes did before (degree() per node, one
+removal at a time) and with the new remove_orphan_nodes.
+"""
+
+import random
+import sys
+
+from networkx import DiGraph, MultiDiGraph
+
+from ndex.networkn import NdexGraph
+from ndex.test.bench_util import make_cx, best_of
+
+
+def legacy_remove_node(G, n):
+    G.reified_edges.pop(n, None)
+    if(G.function_term_map.get(n) is not None):
+        G.function_term_map.pop(n, None)
+    G.remove_citation_and_support_node_references(n)
+    DiGraph.remove_node(G, n)
+
+
+def legacy_remove_edge_by_id(G, edge_id):
+    source_id, target_id = G.get_node_ids_by_edge_id(edge_id)
+    G.edgemap.pop(edge_id, None)
+    pop_these_reified_edges = []
+    for n, re in G.reified_edges.items():
+        if(re["edge"] == edge_id):
+            pop_these_reified_edges.append(n)
+    for n in pop_these_reified_edges:
+        G.reified_edges.pop(n, None)
+    G.remove_citation_and_support_edge_references(edge_id)
+    MultiDiGraph.remove_edge(G, source_id, target_id, edge_id)
+
+
+def legacy_remove_node_and_edges(G, n):
+    for edge_id in set(k for _, _, k in G.out_edges_iter(n, keys=True)) | \
+            set(k for _, _, k in G.in_edges_iter(n, keys=True)):
+        legacy_remove_edge_by_id(G, edge_id)
+    G.pos.pop(n, None)
+    legacy_remove_node(G, n)
+
+
+def legacy_remove_orphan_nodes(G):
+    for node_id in G.nodes():
+        degree = G.degree([node_id])[node_id]
+        if degree is 0:
+            G.pos.pop(node_id, None)
+            legacy_remove_node(G, node_id)
+
+
+def legacy_remove(cx, node_ids):
+    G = NdexGraph(cx)
+    for n in node_ids:
+        legacy_remove_node_and_edges(G, n)
+    return G
+
+
+def bulk_remove(cx, node_ids):
+    G = NdexGraph(cx)
+    G.remove_nodes_from(node_ids)
+    return G
+
+
+def load(cx):
+    return NdexGraph(cx)
+
+
+def state(G):
+    return (sorted(G.nodes()), sorted(G.edges(keys=True)), sorted(G.edgemap), sorted(G.pos),
+            sorted(G.citation_reference_map.items()), sorted(G.support_reference_map.items()),
+            sorted(G.node_citation_map), sorted(G.edge_support_map))
+
+
+def main(nodes=150000, edges=200000, removed=100000):
+    cx = make_cx(nodes, edges, node_attribute_count=0, edge_attribute_count=0, citation_count=100,
+                 fragment_size=1000)
+    node_ids = random.Random(1).sample(range(nodes), removed)
+
+    load_time, _ = best_of(3, load, cx)
+    legacy_time, legacy = best_of(3, legacy_remove, cx, node_ids)
+    bulk_time, bulk = best_of(3, bulk_remove, cx, node_ids)
+    if state(legacy) != state(bulk):
+        raise AssertionError("node removal results differ")
+    orphans = [n for n in bulk.nodes_iter() if not bulk.succ[n] and not bulk.pred[n]]
+    legacy_orphan_time, _ = best_of(1, legacy_remove_orphan_nodes, legacy)
+    orphan_time, _ = best_of(1, bulk.remove_orphan_nodes)
+    if state(legacy) != state(bulk):
+        raise AssertionError("orphan removal results differ")
+
+    print("%d nodes, %d edges; removing %d nodes, then %d orphans"
+          % (nodes, edges, removed, len(orphans)))
+    print("%-26s %12s %12s" % ("", "before (s)", "after (s)"))
+    print("%-26s %12.3f %12.3f" % ("remove nodes", legacy_time - load_time, bulk_time - load_time))
+    print("%-26s %12.3f %12.3f" % ("remove_orphan_nodes", legacy_orphan_time, orphan_time))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
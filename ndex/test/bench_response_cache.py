@@ -0,0 +1,65 @@
+"""Benchmark: reading the same network summaries again and again.
+
+    python -m ndex.test.bench_response_cache [networks] [rounds] [latency ms]
+
+A local stand-in server answers GET /network/{id}/summary with an ETag,
+waiting latency ms before each response to stand in for the round trip to a
+remote server, and answers 304 to a request with a matching If-None-Match.
+Each round reads the summary of every network.  A client without a cache is
+compared with a ResponseCache in memory, one whose responses have always
+expired (every read is revalidated), and one on disk, read by a new cache as
+another process would.
+"""
+
+import shutil
+import sys
+import tempfile
+import time
+
+import ndex.client as nc
+from ndex.cache import ResponseCache
+from ndex.test.stub_server import StubNdexServer, StubResponse
+
+
+def main(networks=100, rounds=10, latency_ms=20):
+    network_ids = ['network-%d' % n for n in range(networks)]
+
+    def summary(request):
+        time.sleep(latency_ms / 1000.0)
+        network_id = request.path.split('/')[-2]
+        if request.headers.get('If-None-Match') == '"%s"' % network_id:
+            return StubResponse(status=304, headers={'ETag': '"%s"' % network_id})
+        return StubResponse({'externalId': network_id, 'name': network_id, 'nodeCount': 100, 'edgeCount': 500,
+                             'modificationTime': 1000, 'properties': [{'predicateString': 'p', 'value': 'v' * 200}]},
+                            headers={'ETag': '"%s"' % network_id})
+
+    directory = tempfile.mkdtemp()
+    with StubNdexServer() as server:
+        for network_id in network_ids:
+            server.add_route('GET', '/v2/network/%s/summary' % network_id, summary)
+        registry = nc.NdexRegistry()
+        nc.Ndex(server.url, registry=registry).version  # detect the server version before timing
+
+        print("%d networks, %d rounds, %d ms latency" % (networks, rounds, latency_ms))
+        print("%-36s %10s %10s %10s" % ("", "time (s)", "requests", "hit rate"))
+        disk = ResponseCache(directory=directory)
+        for label, cache in (("no cache", None),
+                             ("ResponseCache", ResponseCache()),
+                             ("ResponseCache, always revalidated", ResponseCache(ttl=0)),
+                             ("ResponseCache on disk, filled", disk),
+                             ("ResponseCache on disk, new cache", ResponseCache(directory=directory))):
+            client = nc.Ndex(server.url, 'user', 'password', registry=registry, cache=cache)
+            del server.requests[:]
+            start = time.time()
+            for _ in range(rounds):
+                for network_id in network_ids:
+                    client.get_network_summary(network_id)
+            elapsed = time.time() - start
+            hit_rate = "%9.0f%%" % (100 * cache.stats()['hit_rate']) if cache else "%10s" % "-"
+            print("%-36s %10.2f %10d %s" % (label, elapsed, len(server.requests), hit_rate))
+        registry.clear()
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,69 @@
+"""Benchmark: enumerating search results page by page.
+
+    python -m ndex.test.bench_search_pages [networks] [page size] [latency ms] [work ms per page]
+
+A local stand-in server answers /search/network for a number of network
+summaries, waiting latency ms before each page.  The caller spends some time
+on the summaries of each page.  A manual loop over search_networks pages is
+compared with iter_networks, with and without prefetching the next page.
+"""
+
+import sys
+import time
+
+import ndex.client as nc
+from ndex.test.stub_server import StubNdexServer
+from ndex.test.test_search import search_route
+
+
+def manual(client, page_size, work):
+    count = 0
+    start = 0
+    while True:
+        networks = client.search_networks('', start=start, size=page_size)['networks']
+        for _ in networks:
+            count += 1
+        time.sleep(work)
+        if len(networks) < page_size:
+            return count
+        start += 1
+
+
+def iterated(client, page_size, work, prefetch):
+    count = 0
+    for _ in client.iter_networks(page_size=page_size, prefetch=prefetch):
+        count += 1
+        if count % page_size == 0:
+            time.sleep(work)
+    return count
+
+
+def main(networks=5000, page_size=100, latency_ms=50, work_ms=50):
+    summaries = [{'externalId': 'uuid-%d' % n} for n in range(networks)]
+    search = search_route(summaries)
+
+    def slow_search(request):
+        time.sleep(latency_ms / 1000.0)
+        return search(request)
+
+    with StubNdexServer() as server:
+        server.add_route('POST', '/v2/search/network', slow_search)
+        registry = nc.NdexRegistry()
+        client = nc.Ndex(server.url, registry=registry)
+        client.version  # detect the server version before timing
+
+        print("%d networks, pages of %d, %d ms latency, %d ms of work per page" % (networks, page_size, latency_ms,
+                                                                                   work_ms))
+        print("%-36s %10s %10s" % ("", "time (s)", "networks"))
+        work = work_ms / 1000.0
+        for label, function, args in (("manual search_networks loop", manual, (client, page_size, work)),
+                                      ("iter_networks, no prefetch", iterated, (client, page_size, work, False)),
+                                      ("iter_networks", iterated, (client, page_size, work, True))):
+            start = time.time()
+            count = function(*args)
+            print("%-36s %10.2f %10d" % (label, time.time() - start, count))
+        registry.clear()
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
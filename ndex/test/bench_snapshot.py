@@ -0,0 +1,52 @@
+"""Benchmark: checkpointing an NdexGraph as CX and as a snapshot.
+
+    python -m ndex.test.bench_snapshot [max_edges]
+
+Synthetic networks of increasing size are written to a temporary directory
+with write_to (CX) and write_snapshot, and read back with NdexGraph(cx) and
+NdexGraph.read_snapshot, with the attributes in the networkx dicts and in
+attribute stores.  File sizes and the best of three timings are reported.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from ndex.networkn import NdexGraph
+from ndex.test.bench_util import make_cx, best_of
+
+
+def read_cx(path, columnar_attributes):
+    with open(path, 'r') as f:
+        return NdexGraph(json.load(f), columnar_attributes=columnar_attributes)
+
+
+def main(max_edges=200000):
+    directory = tempfile.mkdtemp()
+    cx_path = os.path.join(directory, 'network.cx')
+    snapshot_path = os.path.join(directory, 'network.ndexsnap')
+    print("%8s %8s %9s %8s %8s %8s %8s %8s %8s %8s" % ("nodes", "edges", "columnar", "CX MB", "snap MB",
+                                                       "write CX", "write", "read CX", "read", "speedup"))
+    edges = 10000
+    while edges <= max_edges:
+        nodes = edges // 2
+        for columnar_attributes in (False, True):
+            G = NdexGraph(make_cx(nodes, edges, fragment_size=1000), columnar_attributes=columnar_attributes)
+            write_cx, _ = best_of(3, G.write_to, cx_path)
+            write_snapshot, _ = best_of(3, G.write_snapshot, snapshot_path)
+            read, _ = best_of(3, read_cx, cx_path, columnar_attributes)
+            read_snapshot, H = best_of(3, NdexGraph.read_snapshot, snapshot_path)
+            if H.number_of_edges() != G.number_of_edges():
+                raise AssertionError("the snapshot lost edges")
+            print("%8d %8d %9s %8.1f %8.1f %8.2f %8.2f %8.2f %8.2f %7.1fx" % (
+                nodes, edges, columnar_attributes, os.path.getsize(cx_path) / 1e6,
+                os.path.getsize(snapshot_path) / 1e6, write_cx, write_snapshot, read, read_snapshot,
+                read / read_snapshot))
+        edges *= 4
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
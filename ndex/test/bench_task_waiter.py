@@ -0,0 +1,93 @@
+"""Benchmark: waiting for many server-side tasks.
+
+    python -m ndex.test.bench_task_waiter [tasks] [longest task s]
+
+A local stand-in server runs tasks that complete at random times up to the
+longest task duration after the benchmark starts.  Waiting for all of them
+with a time.sleep(1) polling loop per task, one task after the other and in
+a thread per task, is compared with a TaskWaiter.  The wall time, the
+number of polls sent and the mean delay between the completion of a task
+and its detection are reported.
+"""
+
+import random
+import sys
+import threading
+import time
+
+import ndex.client as nc
+from ndex.tasks import TaskWaiter
+from ndex.test.stub_server import StubNdexServer
+
+
+class Tasks(object):
+    def __init__(self, server, count, longest):
+        rnd = random.Random(1)
+        self.durations = dict(('task-%d' % n, rnd.uniform(0.1, longest)) for n in range(count))
+        self.start = time.time()
+        for task_id in self.durations:
+            server.add_route('GET', '/v2/task/' + task_id, self.answer)
+
+    def restart(self):
+        self.start = time.time()
+        self.detected = {}
+
+    def answer(self, request):
+        task_id = request.path.rsplit('/', 1)[-1]
+        done = time.time() - self.start >= self.durations[task_id]
+        return {'externalId': task_id, 'status': 'COMPLETED' if done else 'PROCESSING'}
+
+    def record(self, task_id):
+        self.detected[task_id] = time.time() - self.start - self.durations[task_id]
+
+
+def sleep_loop(client, tasks, task_id):
+    while client.get_task_by_id(task_id)['status'] != 'COMPLETED':
+        time.sleep(1)
+    tasks.record(task_id)
+
+
+def sequential(client, tasks):
+    for task_id in sorted(tasks.durations):
+        sleep_loop(client, tasks, task_id)
+
+
+def threads(client, tasks):
+    workers = [threading.Thread(target=sleep_loop, args=(client, tasks, task_id)) for task_id in tasks.durations]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def waiter(client, tasks):
+    with TaskWaiter(client) as task_waiter:
+        for task_id in tasks.durations:
+            task_waiter.wait(task_id).add_done_callback(lambda future: tasks.record(future.result()['externalId']))
+        task_waiter.wait_all(tasks.durations)
+
+
+def main(count=50, longest=30):
+    with StubNdexServer() as server:
+        tasks = Tasks(server, count, longest)
+        registry = nc.NdexRegistry()
+        client = nc.Ndex(server.url, 'user', 'password', registry=registry, pool_maxsize=count)
+        client.version  # detect the server version before timing
+
+        print("%d tasks taking up to %d s" % (count, longest))
+        print("%-36s %10s %8s %12s" % ("", "time (s)", "polls", "detect (s)"))
+        for label, function in (("sleep(1) loop per task, in turn", sequential),
+                                ("sleep(1) loop per task, threads", threads),
+                                ("TaskWaiter", waiter)):
+            del server.requests[:]
+            tasks.restart()
+            start = time.time()
+            function(client, tasks)
+            elapsed = time.time() - start
+            delay = sum(tasks.detected.values()) / len(tasks.detected)
+            print("%-36s %10.2f %8d %12.2f" % (label, elapsed, len(server.requests), delay))
+        registry.clear()
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
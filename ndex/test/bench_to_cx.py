@@ -0,0 +1,102 @@
+"""Benchmark: graph traversals and time of NdexGraph.to_cx.
+
+    python -m ndex.test.bench_to_cx [nodes] [edges]
+
+to_cx is run as it was before (generate_metadata walking the node and edge
+attribute dicts to count attribute elements, then one pass each for the
+nodes, edges, nodeAttributes and edgeAttributes aspects) and as it is now (one
+pass over the nodes and one over the edges, metadata counts taken from the
+built aspects).  For each, the full traversals of the graph (nodes_iter and
+edges_iter calls) are counted, and cProfile reports the Python function calls
+made and the time spent building the node and edge aspects.
+"""
+
+import cProfile
+import pstats
+import sys
+import time
+
+from ndex import create_aspect as ca
+from ndex.networkn import NdexGraph
+from ndex.test.bench_util import make_cx, best_of
+
+NODE_EDGE_ASPECTS = ('legacy_attribute_counts', 'nodes', 'edges', 'node_attributes', 'edge_attributes',
+                     'node_aspect_elements', 'edge_aspect_elements')
+
+
+def legacy_attribute_counts(G):
+    # The counting loops of generate_metadata before this change, one walk each.
+    node_count = 0
+    for node_id, attributes in G.nodes_iter(data=True):
+        for attribute_name in attributes:
+            if attribute_name != "name" and attribute_name != "represents":
+                node_count += 1
+    edge_count = 0
+    for s, t, id, a in G.edges(data=True, keys=True):
+        if(bool(a)):
+            for attribute_name in a:
+                if attribute_name != "interaction":
+                    edge_count += 1
+    return node_count, edge_count
+
+
+def legacy_to_cx(G):
+    cx = []
+    cx += ca.number_verification()
+    cx += G.generate_metadata(G, G.unclassified_cx, attribute_counts=legacy_attribute_counts(G))
+    cx += ca.network_attributes(G, False)
+    cx += ca.nodes(G)
+    cx += ca.edges(G)
+    cx += ca.node_attributes(G, False) or []
+    cx += ca.edge_attributes(G, False) or []
+    if G.pos:
+        cx += ca.cartesian(G)
+    cx += [G.status]
+    return cx
+
+
+def to_cx(G):
+    return G.to_cx()
+
+
+def traversals(function, G):
+    counts = {'traversals': 0}
+
+    def counting(method):
+        def traverse(*args, **kwargs):
+            counts['traversals'] += 1
+            return method(*args, **kwargs)
+        return traverse
+
+    G.nodes_iter = counting(G.nodes_iter)
+    G.edges_iter = counting(G.edges_iter)
+    try:
+        profile = cProfile.Profile()
+        profile.runcall(function, G)
+    finally:
+        del G.nodes_iter
+        del G.edges_iter
+    stats = pstats.Stats(profile)
+    aspect_time = sum(stats.stats[key][3] for key in stats.stats if key[2] in NODE_EDGE_ASPECTS)
+    return counts['traversals'], stats.total_calls, aspect_time
+
+
+def main(nodes=100000, edges=500000):
+    start = time.time()
+    G = NdexGraph(make_cx(nodes, edges, node_attribute_count=2, edge_attribute_count=2, citation_count=0,
+                          fragment_size=10000))
+    print("%d nodes, %d edges, loaded in %.1f s" % (nodes, edges, time.time() - start))
+
+    legacy_time, legacy = best_of(3, legacy_to_cx, G)
+    new_time, new = best_of(3, to_cx, G)
+    if legacy[1] != new[1]:
+        raise AssertionError("metadata differs")
+
+    print("%-16s %11s %14s %22s %10s" % ("", "traversals", "function calls", "node/edge aspects (s)",
+                                         "time (s)"))
+    for label, function, elapsed in (("to_cx, before", legacy_to_cx, legacy_time), ("to_cx", to_cx, new_time)):
+        print("%-16s %11d %14d %22.2f %10.2f" % ((label,) + traversals(function, G) + (elapsed,)))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,78 @@
+"""Helpers shared by the bench_*.py scripts in this directory.
+
+The benchmarks are plain scripts (run them with ``python -m ndex.test.bench_<name>``)
+and are not collected by the unit test runner.
+"""
+
+import random
+import time
+
+
+def make_cx(node_count, edge_count, node_attribute_count=2, edge_attribute_count=2,
+            citation_count=10, fragment_size=1, seed=1):
+    """Build a synthetic CX document.
+
+    Elements are split into fragments of fragment_size elements (1 mimics what
+    NdexGraph.to_cx emitted for nodes and edges).  Attribute and citation
+    aspects are placed before the nodes and edges they refer to so that the
+    loader has to resolve forward references.
+    """
+    rnd = random.Random(seed)
+
+    def fragments(name, elements):
+        return [{name: elements[i:i + fragment_size]} for i in range(0, len(elements), fragment_size)]
+
+    nodes = [{'@id': n, 'n': 'node %d' % n, 'r': 'HGNC:%d' % n} for n in range(node_count)]
+    edges = [{'@id': e, 's': rnd.randrange(node_count), 't': rnd.randrange(node_count), 'i': 'interacts with'}
+             for e in range(edge_count)]
+    node_attributes = []
+    for n in range(node_count):
+        for a in range(node_attribute_count):
+            if a % 2:
+                node_attributes.append({'po': n, 'n': 'score %d' % a, 'v': rnd.random(), 'd': 'double'})
+            else:
+                node_attributes.append({'po': n, 'n': 'type %d' % a, 'v': rnd.choice(['protein', 'complex', 'rna'])})
+    edge_attributes = []
+    for e in range(edge_count):
+        for a in range(edge_attribute_count):
+            if a % 2:
+                edge_attributes.append({'po': e, 'n': 'weight %d' % a, 'v': rnd.random(), 'd': 'double'})
+            else:
+                edge_attributes.append({'po': e, 'n': 'source %d' % a, 'v': ['db%d' % rnd.randrange(5)],
+                                        'd': 'list_of_string'})
+    citations = [{'@id': c, 'dc:identifier': 'pmid:%d' % c, 'dc:title': 'paper %d' % c} for c in range(citation_count)]
+    supports = [{'@id': c, 'citation': c, 'text': 'evidence %d' % c} for c in range(citation_count)]
+    node_citations = [{'po': [n], 'citations': [n % citation_count]} for n in range(0, node_count, 3)] \
+        if citation_count else []
+    edge_supports = [{'po': [e], 'supports': [e % citation_count]} for e in range(0, edge_count, 2)] \
+        if citation_count else []
+    layout = [{'node': n, 'x': rnd.random() * 1000, 'y': rnd.random() * 1000} for n in range(node_count)]
+
+    cx = [{'numberVerification': [{'longNumber': 281474976710655}]},
+          {'metaData': [{'name': 'nodes', 'elementCount': node_count},
+                        {'name': 'edges', 'elementCount': edge_count}]},
+          {'networkAttributes': [{'n': 'name', 'v': 'synthetic %d/%d' % (node_count, edge_count)}]}]
+    cx += fragments('edgeAttributes', edge_attributes)
+    cx += fragments('nodeCitations', node_citations)
+    cx += fragments('edgeSupports', edge_supports)
+    cx += fragments('nodeAttributes', node_attributes)
+    cx += fragments('nodes', nodes)
+    cx += fragments('edges', edges)
+    cx += fragments('cartesianLayout', layout)
+    cx += fragments('citations', citations)
+    cx += fragments('supports', supports)
+    cx += [{'status': [{'error': '', 'success': True}]}]
+    return cx
+
+
+def best_of(repeat, function, *args, **kwargs):
+    """Run function repeat times and return (best wall time in seconds, last result)."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.time()
+        result = function(*args, **kwargs)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
@@ -0,0 +1,191 @@
+"""A local stand-in for an NDEx server, used by the offline tests and benchmarks.
+
+Routes are registered per method and path; anything else answers 404 with an
+NDEx style error body.  Every request is recorded in ``server.requests``.
+
+    with StubNdexServer() as server:
+        server.add_route('GET', '/v2/network/abc/summary', {'externalId': 'abc'})
+        ndex = nc.Ndex(server.url)
+"""
+
+import json
+import socket
+import sys
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlsplit, parse_qs
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlsplit, parse_qs
+
+
+class StubRequest(object):
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body.decode('utf-8'))
+
+
+class StubResponse(object):
+    """What a route answers.  body may be bytes, a JSON-serializable value or an iterable of byte chunks."""
+
+    def __init__(self, body=None, status=200, headers=None, content_type='application/json'):
+        self.status = status
+        self.headers = dict(headers or {})
+        if body is None:
+            self.chunks = [b'']
+        elif isinstance(body, bytes):
+            self.chunks = [body]
+        elif isinstance(body, (dict, list)) or not hasattr(body, '__iter__'):
+            self.chunks = [json.dumps(body).encode('utf-8')]
+        else:
+            self.chunks = body
+        self.headers.setdefault('Content-Type', content_type)
+
+
+def file_chunks(path, chunk_size=16 * 1024):
+    """Iterate over the contents of a file in chunks of chunk_size bytes."""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Clients closing kept-alive connections is not an error here.
+        if not isinstance(sys.exc_info()[1], socket.error):
+            HTTPServer.handle_error(self, request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Responses are written in several small pieces; without this, delayed ACKs stall kept-alive connections.
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip(), 16)
+                if size == 0:
+                    # trailer
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                body.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b''.join(body)
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _dispatch(self):
+        stub = self.server.stub
+        url = urlsplit(self.path)
+        request = StubRequest(self.command, url.path, parse_qs(url.query), dict(self.headers.items()),
+                              self._read_body())
+        with stub.lock:
+            stub.requests.append(request)
+            stub.connections.add(self.client_address)
+            route = stub.routes.get((self.command, url.path))
+        if route is None:
+            response = StubResponse({'errorCode': 'NDEx_Object_Not_Found_Exception',
+                                     'message': 'No route for %s %s' % (self.command, url.path)}, status=404)
+        elif callable(route):
+            response = route(request)
+            if not isinstance(response, StubResponse):
+                response = StubResponse(response)
+        else:
+            response = route
+
+        self.send_response(response.status)
+        for name, value in response.headers.items():
+            self.send_header(name, value)
+        # A 204 or 304 response has no body, not even an empty chunked one.  A body is chunked unless the response
+        # has a Content-Length.
+        has_body = response.status not in (204, 304)
+        chunked = has_body and 'Content-Length' not in response.headers
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        if self.close_connection:
+            # The client asked for Connection: close; say so, as servers do.
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        if chunked:
+            for chunk in response.chunks:
+                if chunk:
+                    self.wfile.write(('%x\r\n' % len(chunk)).encode('ascii') + chunk + b'\r\n')
+            self.wfile.write(b'0\r\n\r\n')
+        elif has_body:
+            for chunk in response.chunks:
+                self.wfile.write(chunk)
+
+    do_GET = do_PUT = do_POST = do_DELETE = _dispatch
+
+
+class StubNdexServer(object):
+    """A threaded HTTP server on 127.0.0.1 answering like an NDEx 2.0 server."""
+
+    def __init__(self, server_version='2.0'):
+        self.routes = {}
+        self.requests = []
+        self.connections = set()
+        self.lock = threading.Lock()
+        self._httpd = _ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._httpd.stub = self
+        self._thread = None
+        if server_version:
+            self.add_route('GET', '/rest/admin/status', {'properties': {'ServerVersion': server_version}})
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d' % self._httpd.server_address[1]
+
+    def add_route(self, method, path, response=None, status=200):
+        """Answer method requests for path.
+
+        :param response: A StubResponse, a callable taking a StubRequest, or a body for a StubResponse.
+        """
+        if not callable(response) and not isinstance(response, StubResponse):
+            response = StubResponse(response, status=status)
+        with self.lock:
+            self.routes[(method, path)] = response
+
+    def requests_to(self, method, path):
+        with self.lock:
+            return [r for r in self.requests if r.method == method and r.path == path]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -45,9 +45,11 @@ class NdexClientRASMachineTestCase(NdexClientTestCase):
 class NdexClientTestCase1(unittest.TestCase):
 
     def testConstructorException(self):
+        print("testing ndex client constructor.")
+        # The server is only contacted on first use.
+        ndex = nc.Ndex(host="www.google.com", username="foo", password="bar", debug=True)
         with self.assertRaises(Exception):
-            print("testing ndex client constructor.")
-            ndex = nc.Ndex(host="www.google.com", username="foo", password="bar", debug=True)
+            ndex.version
 
     def testConstructor2 (self):
         ndex = nc.Ndex(host=TESTSERVER,update_status=True,debug=True)
@@ -0,0 +1,135 @@
+import unittest
+import json
+import threading
+import time
+import ndex.client as nc
+from ndex.test.stub_server import StubNdexServer, StubResponse
+from ndex.test.test_cx_upload import CX, NETWORK_URL, _uploaded_cx
+
+try:
+    import asyncio
+    from ndex.aio import AsyncNdex, aiohttp
+except (ImportError, SyntaxError):
+    aiohttp = None
+
+STATUS = '/rest/admin/status'
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class AsyncNdexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubNdexServer().start()
+        self.registry = nc.NdexRegistry()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.ndex = AsyncNdex(self.server.url, 'user', 'password', max_concurrency=4, registry=self.registry)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.ndex.close())
+        self.loop.close()
+        asyncio.set_event_loop(None)
+        self.registry.clear()
+        self.server.stop()
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_bounded_concurrency(self):
+        lock = threading.Lock()
+        in_flight = [0, 0]
+
+        def summary(request):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight[0] -= 1
+            return {'externalId': request.path.split('/')[3]}
+
+        for n in range(40):
+            self.server.add_route('GET', '/v2/network/n%d/summary' % n, summary)
+        summaries = self.run_async(asyncio.gather(*[self.ndex.get_network_summary('n%d' % n) for n in range(40)]))
+        self.assertEqual([s['externalId'] for s in summaries], ['n%d' % n for n in range(40)])
+        self.assertTrue(1 < in_flight[1] <= 4, in_flight[1])
+        self.assertEqual(len(self.server.requests_to('GET', STATUS)), 1)
+
+        # The version detected by the async client is shared with the Ndex clients of the registry.
+        self.assertEqual(nc.Ndex(self.server.url, registry=self.registry).get_network_summary('n1'),
+                         {'externalId': 'n1'})
+        self.assertEqual(len(self.server.requests_to('GET', STATUS)), 1)
+
+    def test_upload(self):
+        self.server.add_route('POST', '/v2/network', StubResponse(NETWORK_URL.encode('ascii'), content_type='text/plain'))
+        self.server.add_route('PUT', '/v2/network/abc', StubResponse(b'', status=204))
+        self.assertEqual(self.run_async(self.ndex.save_new_network(list(CX), visibility='PUBLIC')), NETWORK_URL)
+        request = self.server.requests_to('POST', '/v2/network')[0]
+        self.assertEqual(request.query, {'visibility': ['PUBLIC']})
+        self.assertEqual(_uploaded_cx(request), CX + [{'status': [{'error': '', 'success': True}]}])
+
+        fragments = (dict((name, iter(elements)) for name, elements in fragment.items()) for fragment in CX)
+        self.assertEqual(self.run_async(self.ndex.update_cx_network(fragments, 'abc')), "")
+        self.assertEqual(_uploaded_cx(self.server.requests_to('PUT', '/v2/network/abc')[0]),
+                         CX + [{'status': [{'error': '', 'success': True}]}])
+
+    def test_download(self):
+        data = json.dumps(CX).encode('utf-8')
+        self.server.add_route('GET', '/v2/network/abc',
+                              lambda request: StubResponse(data[i:i + 7] for i in range(0, len(data), 7)))
+        self.assertEqual(self.run_async(self.ndex.get_network_as_cx('abc')), CX)
+
+        async_chunks = []
+        response = self.run_async(self.ndex.get_network_as_cx_stream('abc'))
+        while True:
+            chunk = self.run_async(response.content.readany())
+            if not chunk:
+                break
+            async_chunks.append(chunk)
+        response.release()
+        self.assertEqual(b''.join(async_chunks), data)
+
+    def test_streams_bound_concurrency(self):
+        # A stream holds one of the max_concurrency requests until it is released.
+        self.server.add_route('GET', '/v2/network/abc', StubResponse(json.dumps(CX).encode('utf-8')))
+        self.server.add_route('GET', '/v2/network/abc/summary', {'externalId': 'abc'})
+        streams = [self.run_async(self.ndex.get_network_as_cx_stream('abc')) for _ in range(4)]
+        with self.assertRaises(asyncio.TimeoutError):
+            self.run_async(asyncio.wait_for(self.ndex.get_network_summary('abc'), 0.2))
+        streams[0].release()
+        streams[0].release()
+        self.assertEqual(self.run_async(self.ndex.get_network_summary('abc')), {'externalId': 'abc'})
+
+        async def read(response):
+            async with response:
+                return json.loads((await response.read()).decode('utf-8'))
+        self.assertEqual(self.run_async(read(streams[1])), CX)
+        for response in streams[2:]:
+            response.release()
+        self.assertEqual(self.ndex._semaphore._value, 4)
+
+    def test_search_properties_and_permissions(self):
+        self.server.add_route('POST', '/v2/search/network', lambda request: {'numFound': 0, 'query': request.json()})
+        self.server.add_route('PUT', '/v2/network/abc/properties', StubResponse(b'', status=204))
+        for n in range(3):
+            self.server.add_route('PUT', '/v2/network/n%d/permission' % n, StubResponse(b'', status=204))
+
+        result = self.run_async(self.ndex.search_networks('kinase', 'user', size=10))
+        self.assertEqual(result['query'], {'searchString': 'kinase', 'accountName': 'user'})
+        self.assertEqual(self.server.requests_to('POST', '/v2/search/network')[0].query, {'start': ['0'],
+                                                                                       'size': ['10']})
+        self.run_async(self.ndex.set_network_properties('abc', [{'predicateString': 'p', 'value': 'v'}]))
+        self.assertEqual(self.server.requests_to('PUT', '/v2/network/abc/properties')[0].json(),
+                         [{'predicateString': 'p', 'value': 'v'}])
+        self.run_async(self.ndex.grant_networks_to_user('u1', ['n0', 'n1', 'n2'], 'WRITE'))
+        self.assertEqual(sorted(r.path for r in self.server.requests if 'permission' in r.path),
+                         ['/v2/network/n%d/permission' % n for n in range(3)])
+        self.assertEqual(self.server.requests_to('PUT', '/v2/network/n0/permission')[0].query,
+                         {'userid': ['u1'], 'permission': ['WRITE']})
+
+    def test_http_error(self):
+        self.assertRaises(aiohttp.ClientResponseError, self.run_async, self.ndex.get_network_summary('missing'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+import unittest
+import json
+from os import path
+from ndex.attribute_store import AttributeStore, numpy
+from ndex.networkn import NdexGraph
+
+HERE = path.abspath(path.dirname(__file__))
+
+CX = [{'nodes': [{'@id': 1, 'n': 'A', 'r': 'HGNC:A'}, {'@id': 2, 'n': 'B'}, {'@id': 3, 'n': 'C'}]},
+      {'edges': [{'@id': 10, 's': 1, 't': 2, 'i': 'binds'}, {'@id': 11, 's': 2, 't': 3}]},
+      {'nodeAttributes': [{'po': 1, 'n': 'score', 'v': '1.5', 'd': 'double'},
+                          {'po': 2, 'n': 'score', 'v': 0.25, 'd': 'double'},
+                          {'po': 3, 'n': 'count', 'v': 7, 'd': 'long'},
+                          {'po': 2, 'n': 'type', 'v': 'protein'},
+                          {'po': 1, 'n': 'aliases', 'v': ['a', 'b'], 'd': 'list_of_string'}]},
+      {'edgeAttributes': [{'po': 10, 'n': 'weight', 'v': 2, 'd': 'integer'},
+                          {'po': 11, 'n': 'directed', 'v': True, 'd': 'boolean'}]},
+      {'status': [{'error': '', 'success': True}]}]
+
+
+def _attribute_elements(cx, aspect):
+    elements = []
+    for fragment in cx:
+        elements += fragment.get(aspect, [])
+    return sorted(json.dumps(e, sort_keys=True) for e in elements)
+
+
+class AttributeStoreTests(unittest.TestCase):
+
+    def test_typed_columns(self):
+        store = AttributeStore()
+        store.set(1, 'score', 1.5)
+        store.set(2, 'score', 2.5)
+        store.set(1, 'flag', True)
+        self.assertEqual(store.columns['score'].values.typecode, 'd')
+        self.assertEqual(store.get(1, 'score'), 1.5)
+        self.assertIs(store.get(1, 'flag'), True)
+        self.assertIsNone(store.get(2, 'flag'))
+        # A value of another type turns the column into a list, keeping the values.
+        store.set(3, 'score', 'high')
+        self.assertIsNone(store.columns['score'].data_type)
+        self.assertEqual(sorted(store.items('score'), key=str), [(1, 1.5), (2, 2.5), (3, 'high')])
+        self.assertEqual(sorted(json.dumps(e, sort_keys=True) for e in store.elements()),
+                         sorted(json.dumps(e, sort_keys=True) for e in [
+                             {'po': 1, 'n': 'score', 'v': 1.5, 'd': 'double'},
+                             {'po': 2, 'n': 'score', 'v': 2.5, 'd': 'double'},
+                             {'po': 3, 'n': 'score', 'v': 'high'},
+                             {'po': 1, 'n': 'flag', 'v': True, 'd': 'boolean'}]))
+
+    def test_remove_reuses_rows(self):
+        store = AttributeStore()
+        store.set(1, 'x', 1)
+        store.set(2, 'x', 2)
+        store.remove(1)
+        store.set(3, 'y', 3)
+        self.assertEqual(list(store.items('x')), [(2, 2)])
+        self.assertEqual(list(store.items('y')), [(3, 3)])
+        self.assertEqual(len(store), 2)
+        self.assertNotIn('z', store)
+
+    def test_ids_where(self):
+        store = AttributeStore()
+        for i in range(10):
+            store.set(i, 'score', i / 10.0)
+        store.remove(9)
+        self.assertEqual(sorted(store.ids_where('score', lambda v: v > 0.45 and v < 0.85)), [5, 6, 7, 8])
+        self.assertEqual(store.ids_where('missing', lambda v: True), [])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_ids_where_array(self):
+        store = AttributeStore()
+        for i in range(10):
+            store.set(i, 'score', i / 10.0)
+        store.remove(9)
+        self.assertEqual(sorted(store.ids_where_array('score', lambda v: (v > 0.45) & (v < 0.85))), [5, 6, 7, 8])
+        ids, values = store.to_numpy('score')
+        self.assertEqual(len(ids), 9)
+        self.assertEqual(values.dtype, numpy.float64)
+
+    def test_graph_accessors(self):
+        G = NdexGraph(CX, columnar_attributes=True)
+        self.assertEqual(G.node[1], {'name': 'A', 'represents': 'HGNC:A'})
+        self.assertEqual(G.get_node_attribute_value_by_id(1, 'score'), 1.5)
+        self.assertEqual(G.get_node_attribute_values_by_id_list([1, 2, 3], 'score'), [1.5, 0.25, None])
+        self.assertEqual(G.get_node_name_by_id(2), 'B')
+        self.assertEqual(G.get_node_ids('protein', 'type'), [2])
+        self.assertEqual(sorted(G.get_all_node_attribute_keys()),
+                         ['aliases', 'count', 'name', 'represents', 'score', 'type'])
+        self.assertEqual(G.get_edge_attribute_value_by_id(10, 'weight'), 2)
+        self.assertEqual(G.get_edge_attribute_value_by_id(10, 'interaction'), 'binds')
+        G.set_node_attribute(3, 'score', 4.0)
+        G.set_edge_attribute(11, 'weight', 5)
+        self.assertEqual(G.get_edge_attribute_values_by_id_list([11], 'weight'), [5])
+        self.assertRaises(ValueError, G.get_node_attribute_values_by_id_list, [1], 'missing')
+
+    def test_cx_output_matches(self):
+        plain = NdexGraph(CX)
+        columnar = NdexGraph(CX, columnar_attributes=True)
+        plain_cx, columnar_cx = plain.to_cx(), columnar.to_cx()
+        self.assertEqual(_attribute_elements(columnar_cx, 'nodeAttributes'),
+                         sorted(e.replace('"integer"', '"long"') for e in _attribute_elements(plain_cx, 'nodeAttributes')))
+        self.assertEqual(_attribute_elements(columnar_cx, 'edgeAttributes'),
+                         _attribute_elements(plain_cx, 'edgeAttributes'))
+        self.assertEqual([m for f in columnar_cx for m in f.get('metaData', [])],
+                         [m for f in plain_cx for m in f.get('metaData', [])])
+
+    def test_removal(self):
+        G = NdexGraph(CX, columnar_attributes=True)
+        G.remove_node(3)
+        self.assertEqual(list(G.edge_attribute_store.items('directed')), [])
+        G.remove_edge_by_id(10)
+        self.assertNotIn('weight', G.edge_attribute_store)
+        G.remove_nodes_from([1])
+        self.assertEqual(list(G.node_attribute_store.items('score')), [(2, 0.25)])
+
+    def test_remove_edge_round_trip(self):
+        G = NdexGraph(CX, columnar_attributes=True)
+        added = G.add_edge_between(1, 3)
+        G.set_edge_attribute(added, 'weight', 3)
+        reverse = G.add_edge_between(3, 1)
+        G.set_edge_attribute(reverse, 'weight', 4)
+        G.remove_edge(1, 3, added)
+        G.remove_edges_from([(3, 1)])
+        G.remove_edge(2, 3)
+        self.assertEqual(list(G.edge_attribute_store.items('weight')), [(10, 2)])
+        self.assertEqual(list(G.edge_attribute_store.items('directed')), [])
+        H = NdexGraph(G.to_cx(), columnar_attributes=True)
+        self.assertEqual(sorted(H.edges(keys=True)), [(1, 2, 10)])
+        self.assertEqual(H.get_edge_attribute_value_by_id(10, 'weight'), 2)
+
+    def test_derived_graphs(self):
+        G = NdexGraph(CX, columnar_attributes=True)
+        G.set_node_attribute(2, 'score', 2.5)
+        H = G.subgraph([1, 2])
+        self.assertEqual(H.get_node_attribute_values_by_id_list([1, 2], 'score'), [1.5, 2.5])
+        self.assertEqual(H.get_node_attribute_value_by_id(1, 'aliases'), ['a', 'b'])
+        self.assertNotIn('count', H.node_attribute_store)
+        self.assertEqual(list(H.edge_attribute_store.items('weight')), [(10, 2)])
+        self.assertNotIn('directed', H.edge_attribute_store)
+        self.assertEqual(H.node_attribute_store.columns['score'].values.typecode, 'd')
+        self.assertEqual(_attribute_elements(H.to_cx(), 'edgeAttributes'),
+                         [json.dumps({'po': 10, 'n': 'weight', 'v': 2, 'd': 'integer'}, sort_keys=True)])
+        # The subgraph has stores of its own.
+        H.set_node_attribute(1, 'score', 9.0)
+        self.assertEqual(G.get_node_attribute_value_by_id(1, 'score'), 1.5)
+
+        for H in (G.reverse(), G.copy()):
+            for aspect in ('nodeAttributes', 'edgeAttributes'):
+                self.assertEqual(_attribute_elements(H.to_cx(), aspect), _attribute_elements(G.to_cx(), aspect))
+            self.assertIsNot(H.node_attribute_store, G.node_attribute_store)
+
+    def test_use_attribute_store(self):
+        with open(path.join(HERE, 'tiny_network.cx'), 'r') as f:
+            cx = json.load(f)
+        plain = NdexGraph(cx)
+        G = NdexGraph(cx)
+        G.use_attribute_store()
+        for node_id in G.nodes():
+            for name in plain.node[node_id]:
+                self.assertEqual(G.get_node_attribute_value_by_id(node_id, name), plain.node[node_id][name])
+        self.assertEqual(_attribute_elements(G.to_cx(), 'edgeAttributes'),
+                         _attribute_elements(plain.to_cx(), 'edgeAttributes'))
+
+
+class NodeIndexTests(unittest.TestCase):
+
+    def _graphs(self):
+        # The same graph with and without the index, the indexed one also with an attribute store.
+        plain = NdexGraph(CX)
+        indexed = NdexGraph(CX, columnar_attributes=True)
+        indexed.use_node_index()
+        return plain, indexed
+
+    def assertSameIds(self, plain, indexed, value, key):
+        self.assertEqual(sorted(plain.get_node_ids(value, key)), sorted(indexed.get_node_ids(value, key)))
+
+    def test_queries(self):
+        plain, indexed = self._graphs()
+        for value, key in (('B', 'name'), ('missing', 'name'), (0.25, 'score'), ('protein', 'type'),
+                           (['a', 'b'], 'aliases'), (1, 'nothing')):
+            self.assertSameIds(plain, indexed, value, key)
+        self.assertEqual(indexed.get_edge_ids_by_node_attribute('A', 'B'), [10])
+
+    def test_updates(self):
+        plain, indexed = self._graphs()
+        self.assertEqual(indexed.get_node_ids('B'), [2])
+        indexed.get_node_ids('protein', 'type')
+        for G in (plain, indexed):
+            G.set_node_attribute(2, 'name', 'B2')
+            G.set_node_attribute(3, 'type', 'protein')
+            G.add_new_node('B', {'type': 'rna'})
+            G.add_cx_node(20, name='B', represents='HGNC:B')
+            G.add_node(1, name='B')
+            G.remove_node(3)
+            G.remove_nodes_from([20])
+        for value, key in (('B', 'name'), ('B2', 'name'), ('A', 'name'), ('protein', 'type'), ('rna', 'type')):
+            self.assertSameIds(plain, indexed, value, key)
+
+    def test_edge_ids_by_node_attribute(self):
+        G = NdexGraph()
+        G.use_node_index()
+        sources = [G.add_new_node('S') for _ in range(3)]
+        targets = [G.add_new_node('T') for _ in range(3)]
+        expected = []
+        for s in sources:
+            for t in reversed(targets):
+                if (s + t) % 2:
+                    G.add_edge_between(s, t)
+        for s in sources:
+            for t in targets:
+                expected += G.edge[s].get(t, {}).keys()
+        self.assertEqual(G.get_edge_ids_by_node_attribute('S', 'T'), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,238 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+import ndex.client as nc
+from ndex.test.stub_server import StubNdexServer, StubResponse
+from ndex.test.test_cx_upload import CX, _uploaded_cx
+
+from ndex.networkn import NdexGraph
+
+try:
+    from ndex.bulk import download_networks, publish_networks, PublishJob
+    import ndex.bulk as bulk
+    import concurrent.futures
+except ImportError:
+    download_networks = None
+
+NETWORK_IDS = ['n%d' % n for n in range(6)]
+
+
+def _network(network_id):
+    return [{'networkAttributes': [{'n': 'name', 'v': network_id}]}] + CX
+
+
+@unittest.skipIf(download_networks is None, "concurrent.futures is not available")
+class BulkDownloadTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubNdexServer().start()
+        for network_id in NETWORK_IDS:
+            data = json.dumps(_network(network_id)).encode('utf-8')
+            self.server.add_route('GET', '/v2/network/' + network_id,
+                                  lambda request, data=data: StubResponse(data[i:i + 16]
+                                                                          for i in range(0, len(data), 16)))
+        self.registry = nc.NdexRegistry()
+        self.ndex = nc.Ndex(self.server.url, 'user', 'password', registry=self.registry)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        self.registry.clear()
+        self.server.stop()
+
+    def test_download_to_directory(self):
+        directory = os.path.join(self.directory, 'mirror')
+        results = list(download_networks(self.ndex, NETWORK_IDS + ['missing'], directory=directory, workers=3))
+        self.assertEqual(sorted(r.network_id for r in results), sorted(NETWORK_IDS + ['missing']))
+        for result in results:
+            if result.network_id == 'missing':
+                self.assertIsNone(result.path)
+                self.assertEqual(result.error.response.status_code, 404)
+            else:
+                self.assertIsNone(result.error)
+                self.assertEqual(result.path, os.path.join(directory, result.network_id + '.cx'))
+                with open(result.path, 'rb') as cx_file:
+                    data = cx_file.read()
+                self.assertEqual(json.loads(data.decode('utf-8')), _network(result.network_id))
+                self.assertEqual(result.size, len(data))
+                self.assertGreater(result.seconds, 0)
+        self.assertEqual(sorted(os.listdir(directory)), [n + '.cx' for n in NETWORK_IDS])
+
+    def test_download_graphs(self):
+        for processes in (False, True):
+            results = dict((r.network_id, r) for r in download_networks(self.ndex, NETWORK_IDS, workers=2,
+                                                                         processes=processes))
+            self.assertEqual(sorted(results), NETWORK_IDS)
+            for network_id, result in results.items():
+                self.assertIsNone(result.error)
+                self.assertEqual(result.graph.get_name(), network_id)
+                self.assertEqual((result.graph.number_of_nodes(), result.graph.number_of_edges()), (2, 1))
+        # The worker processes were told the server version instead of detecting it again.
+        self.assertEqual(len(self.server.requests_to('GET', '/rest/admin/status')), 1)
+
+    def test_stop_early(self):
+        results = download_networks(self.ndex, NETWORK_IDS * 20, workers=2)
+        next(results)
+        results.close()
+        self.assertLess(len(self.server.requests), 20 * len(NETWORK_IDS))
+
+
+@unittest.skipIf(download_networks is None, "concurrent.futures is not available")
+class BulkPublishTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubNdexServer().start()
+        self.created = []
+        self.locked = set()
+
+        def create(request):
+            network_id = 'new%d' % len(self.created)
+            self.created.append(network_id)
+            self.locked.add(network_id)
+            self.server.add_route('PUT', '/v2/network/%s/systemproperty' % network_id, self._unlock)
+            self.server.add_route('PUT', '/v2/network/%s/properties' % network_id, StubResponse(b'', status=204))
+            self.server.add_route('PUT', '/v2/network/%s/permission' % network_id, StubResponse(b'', status=204))
+            return StubResponse(('http://127.0.0.1/v2/network/' + network_id).encode('ascii'),
+                                content_type='text/plain')
+
+        self.server.add_route('POST', '/v2/network', create)
+        self.server.add_route('PUT', '/v2/network/old', StubResponse(b'', status=204))
+        for route in ('properties', 'systemproperty', 'permission'):
+            self.server.add_route('PUT', '/v2/network/old/' + route, StubResponse(b'', status=204))
+        self.registry = nc.NdexRegistry()
+        self.ndex = nc.Ndex(self.server.url, 'user', 'password', registry=self.registry,
+                            retry_policy=nc.RetryPolicy(backoff=0.01))
+
+    def _unlock(self, request):
+        # The first request on a new network finds it still locked by the server.
+        network_id = request.path.split('/')[3]
+        if network_id in self.locked:
+            self.locked.discard(network_id)
+            return StubResponse({'errorCode': 'NDEx_Concurrent_Modification_Exception', 'message': 'locked'},
+                                status=400)
+        return StubResponse(b'', status=204)
+
+    def tearDown(self):
+        self.registry.clear()
+        self.server.stop()
+
+    def test_publish(self):
+        graph = NdexGraph(CX)
+        graph.set_name('graph')
+        networks = [graph, list(CX), json.dumps(CX + [{'status': []}]).encode('utf-8'),
+                    PublishJob(list(CX), network_id='old', properties=[])]
+        for processes in (None, 1):
+            del self.created[:]
+            del self.server.requests[:]
+            results = list(publish_networks(self.ndex, networks, workers=2, processes=processes,
+                                            visibility='PUBLIC', properties=[{'predicateString': 'p', 'value': 'v'}],
+                                            group_permissions={'g1': 'READ'}))
+            self.assertEqual([r.error for r in results], [None] * 4)
+            self.assertEqual(sorted(r.network_id for r in results), sorted(self.created + ['old']))
+
+            uploads = [_uploaded_cx(r) for r in self.server.requests if r.method in ('POST', 'PUT')
+                       and r.headers['Content-Type'].startswith('multipart')]
+            self.assertEqual(len(uploads), 4)
+            for cx in uploads:
+                self.assertIn(cx[-1], ({'status': [{'error': '', 'success': True}]}, {'status': []}))
+            self.assertTrue(any({'networkAttributes': [{'n': 'name', 'v': 'graph'}]} in cx for cx in uploads))
+
+            for network_id in self.created:
+                self.assertEqual([r.json() for r in self.server.requests_to('PUT', '/v2/network/%s/systemproperty'
+                                                                            % network_id)],
+                                 [{'visibility': 'PUBLIC'}] * 2)
+                self.assertEqual(self.server.requests_to('PUT', '/v2/network/%s/permission' % network_id)[0].query,
+                                 {'groupid': ['g1'], 'permission': ['READ']})
+            # Settings of a job override those given to publish_networks.
+            self.assertEqual(self.server.requests_to('PUT', '/v2/network/old/properties')[0].json(), [])
+
+    def test_upload_retry(self):
+        # A network encoded as it is uploaded is encoded again for the retry.
+        create = self.server.routes[('POST', '/v2/network')]
+        responses = [StubResponse({}, status=503)]
+        self.server.add_route('POST', '/v2/network', lambda request: responses.pop() if responses else create(request))
+        graph = NdexGraph(CX)
+        results = list(publish_networks(self.ndex, [graph]))
+        self.assertEqual((results[0].network_id, results[0].error), ('new0', None))
+        uploads = self.server.requests_to('POST', '/v2/network')
+        self.assertEqual(len(uploads), 2)
+        self.assertEqual(_uploaded_cx(uploads[0]), _uploaded_cx(uploads[1]))
+
+        # The client's retry policy is the only one: a failing upload is sent retries + 1 times.
+        self.server.add_route('POST', '/v2/network', StubResponse({}, status=503))
+        del self.server.requests[:]
+        results = list(publish_networks(self.ndex, [list(CX)]))
+        self.assertEqual(results[0].error.response.status_code, 503)
+        uploads = self.server.requests_to('POST', '/v2/network')
+        self.assertEqual(len(uploads), self.ndex.retry_policy.retries + 1)
+        self.assertEqual(len(set(json.dumps(_uploaded_cx(upload)) for upload in uploads)), 1)
+
+    def test_errors(self):
+        self.server.add_route('PUT', '/v2/network/gone', StubResponse({'errorCode': 'NDEx_Object_Not_Found'},
+                                                                      status=404))
+        self.ndex.retry_policy = None
+        results = list(publish_networks(self.ndex, [PublishJob(list(CX), network_id='gone'), list(CX)],
+                                        visibility='PRIVATE'))
+        errors = dict((r.network_id, r.error) for r in results)
+        self.assertEqual(errors['gone'].response.status_code, 404)
+        # Without retries, the lock on the new network is not waited out.
+        self.assertEqual(errors['new0'].response.json()['errorCode'], 'NDEx_Concurrent_Modification_Exception')
+
+
+@unittest.skipIf(download_networks is None, "concurrent.futures is not available")
+class BulkUpdateTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubNdexServer().start()
+        for network_id in NETWORK_IDS:
+            for route in ('permission', 'systemproperty', 'properties'):
+                self.server.add_route('PUT', '/v2/network/%s/%s' % (network_id, route), StubResponse(b'', status=204))
+        self.registry = nc.NdexRegistry()
+        self.ndex = nc.Ndex(self.server.url, 'user', 'password', registry=self.registry, retry_policy=None)
+
+    def tearDown(self):
+        self.registry.clear()
+        self.server.stop()
+
+    def requests(self, route):
+        return dict((r.path.split('/')[3], r) for r in self.server.requests if r.path.endswith(route))
+
+    def test_grants(self):
+        outcome = bulk.grant_networks_to_group(self.ndex, 'g1', NETWORK_IDS + ['missing'], 'WRITE', workers=3)
+        self.assertEqual(sorted(outcome.results), NETWORK_IDS)
+        self.assertEqual(list(outcome.errors), ['missing'])
+        self.assertEqual(outcome.errors['missing'].response.status_code, 404)
+        self.assertFalse(outcome.ok)
+        self.assertEqual(sorted(self.requests('/permission')), sorted(NETWORK_IDS + ['missing']))
+        self.assertEqual(self.requests('/permission')['n0'].query, {'groupid': ['g1'], 'permission': ['WRITE']})
+
+        del self.server.requests[:]
+        self.assertTrue(bulk.grant_networks_to_user(self.ndex, 'u1', NETWORK_IDS).ok)
+        self.assertEqual(self.requests('/permission')['n5'].query, {'userid': ['u1'], 'permission': ['READ']})
+
+    def test_properties(self):
+        for function, args, route, body in (
+                (bulk.make_networks_public, (), '/systemproperty', {'visibility': 'PUBLIC'}),
+                (bulk.make_networks_private, (), '/systemproperty', {'visibility': 'PRIVATE'}),
+                (bulk.set_networks_read_only, (True,), '/systemproperty', {'readOnly': True}),
+                (bulk.set_networks_system_properties, ({'index_level': 'ALL'},), '/systemproperty',
+                 {'index_level': 'ALL'}),
+                (bulk.set_networks_properties, ([{'predicateString': 'p', 'value': 'v'}],), '/properties',
+                 [{'predicateString': 'p', 'value': 'v'}])):
+            del self.server.requests[:]
+            outcome = function(self.ndex, NETWORK_IDS, *args)
+            self.assertEqual((sorted(outcome.results), outcome.errors), (NETWORK_IDS, {}))
+            sent = self.requests(route)
+            self.assertEqual(sorted(sent), NETWORK_IDS)
+            self.assertEqual([sent[n].json() for n in NETWORK_IDS], [body] * len(NETWORK_IDS))
+
+    def test_rate(self):
+        outcome = bulk.for_each_network(range(11), lambda n: n * n, workers=4, rate=100)
+        self.assertEqual(outcome.results, dict((n, n * n) for n in range(11)))
+        self.assertGreaterEqual(outcome.seconds, 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
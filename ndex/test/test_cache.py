@@ -0,0 +1,281 @@
+import unittest
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import ndex.client as nc
+from ndex.cache import ResponseCache, NetworkCache
+from ndex.networkn import NdexGraph
+import ndex.snapshot as snapshot
+from ndex.test.stub_server import StubNdexServer, StubResponse, file_chunks
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SUMMARY = '/v2/network/uuid-1/summary'
+ASPECT = '/v2/network/uuid-1/aspect/nodes'
+
+
+class ResponseCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubNdexServer().start()
+        self.modification_time = 1000
+        self.server.add_route('GET', SUMMARY, lambda request: {'externalId': 'uuid-1', 'name': 'network',
+                                                               'modificationTime': self.modification_time})
+        self.server.add_route('GET', ASPECT,
+                              lambda request: StubResponse(iter([b'[{"nodes": ', b'[{"@id": 1}]}]'])))
+        self.directory = tempfile.mkdtemp()
+        self.registry = nc.NdexRegistry()
+        self.cache = ResponseCache(ttl=60)
+        self.ndex = self.client(self.cache)
+
+    def tearDown(self):
+        self.registry.clear()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def client(self, cache):
+        return nc.Ndex(self.server.url, 'user', 'password', registry=self.registry, retry_policy=None, cache=cache)
+
+    def expire(self, cache):
+        for entry in cache._entries.values():
+            entry.expires = 0
+
+    def counts(self, cache):
+        stats = cache.stats()
+        return stats['hits'], stats['revalidated'], stats['misses']
+
+    def test_hits(self):
+        for _ in range(3):
+            self.assertEqual(self.ndex.get_network_summary('uuid-1')['name'], 'network')
+        self.assertEqual(len(self.server.requests_to('GET', SUMMARY)), 1)
+        self.assertEqual(self.counts(self.cache), (2, 0, 1))
+        self.assertAlmostEqual(self.cache.stats()['hit_rate'], 2 / 3.0)
+
+        # Responses are kept per account.
+        self.client(self.cache).get_network_summary('uuid-1')
+        nc.Ndex(self.server.url, 'other', 'password', registry=self.registry, cache=self.cache) \
+            .get_network_summary('uuid-1')
+        self.assertEqual(len(self.server.requests_to('GET', SUMMARY)), 2)
+
+    def test_stream(self):
+        for _ in range(2):
+            response = self.ndex.get_network_aspect_as_cx_stream('uuid-1', 'nodes')
+            self.assertEqual(b''.join(response.iter_content(4)), b'[{"nodes": [{"@id": 1}]}]')
+            self.assertEqual(response.json(), [{'nodes': [{'@id': 1}]}])
+        self.assertEqual(len(self.server.requests_to('GET', ASPECT)), 1)
+
+    def test_conditional_requests(self):
+        def user(request):
+            if request.headers.get('If-None-Match') == '"v1"':
+                return StubResponse(status=304, headers={'ETag': '"v1"'})
+            return StubResponse({'userName': 'user'}, headers={'ETag': '"v1"'})
+        self.server.add_route('GET', '/v2/user', user)
+        self.assertEqual(self.ndex.get_user_by_username('user'), {'userName': 'user'})
+        self.expire(self.cache)
+        self.assertEqual(self.ndex.get_user_by_username('user'), {'userName': 'user'})
+        requests = self.server.requests_to('GET', '/v2/user')
+        self.assertEqual([request.headers.get('If-None-Match') for request in requests], [None, '"v1"'])
+        self.assertEqual(self.counts(self.cache), (0, 1, 1))
+
+    def test_modification_time(self):
+        self.ndex.get_network_summary('uuid-1')
+        self.ndex.get_network_aspect_as_cx_stream('uuid-1', 'nodes')
+        self.expire(self.cache)
+        self.ndex.get_network_aspect_as_cx_stream('uuid-1', 'nodes')
+        self.assertEqual(len(self.server.requests_to('GET', ASPECT)), 1)
+        self.assertEqual(len(self.server.requests_to('GET', SUMMARY)), 2)
+
+        self.modification_time = 2000
+        self.expire(self.cache)
+        self.ndex.get_network_aspect_as_cx_stream('uuid-1', 'nodes')
+        self.assertEqual(len(self.server.requests_to('GET', ASPECT)), 2)
+
+    def test_invalidation(self):
+        self.server.add_route('PUT', '/v2/network/uuid-1/systemproperty', StubResponse(status=204))
+        self.server.add_route('GET', '/v2/network/uuid-2/summary', {'externalId': 'uuid-2'})
+        self.ndex.get_network_summary('uuid-1')
+        self.ndex.get_network_summary('uuid-2')
+        self.ndex.make_network_public('uuid-1')
+        self.ndex.get_network_summary('uuid-1')
+        self.ndex.get_network_summary('uuid-2')
+        self.assertEqual(len(self.server.requests_to('GET', SUMMARY)), 2)
+        self.assertEqual(len(self.server.requests_to('GET', '/v2/network/uuid-2/summary')), 1)
+
+        # Queries leave the responses of the network in place.
+        self.server.add_route('POST', '/v2/search/network/uuid-1/query', {'data': []})
+        self.server.add_route('POST', '/v2/search/network/uuid-1/nodes', [])
+        self.ndex.get_neighborhood('uuid-1', 'A')
+        self.ndex.search_network_nodes('uuid-1', 'A')
+        self.ndex.get_network_summary('uuid-1')
+        self.assertEqual(len(self.server.requests_to('GET', SUMMARY)), 2)
+
+    def test_eviction(self):
+        cache = ResponseCache(max_entries=2)
+        client = self.client(cache)
+        for n in range(3):
+            self.server.add_route('GET', '/v2/network/uuid-%d/provenance' % n, {'n': n})
+            client.get_provenance('uuid-%d' % n)
+        client.get_provenance('uuid-0')
+        self.assertEqual(len(self.server.requests_to('GET', '/v2/network/uuid-0/provenance')), 2)
+        self.assertEqual(cache.stats()['entries'], 2)
+
+        cache = ResponseCache(max_bytes=30)
+        client = self.client(cache)
+        client.get_network_aspect_as_cx_stream('uuid-1', 'nodes')
+        client.get_network_summary('uuid-1')
+        self.assertEqual(cache.stats()['entries'], 1)
+
+    def test_large_response(self):
+        body = b'[{"nodes": [' + b', '.join(b'{"@id": %d}' % i for i in range(100)) + b']}]'
+        self.server.add_route('GET', ASPECT, StubResponse(body, headers={'Content-Length': str(len(body))}))
+        cache = ResponseCache(max_bytes=len(body) - 1, directory=self.directory)
+        client = self.client(cache)
+        for _ in range(2):
+            response = client.get_network_aspect_as_cx_stream('uuid-1', 'nodes')
+            # Too large to keep, the body is left to the caller to stream.
+            self.assertFalse(response._content_consumed)
+            self.assertEqual(b''.join(response.iter_content(1024)), body)
+        self.assertEqual(self.counts(cache), (0, 0, 2))
+        self.assertEqual((cache.stats()['entries'], os.listdir(self.directory)), (0, []))
+
+    def test_large_chunked_response(self):
+        body = b'[{"nodes": [' + b', '.join(b'{"@id": %d}' % i for i in range(100)) + b']}]'
+        self.server.add_route('GET', ASPECT, lambda request: StubResponse(iter([body[i:i + 100]
+                                                                                for i in range(0, len(body), 100)])))
+        cache = ResponseCache(max_bytes=len(body) // 2, directory=self.directory)
+        client = self.client(cache)
+        response = client.get_network_aspect_as_cx_stream('uuid-1', 'nodes')
+        # The chunks read before the body was found too large to keep come first.
+        self.assertEqual(b''.join(response.iter_content(7)), body)
+        self.assertEqual(len(client.get_network_aspect_as_cx_stream('uuid-1', 'nodes').json()[0]['nodes']), 100)
+        self.assertEqual(self.counts(cache), (0, 0, 2))
+        self.assertEqual((cache.stats()['entries'], os.listdir(self.directory)), (0, []))
+
+        cache.max_bytes = len(body)
+        client.get_network_aspect_as_cx_stream('uuid-1', 'nodes')
+        self.assertEqual(client.get_network_aspect_as_cx_stream('uuid-1', 'nodes').content, body)
+        self.assertEqual(self.counts(cache), (1, 0, 3))
+
+    def test_disk(self):
+        self.client(ResponseCache(directory=self.directory)).get_network_summary('uuid-1')
+        cache = ResponseCache(directory=self.directory)
+        self.assertEqual(self.client(cache).get_network_summary('uuid-1')['name'], 'network')
+        self.assertEqual(len(self.server.requests_to('GET', SUMMARY)), 1)
+        self.assertEqual(self.counts(cache), (1, 0, 0))
+
+        cache.invalidate('uuid-1')
+        self.assertEqual(os.listdir(self.directory), [])
+
+        cache = ResponseCache(directory=self.directory, max_disk_bytes=1000)
+        client = self.client(cache)
+        for n in range(20):
+            self.server.add_route('GET', '/v2/network/uuid-%d/sample' % n, {'sample': 'x' * 100})
+            client.get_sample_network('uuid-%d' % n)
+        self.assertLessEqual(sum(os.path.getsize(os.path.join(self.directory, name))
+                                 for name in os.listdir(self.directory)), 1000)
+
+    def test_disk_format(self):
+        self.client(ResponseCache(directory=self.directory)).get_network_aspect_as_cx_stream('uuid-1', 'nodes')
+        name, = os.listdir(self.directory)
+        path = os.path.join(self.directory, name)
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline().decode('utf-8'))
+            self.assertEqual(f.read(), b'[{"nodes": [{"@id": 1}]}]')
+        self.assertEqual((header['status'], header['network_id']), (200, 'uuid-1'))
+
+        # A file that is not a cached response, such as a pickle, is a miss and is never unpickled.
+        with open(path, 'wb') as f:
+            pickle.dump(Exception('unpickled'), f)
+        cache = ResponseCache(directory=self.directory)
+        self.assertEqual(self.client(cache).get_network_aspect_as_cx_stream('uuid-1', 'nodes').json(),
+                         [{'nodes': [{'@id': 1}]}])
+        self.assertEqual(self.counts(cache), (0, 0, 1))
+
+
+@unittest.skipIf(snapshot.msgpack is None, "msgpack is not available")
+class NetworkCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubNdexServer().start()
+        self.modification_time = 1000
+        cx_file = os.path.join(HERE, 'The_RAS_Machine.cx')
+        for network_id in ('ras', 'ras-2'):
+            self.server.add_route('GET', '/v2/network/%s/summary' % network_id,
+                                  lambda request: {'externalId': 'ras', 'modificationTime': self.modification_time})
+            self.server.add_route('GET', '/v2/network/' + network_id,
+                                  lambda request: StubResponse(file_chunks(cx_file)))
+        self.directory = tempfile.mkdtemp()
+        self.cache = NetworkCache(self.directory)
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def downloads(self, network_id='ras'):
+        return len(self.server.requests_to('GET', '/v2/network/' + network_id))
+
+    def assertSameGraph(self, G, expected):
+        self.assertEqual(sorted(G.nodes(data=True)), sorted(expected.nodes(data=True)))
+        self.assertEqual(sorted(G.edges(keys=True, data=True)), sorted(expected.edges(keys=True, data=True)))
+        self.assertEqual(G.graph, expected.graph)
+        self.assertEqual(G.citation_map, expected.citation_map)
+        self.assertEqual(G.unclassified_cx, expected.unclassified_cx)
+        self.assertEqual(G.max_node_id, expected.max_node_id)
+
+    def test_load(self):
+        expected = NdexGraph(server=self.server.url, uuid='ras', cache=self.cache)
+        G = NdexGraph(server=self.server.url, uuid='ras', cache=NetworkCache(self.directory))
+        self.assertSameGraph(G, expected)
+        self.assertEqual(self.downloads(), 1)
+        self.assertEqual(len(self.server.requests_to('GET', '/v2/network/ras/summary')), 2)
+        # The loaded graph is a graph of its own.
+        G.add_node(10 ** 6, name='new')
+        self.assertNotIn(10 ** 6, NdexGraph(server=self.server.url, uuid='ras', cache=self.cache).node)
+
+        self.modification_time = 2000
+        NdexGraph(server=self.server.url, uuid='ras', cache=self.cache)
+        NdexGraph(server=self.server.url, uuid='ras', cache=self.cache)
+        self.assertEqual(self.downloads(), 2)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (2, 2, 1))
+        self.assertEqual(self.cache.report()[:38], "2 hits, 2 misses (50% hit rate), 1 net")
+
+    def test_foreign_file(self):
+        NdexGraph(server=self.server.url, uuid='ras', cache=self.cache)
+        name, = os.listdir(self.directory)
+        with open(os.path.join(self.directory, name), 'wb') as f:
+            pickle.dump(NdexGraph(), f)
+        self.assertGreater(NdexGraph(server=self.server.url, uuid='ras', cache=self.cache).number_of_nodes(), 0)
+        self.assertEqual(self.downloads(), 2)
+
+    def test_columnar_attributes(self):
+        NdexGraph(server=self.server.url, uuid='ras', cache=self.cache)
+        G = NdexGraph(server=self.server.url, uuid='ras', cache=self.cache, columnar_attributes=True)
+        self.assertIsNotNone(G.node_attribute_store)
+        G = NdexGraph(server=self.server.url, uuid='ras', cache=self.cache, columnar_attributes=True)
+        self.assertIsNotNone(G.node_attribute_store)
+        self.assertIsNone(NdexGraph(server=self.server.url, uuid='ras', cache=self.cache).node_attribute_store)
+        self.assertEqual(self.downloads(), 2)
+
+    def test_eviction(self):
+        NdexGraph(server=self.server.url, uuid='ras', cache=self.cache)
+        size = self.cache.stats()['bytes']
+        cache = NetworkCache(self.directory, max_bytes=size * 3 // 2)
+        NdexGraph(server=self.server.url, uuid='ras-2', cache=cache)
+        self.assertEqual(cache.stats()['entries'], 1)
+        NdexGraph(server=self.server.url, uuid='ras-2', cache=cache)
+        NdexGraph(server=self.server.url, uuid='ras', cache=cache)
+        self.assertEqual((self.downloads('ras'), self.downloads('ras-2')), (2, 1))
+
+        cache = NetworkCache(self.directory, max_bytes=size // 2)
+        cache.clear()
+        NdexGraph(server=self.server.url, uuid='ras', cache=cache)
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
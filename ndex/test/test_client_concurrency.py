@@ -0,0 +1,71 @@
+import unittest
+import json
+import ndex.client as nc
+from ndex.test.stub_server import StubNdexServer, StubResponse
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
+THREADS = 16
+CALLS = 400
+
+
+def _echo(request):
+    # Answer with what the request looked like.
+    return {'method': request.method, 'path': request.path, 'contentType': request.headers.get('Content-Type'),
+            'accept': request.headers.get('Accept'), 'body': request.body.decode('utf-8')}
+
+
+@unittest.skipIf(ThreadPoolExecutor is None, "concurrent.futures is not available")
+class ClientConcurrencyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubNdexServer().start()
+        for n in range(10):
+            for method in ('GET', 'PUT', 'POST', 'DELETE'):
+                self.server.add_route(method, '/v2/item/%d' % n, _echo)
+        self.registry = nc.NdexRegistry()
+        self.ndex = nc.Ndex(self.server.url, 'user', 'password', registry=self.registry, pool_maxsize=THREADS,
+                            pool_block=True)
+
+    def tearDown(self):
+        self.registry.clear()
+        self.server.stop()
+
+    def _call(self, i):
+        route = '/item/%d' % (i % 10)
+        kind = i % 5
+        if kind == 0:
+            return route, 'GET', self.ndex.get(route)
+        if kind == 1:
+            return route, 'PUT', self.ndex.put(route, json.dumps({'call': i}))
+        if kind == 2:
+            return route, 'POST', self.ndex.post_stream(route, json.dumps({'call': i})).json()
+        if kind == 3:
+            return route, 'DELETE', self.ndex.delete(route)
+        return route, 'GET', json.loads(self.ndex.get_stream(route).content.decode('utf-8'))
+
+    def test_shared_client(self):
+        session_headers = dict(self.ndex.s.headers)
+        with ThreadPoolExecutor(THREADS) as executor:
+            results = list(executor.map(self._call, range(CALLS)))
+
+        for route, method, echoed in results:
+            self.assertEqual((echoed['path'], echoed['method']), ('/v2' + route, method))
+            if method in ('GET', 'DELETE'):
+                self.assertIsNone(echoed['contentType'])
+            else:
+                self.assertTrue(echoed['contentType'].startswith('application/json'))
+                self.assertEqual(echoed['accept'], 'application/json')
+        self.assertEqual(sorted(json.loads(echoed['body'])['call'] for _, method, echoed in results
+                                if method in ('PUT', 'POST')),
+                         [i for i in range(CALLS) if i % 5 in (1, 2)])
+        self.assertEqual(dict(self.ndex.s.headers), session_headers)
+        self.assertEqual(len(self.server.requests), CALLS + 1)
+        self.assertLessEqual(len(self.server.connections), THREADS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import ndex.client as nc
+from ndex.test.stub_server import StubNdexServer, StubResponse
+
+STATUS = '/rest/admin/status'
+
+
+class ClientRegistryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubNdexServer().start()
+        self.server.add_route('GET', '/v2/admin/status', {'networkCount': 3})
+        self.registry = nc.NdexRegistry()
+
+    def tearDown(self):
+        self.registry.clear()
+        self.server.stop()
+
+    def test_lazy_version_detection(self):
+        clients = [nc.Ndex(self.server.url, 'user', 'password', registry=self.registry) for _ in range(3)]
+        self.assertEqual(self.server.requests_to('GET', STATUS), [])
+        for client in clients:
+            client.update_status()
+            self.assertEqual((client.version, client.host), ('2.0', self.server.url + '/v2'))
+            self.assertEqual(client.status, {'networkCount': 3})
+        self.assertEqual(len(self.server.requests_to('GET', STATUS)), 1)
+
+    def test_shared_sessions(self):
+        a = nc.Ndex(self.server.url, 'user', 'password', registry=self.registry)
+        b = nc.Ndex(self.server.url, 'user', 'password', registry=self.registry)
+        c = nc.Ndex(self.server.url, 'other', 'password', registry=self.registry)
+        d = nc.Ndex(self.server.url, registry=self.registry)
+        self.assertIs(a.s, b.s)
+        self.assertIsNot(a.s, c.s)
+        self.assertEqual((a.s.auth, c.s.auth, d.s.auth), (('user', 'password'), ('other', 'password'), None))
+        self.assertIsNot(nc.Ndex(self.server.url, 'user', 'password', registry=nc.NdexRegistry()).s, a.s)
+
+    def test_unsupported_server(self):
+        self.server.add_route('GET', STATUS, {'properties': {'ServerVersion': '3.0'}})
+        client = nc.Ndex(self.server.url, registry=self.registry)
+        self.assertRaises(Exception, client.update_status)
+        self.assertRaises(Exception, client.update_status)
+        self.assertEqual(len(self.server.requests_to('GET', STATUS)), 2)
+
+    def test_status_error_is_not_kept(self):
+        registry = nc.NdexRegistry(fallback_ttl=0.0)
+        self.server.add_route('GET', STATUS, StubResponse({'errorCode': 'busy'}, status=500))
+        client = nc.Ndex(self.server.url, registry=registry)
+        self.assertEqual((client.version, client.host), ('1.3', self.server.url + '/rest'))
+        self.server.add_route('GET', STATUS, {'properties': {'ServerVersion': '2.0'}})
+        for ndex in (client, nc.Ndex(self.server.url, registry=registry)):
+            self.assertEqual((ndex.version, ndex.host), ('2.0', self.server.url + '/v2'))
+        # version and host each asked the server while it failed.
+        self.assertEqual(len(self.server.requests_to('GET', STATUS)), 3)
+
+        # Until it expires, the guess spares the server further status requests.
+        self.server.add_route('GET', STATUS, StubResponse({'errorCode': 'busy'}, status=500))
+        registry.clear()
+        registry.fallback_ttl = 60.0
+        for ndex in (client, nc.Ndex(self.server.url, registry=registry)):
+            ndex.version
+        self.assertEqual(len(self.server.requests_to('GET', STATUS)), 4)
+
+    def test_explicit_host(self):
+        client = nc.Ndex(self.server.url, registry=self.registry)
+        client.host = self.server.url + '/v2'
+        client.update_status()
+        self.assertEqual(self.server.requests_to('GET', STATUS), [])
+
+    def test_connection_pool(self):
+        self.server.add_route('POST', '/v2/network', b'http://127.0.0.1/v2/network/abc')
+        client = nc.Ndex(self.server.url, 'user', 'password', registry=self.registry, pool_maxsize=4, pool_block=True)
+        adapter = client.s.get_adapter(self.server.url)
+        self.assertEqual((adapter._pool_maxsize, adapter._pool_block), (4, True))
+        self.assertIsNot(nc.Ndex(self.server.url, 'user', 'password', registry=self.registry).s, client.s)
+        for _ in range(5):
+            client.update_status()
+            client.save_new_network([{'nodes': [{'@id': 1}]}])
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_no_keep_alive(self):
+        client = nc.Ndex(self.server.url, registry=self.registry, keep_alive=False)
+        for _ in range(3):
+            client.update_status()
+        self.assertEqual(self.server.requests_to('GET', '/v2/admin/status')[0].headers.get('Connection'), 'close')
+        self.assertEqual(len(self.server.connections), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import copy
+from ndex.networkn import NdexGraph
+
+
+def _cx(order):
+    aspects = {
+        'nodes': {'nodes': [{'@id': 1, 'n': 'A', 'r': 'HGNC:A'}, {'@id': 2, 'n': 'B'}]},
+        'edges': {'edges': [{'@id': 10, 's': 1, 't': 2, 'i': 'binds'}]},
+        'nodeAttributes': {'nodeAttributes': [{'po': 1, 'n': 'score', 'v': '1.5', 'd': 'double'},
+                                              {'po': 2, 'n': 'type', 'v': 'protein'}]},
+        'edgeAttributes': {'edgeAttributes': [{'po': 10, 'n': 'weight', 'v': 2, 'd': 'integer'},
+                                              {'po': 10, 'n': 'interaction', 'v': 'ignored'}]},
+        'citations': {'citations': [{'@id': 5, 'dc:identifier': 'pmid:1'}, {'@id': 6, 'dc:identifier': 'pmid:2'}]},
+        'nodeCitations': {'nodeCitations': [{'po': [1, 2], 'citations': [5]}]},
+        'edgeCitations': {'edgeCitations': [{'po': [10], 'citations': [6]}]},
+        'supports': {'supports': [{'@id': 7, 'citation': 5, 'text': 'evidence'}]},
+        'edgeSupports': {'edgeSupports': [{'po': [10], 'supports': [7]}]},
+        'cartesianLayout': {'cartesianLayout': [{'node': 1, 'x': 1.0, 'y': 2.0}]},
+        'cyVisualProperties': {'cyVisualProperties': [{'properties_of': 'network', 'view': 3}]},
+    }
+    return [{'numberVerification': [{'longNumber': 281474976710655}]}] + \
+           [copy.deepcopy(aspects[name]) for name in order] + \
+           [{'status': [{'error': '', 'success': True}]}]
+
+
+CANONICAL_ORDER = ['nodes', 'edges', 'nodeAttributes', 'edgeAttributes', 'cartesianLayout', 'citations',
+                   'supports', 'nodeCitations', 'edgeCitations', 'edgeSupports', 'cyVisualProperties']
+
+
+class CXLoaderTests(unittest.TestCase):
+
+    def assertSameGraph(self, expected, actual):
+        self.assertEqual(sorted(expected.nodes(data=True)), sorted(actual.nodes(data=True)))
+        self.assertEqual(sorted(expected.edges(keys=True, data=True)), sorted(actual.edges(keys=True, data=True)))
+        self.assertEqual(expected.edgemap, actual.edgemap)
+        self.assertEqual(expected.pos, actual.pos)
+        self.assertEqual(expected.citation_map, actual.citation_map)
+        self.assertEqual(expected.citation_reference_map, actual.citation_reference_map)
+        self.assertEqual(expected.node_citation_map, actual.node_citation_map)
+        self.assertEqual(expected.support_reference_map, actual.support_reference_map)
+        self.assertEqual(expected.edge_support_map, actual.edge_support_map)
+        self.assertEqual(expected.unclassified_cx, actual.unclassified_cx)
+
+    def test_canonical_order(self):
+        G = NdexGraph(_cx(CANONICAL_ORDER))
+        self.assertEqual(G.node[1], {'name': 'A', 'represents': 'HGNC:A', 'score': 1.5})
+        self.assertEqual(G[1][2][10], {'interaction': 'binds', 'weight': 2, 'ndex:citation': ['pmid:2']})
+        self.assertEqual(G.citation_reference_map, {5: 2, 6: 1})
+        self.assertEqual(G.support_reference_map, {7: 1})
+        self.assertEqual(G.pos, {1: [1.0, 2.0]})
+        self.assertEqual(G.unclassified_cx, [{'cyVisualProperties': [{'properties_of': 'network'}]}])
+
+    def test_forward_references(self):
+        expected = NdexGraph(_cx(CANONICAL_ORDER))
+        self.assertSameGraph(expected, NdexGraph(_cx(list(reversed(CANONICAL_ORDER)))))
+        self.assertSameGraph(expected, NdexGraph(_cx(['edgeAttributes', 'edgeCitations', 'nodeCitations',
+                                                      'edgeSupports', 'supports', 'citations', 'edges',
+                                                      'nodeAttributes', 'nodes', 'cartesianLayout',
+                                                      'cyVisualProperties'])))
+
+    def test_iterable_input(self):
+        expected = NdexGraph(_cx(CANONICAL_ORDER))
+        self.assertSameGraph(expected, NdexGraph(iter(_cx(CANONICAL_ORDER))))
+
+    def test_error_status(self):
+        cx = _cx(CANONICAL_ORDER)
+        cx[-1] = {'status': [{'error': 'truncated', 'success': False}]}
+        with self.assertRaises(RuntimeError):
+            NdexGraph(cx)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+import unittest
+import json
+import os
+import tempfile
+from os import path
+from ndex.cx_stream import read_cx_fragments, write_cx_chunks, CXByteStream
+from ndex.networkn import NdexGraph
+from ndex.test.stub_server import StubNdexServer, StubResponse, file_chunks
+
+HERE = path.abspath(path.dirname(__file__))
+
+
+def _chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def _merge(fragments):
+    # Re-join consecutive fragments of the same aspect.
+    merged = []
+    for fragment in fragments:
+        name = next(iter(fragment))
+        if merged and name in merged[-1] and isinstance(fragment[name], list):
+            merged[-1][name].extend(fragment[name])
+        else:
+            merged.append(fragment)
+    return merged
+
+
+class CXStreamTests(unittest.TestCase):
+
+    def test_byte_chunk_boundaries(self):
+        cx = [{'numberVerification': [{'longNumber': 281474976710655}]},
+              {'nodes': [{'@id': 1, 'n': u'β-catenin'}, {'@id': 22, 'n': 'A'}]},
+              {'networkAttributes': [{'n': 'score', 'v': -1.25e-3, 'd': 'double'}, {'n': 'ok', 'v': True}]},
+              {'edges': []},
+              {'metaData': [{'name': 'nodes', 'elementCount': 2, 'idCounter': 1234567}]},
+              {'status': [{'error': '', 'success': True}]}]
+        data = json.dumps(cx, indent=2, ensure_ascii=False).encode('utf-8')
+        for size in (1, 2, 3, 7, 64, len(data)):
+            self.assertEqual(_merge(read_cx_fragments(_chunked(data, size))), cx)
+
+    def test_batches(self):
+        cx = [{'nodes': [{'@id': i} for i in range(10)]}, {'metaData': [{'name': 'n%d' % i} for i in range(10)]}]
+        fragments = list(read_cx_fragments([json.dumps(cx)], batch_size=4))
+        self.assertEqual([len(f.get('nodes', [])) for f in fragments[:3]], [4, 4, 2])
+        # aspects that are not element-wise are never split
+        self.assertEqual(fragments[3], cx[1])
+
+    def test_long_values(self):
+        # Values that span many chunks, with brackets, quotes and backslashes inside strings.
+        properties = {'properties_of': 'nodes:default',
+                      'properties': dict(('NODE_%d' % i, u'{"x": [%d]} \\ \" ]} β' % i) for i in range(50))}
+        cx = [{'cyVisualProperties': [properties, {'dependencies': {'nodeSizeLocked': 'false'}}]},
+              {'nodes': [{'@id': 1, 'n': u'\\' * 40 + '"]}'}]},
+              {'cyHiddenAttributes': {'n': 'long string ' * 20}},
+              {'status': [{'error': '', 'success': True}]}]
+        data = json.dumps(cx, ensure_ascii=False).encode('utf-8')
+        for size in (1, 2, 3, 7, 64, len(data)):
+            self.assertEqual(_merge(read_cx_fragments(_chunked(data, size))), cx)
+        with self.assertRaises(ValueError):
+            list(read_cx_fragments(_chunked(data[:len(data) // 2], 7)))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            list(read_cx_fragments([b'[{"nodes": [{"@id": 1}']))
+        with self.assertRaises(ValueError):
+            list(read_cx_fragments([b'{"nodes": []}']))
+
+    def test_load_from_server(self):
+        cx_file = path.join(HERE, 'The_RAS_Machine.cx')
+        with open(cx_file, 'r') as f:
+            expected = NdexGraph(json.load(f))
+        with StubNdexServer() as server:
+            server.add_route('GET', '/v2/network/ras', lambda request: StubResponse(file_chunks(cx_file, 4093)))
+            G = NdexGraph(server=server.url, uuid='ras')
+        self.assertEqual(sorted(G.nodes(data=True)), sorted(expected.nodes(data=True)))
+        self.assertEqual(sorted(G.edges(keys=True, data=True)), sorted(expected.edges(keys=True, data=True)))
+        self.assertEqual(G.graph, expected.graph)
+        self.assertEqual(G.support_map, expected.support_map)
+        self.assertEqual(G.unclassified_cx, expected.unclassified_cx)
+        self.assertEqual(G.metadata_original, expected.metadata_original)
+
+    def test_load_missing_network(self):
+        with StubNdexServer() as server:
+            with self.assertRaises(Exception):
+                NdexGraph(server=server.url, uuid='missing')
+
+
+    def test_write_chunks(self):
+        def lazy(n):
+            for i in range(n):
+                yield {'@id': i, 'n': u'β %d' % i}
+        fragments = [{'nodes': lazy(100)}, {'edges': lazy(0)}, {'networkAttributes': []}, {'x': {'a': 1}}]
+        chunks = list(write_cx_chunks(fragments, chunk_size=64))
+        self.assertTrue(len(chunks) > 10)
+        self.assertEqual(json.loads(b''.join(chunks).decode('utf-8')),
+                         [{'nodes': list(lazy(100))}, {'networkAttributes': []}, {'x': {'a': 1}}])
+
+    def test_byte_stream(self):
+        stream = CXByteStream([b'abc', b'', b'defg'])
+        self.assertEqual(stream.read(2), b'ab')
+        self.assertEqual(stream.read(), b'cdefg')
+        self.assertEqual(stream.read(), b'')
+        self.assertEqual(list(CXByteStream([b'[1,', b'2]'])), [b'[1,', b'2]'])
+
+    def test_graph_round_trip(self):
+        with open(path.join(HERE, 'tiny_corpus.cx'), 'r') as f:
+            G = NdexGraph(json.load(f))
+        streamed = json.loads(G.to_cx_stream().read().decode('utf-8'))
+        self.assertEqual(streamed[1], G.to_cx()[1])
+        copy_of_g = NdexGraph(streamed)
+        self.assertEqual(sorted(copy_of_g.nodes(data=True)), sorted(G.nodes(data=True)))
+        self.assertEqual(sorted(copy_of_g.edges(keys=True, data=True)), sorted(G.edges(keys=True, data=True)))
+        self.assertEqual(sorted(copy_of_g.support_map), sorted(G.support_map))
+        self.assertEqual(copy_of_g.function_term_map, G.function_term_map)
+        self.assertEqual(copy_of_g.namespaces, G.namespaces)
+
+    def test_chunks_match_to_cx(self):
+        for name in ('tiny_corpus.cx', 'filtered.cx', 'The_RAS_Machine.cx', 'tiny_network.cx'):
+            with open(path.join(HERE, name), 'r') as f:
+                cx = json.load(f)
+            for G in (NdexGraph(cx), NdexGraph(cx, columnar_attributes=True), NdexGraph()):
+                self.assertEqual(json.loads(b''.join(G.to_cx_chunks(chunk_size=1000)).decode('utf-8')), G.to_cx())
+
+    def test_write_to(self):
+        with open(path.join(HERE, 'filtered.cx'), 'r') as f:
+            G = NdexGraph(json.load(f))
+        fd, filename = tempfile.mkstemp(suffix='.cx')
+        os.close(fd)
+        try:
+            G.write_to(filename)
+            with open(filename, 'r') as f:
+                self.assertEqual(sorted(NdexGraph(json.load(f)).nodes(data=True)), sorted(G.nodes(data=True)))
+        finally:
+            os.remove(filename)
+
+    def test_upload_to(self):
+        with open(path.join(HERE, 'tiny_network.cx'), 'r') as f:
+            G = NdexGraph(json.load(f))
+        with StubNdexServer() as server:
+            server.add_route('POST', '/v2/network', StubResponse(b'http://127.0.0.1/v2/network/abc',
+                                                                 content_type='text/plain'))
+            self.assertEqual(G.upload_to(server.url, 'user', 'password'), 'http://127.0.0.1/v2/network/abc')
+            request = server.requests_to('POST', '/v2/network')[0]
+        self.assertEqual(request.headers.get('Transfer-Encoding'), 'chunked')
+        boundary = request.headers['Content-Type'].split('boundary=')[1].encode('ascii')
+        part = request.body.split(b'--' + boundary)[1]
+        self.assertIn(b'name="CXNetworkStream"', part)
+        cx = json.loads(part.split(b'\r\n\r\n', 1)[1].decode('utf-8'))
+        self.assertEqual(sorted(NdexGraph(cx).edges(keys=True)), sorted(G.edges(keys=True)))
+
+
+if __name__ == '__main__':
+    unittest.main()
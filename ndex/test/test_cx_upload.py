@@ -0,0 +1,75 @@
+import unittest
+import json
+from ndex.cx_stream import read_cx_fragments
+import ndex.client as nc
+from ndex.test.stub_server import StubNdexServer, StubResponse
+
+NETWORK_URL = 'http://127.0.0.1/v2/network/abc'
+
+CX = [{'numberVerification': [{'longNumber': 281474976710655}]},
+      {'nodes': [{'@id': 1, 'n': 'A'}, {'@id': 2, 'n': 'B'}]},
+      {'edges': [{'@id': 3, 's': 1, 't': 2, 'i': 'binds'}]}]
+
+
+def _uploaded_cx(request):
+    # The CX document of the CXNetworkStream part of a multipart request.
+    boundary = request.headers['Content-Type'].split('boundary=')[1].encode('ascii')
+    part = request.body.split(b'--' + boundary)[1]
+    return json.loads(part.split(b'\r\n\r\n', 1)[1].rstrip(b'\r\n').decode('utf-8'))
+
+
+class CXUploadTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubNdexServer().start()
+        self.server.add_route('POST', '/v2/network', StubResponse(NETWORK_URL.encode('ascii'), content_type='text/plain'))
+        self.server.add_route('PUT', '/v2/network/abc', StubResponse(b'', status=204))
+        self.ndex = nc.Ndex(self.server.url, 'user', 'password')
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_save_list(self):
+        self.assertEqual(self.ndex.save_new_network(list(CX)), NETWORK_URL)
+        cx = _uploaded_cx(self.server.requests_to('POST', '/v2/network')[0])
+        self.assertEqual(cx, CX + [{'status': [{'error': '', 'success': True}]}])
+
+    def test_save_generator(self):
+        def fragments():
+            for fragment in CX:
+                yield dict((name, iter(elements)) for name, elements in fragment.items())
+            yield {'status': []}
+        self.assertEqual(self.ndex.save_new_network(fragments()), NETWORK_URL)
+        request = self.server.requests_to('POST', '/v2/network')[0]
+        self.assertEqual(request.headers.get('Transfer-Encoding'), 'chunked')
+        self.assertEqual(_uploaded_cx(request), CX + [{'status': [{'error': '', 'success': True}]}])
+
+    def test_save_byte_chunks(self):
+        data = json.dumps(CX).encode('utf-8')
+        chunks = [data[i:i + 10] for i in range(0, len(data), 10)]
+        self.ndex.save_new_network(iter(chunks))
+        self.assertEqual(_uploaded_cx(self.server.requests_to('POST', '/v2/network')[0]), CX)
+
+    def test_save_empty(self):
+        self.assertRaises(IndexError, self.ndex.save_new_network, [])
+        self.assertRaises(IndexError, self.ndex.save_new_network, iter([]))
+
+    def test_update_with_progress(self):
+        reports = []
+        self.ndex.update_cx_network(read_cx_fragments([json.dumps(CX)]), 'abc',
+                                    progress=lambda sent, elapsed: reports.append((sent, elapsed)))
+        request = self.server.requests_to('PUT', '/v2/network/abc')[0]
+        self.assertEqual(_uploaded_cx(request)[:3], CX)
+        self.assertTrue(reports)
+        self.assertEqual(reports[-1][0], len(request.body))
+        self.assertEqual([sent for sent, _ in reports], sorted(sent for sent, _ in reports))
+
+    def test_uploads_share_session(self):
+        self.ndex.save_new_network(list(CX))
+        self.ndex.update_cx_network(list(CX), 'abc')
+        for request in self.server.requests_to('POST', '/v2/network') + self.server.requests_to('PUT', '/v2/network/abc'):
+            self.assertTrue(request.headers.get('Authorization', '').startswith('Basic '))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ __author__ = 'aarongary'
 
 import unittest
 import ndex
+import ndex.create_aspect
 from ndex.networkn import  FilterSub, NdexGraph
 import json
 
@@ -38,6 +39,152 @@ class NetworkNTests(unittest.TestCase):
         list_of_string = ndex.networkn.data_to_type(['abc'],'list_of_string')
         print(list_of_string)
 
+    def test_parse_attributes(self):
+        long_list = [i / 7.0 for i in range(100)]
+        attributes = [{'n': 'a', 'v': 'x[1]'},
+                      {'n': 'a', 'v': '[1.5]', 'd': 'double'},
+                      {'n': 'a', 'v': 2, 'd': 'float'},
+                      {'n': 'a', 'v': 'TRUE', 'd': 'boolean'},
+                      {'n': 'a', 'v': 0, 'd': 'boolean'},
+                      {'n': 'a', 'v': '[7]', 'd': 'long'},
+                      {'n': 'a', 'v': 'a[b]', 'd': 'string'},
+                      {'n': 'a', 'v': 'ab', 'd': 'byte'},
+                      {'n': 'a', 'v': '[true, false]', 'd': 'list_of_boolean'},
+                      {'n': 'a', 'v': '[1, 2]', 'd': 'list_of_integer'},
+                      {'n': 'a', 'v': '[a, b]', 'd': 'list_of_string'},
+                      {'n': 'a', 'v': [1, '2.5', True], 'd': 'list_of_double'},
+                      {'n': 'a', 'v': long_list, 'd': 'list_of_double'},
+                      {'n': 'a', 'v': [str(v) for v in long_list] + ['1_0'], 'd': 'list_of_float'},
+                      {'n': 'a', 'v': 3, 'd': 'no such type'}]
+        expected = ['x[1]', 1.5, 2.0, True, False, 7, 'ab', b'ab', [True, False], [1, 2], ['a', ' b'],
+                    [1.0, 2.5, 1.0], long_list, long_list + [10.0], None]
+        values = ndex.networkn.parse_attributes(attributes)
+        self.assertEqual(values, expected)
+        self.assertEqual(values, [ndex.networkn.parse_attribute(a) for a in attributes])
+        self.assertEqual([type(v) for v in values[1:6]], [float, float, bool, bool, int])
+        self.assertRaises(ValueError, ndex.networkn.parse_attributes, [{'v': 'x', 'd': 'double'}])
+        self.assertRaises(TypeError, ndex.networkn.parse_attributes, [{'v': long_list + [None], 'd': 'list_of_double'}])
+
+    def test_id_counters(self):
+        from networkx import MultiDiGraph
+        G = NdexGraph()
+        a = G.add_new_node('A')
+        b = G.add_new_node('B')
+        G.add_node(10, name='J')
+        self.assertEqual(G.add_new_node('K'), 11)
+        e = G.add_edge_between(a, b)
+        G.add_edge(a, b)
+        G.add_edge(b, 20, 30)
+        G.add_edge(b, 20, 30, weight=2)
+        G.add_edges_from([(a, 10), (10, 10)])
+        self.assertEqual(G.add_edge_between(a, 11), 31)
+        G.remove_edge(a, 10)
+        G.remove_node(10)
+        G.remove_nodes_from([a, 99])
+        for H in (G, G.subgraph([b, 11, 20]), G.reverse(), NdexGraph(data=G)):
+            self.assertEqual(H.number_of_edges(), MultiDiGraph.number_of_edges(H))
+        self.assertEqual(G.number_of_edges(), 1)
+        self.assertEqual(G.add_new_node('L'), 21)
+        metadata = dict((m['name'], m) for m in G.generate_metadata(G, [])[0]['metaData'])
+        self.assertEqual((metadata['nodes']['elementCount'], metadata['nodes']['idCounter']), (4, 21))
+        self.assertEqual((metadata['edges']['elementCount'], metadata['edges']['idCounter']), (1, 31))
+        G.clear()
+        self.assertEqual(G.add_new_node('A'), 1)
+        self.assertEqual(G.number_of_edges(), 0)
+
+    def test_remove_edges_by_ids(self):
+        cx = [{'citations': [{'@id': 1}, {'@id': 2}]},
+              {'supports': [{'@id': 5, 'citation': 1}]},
+              {'nodes': [{'@id': n} for n in range(5)]},
+              {'edges': [{'@id': 10, 's': 0, 't': 1}, {'@id': 11, 's': 0, 't': 1}, {'@id': 12, 's': 1, 't': 2},
+                         {'@id': 13, 's': 2, 't': 3}]},
+              {'edgeSupports': [{'po': [11, 13], 'supports': [5]}]},
+              {'reifiedEdges': [{'edge': 11, 'node': 3}, {'edge': 12, 'node': 4}]}]
+        G = NdexGraph(cx)
+        G.edge_citation_map = {10: [1], 11: [1], 12: [1, 2]}
+        G.citation_reference_map = {1: 4, 2: 1}
+        self.assertRaises(Exception, G.remove_edges_by_ids, [10, 99])
+        self.assertEqual(G.number_of_edges(), 4)
+
+        G.remove_edges_by_ids([10, 11, 11, 12])
+        self.assertEqual(sorted(G.edges(keys=True)), [(2, 3, 13)])
+        self.assertEqual(G.number_of_edges(), 1)
+        self.assertEqual(sorted(G.edgemap), [13])
+        self.assertEqual((G.succ[0], G.pred[1]), ({}, {}))
+        self.assertEqual(list(G.reified_edges), [])
+        self.assertEqual((G.citation_map, G.citation_reference_map), ({1: {}}, {1: 1}))
+        self.assertEqual(G.support_reference_map, {5: 1})
+
+        G.remove_edge_by_id(13)
+        self.assertEqual((G.number_of_edges(), G.support_map), (0, {}))
+
+    def test_remove_nodes_from(self):
+        cx = [{'citations': [{'@id': 1}, {'@id': 2}]},
+              {'supports': [{'@id': 5, 'citation': 1}]},
+              {'nodes': [{'@id': n, 'n': 'N%d' % n} for n in range(7)]},
+              {'edges': [{'@id': 10, 's': 0, 't': 1}, {'@id': 11, 's': 1, 't': 2}, {'@id': 12, 's': 2, 't': 0},
+                         {'@id': 13, 's': 3, 't': 4}]},
+              {'nodeCitations': [{'po': [0, 1], 'citations': [1]}, {'po': [3], 'citations': [2]}]},
+              {'edgeSupports': [{'po': [10, 13], 'supports': [5]}]},
+              {'reifiedEdges': [{'edge': 13, 'node': 5}, {'edge': 10, 'node': 6}]},
+              {'cartesianLayout': [{'node': n, 'x': n, 'y': n} for n in range(7)]}]
+        G = NdexGraph(cx)
+        G.use_node_index()
+        G.remove_nodes_from(iter([0, 1, 1, 6, 99]))
+        self.assertEqual(sorted(G.nodes()), [2, 3, 4, 5])
+        self.assertEqual(sorted(G.edges(keys=True)), [(3, 4, 13)])
+        self.assertEqual((G.number_of_edges(), sorted(G.edgemap)), (1, [13]))
+        self.assertEqual((G.succ[2], G.pred[2]), ({}, {}))
+        self.assertEqual(sorted(G.pos), [2, 3, 4, 5])
+        self.assertEqual(G.reified_edges, {5: {'edge': 13, 'node': 5}})
+        self.assertEqual((G.citation_reference_map, G.support_reference_map), ({2: 1}, {5: 1}))
+        self.assertEqual(G.get_node_ids('N0'), [])
+        self.assertRaises(Exception, G.remove_node, 0)
+
+        G.remove_orphan_nodes()
+        self.assertEqual(sorted(G.nodes()), [3, 4])
+        G.remove_node(3)
+        self.assertEqual((G.number_of_edges(), G.edgemap, G.support_map, G.citation_map), (0, {}, {}, {}))
+
+    def test_to_cx_fragments(self):
+        G = NdexGraph()
+        for n in range(5):
+            G.add_new_node('N%d' % n, **({'represents': 'R%d' % n} if n % 2 else {}))
+        for n in range(1, 5):
+            G.add_edge(n, n + 1, n, **({'interaction': 'binds'} if n % 2 else {}))
+        cx = G.to_cx()
+        self.assertEqual([len(f['nodes']) for f in cx if 'nodes' in f], [5])
+        self.assertEqual([len(f['edges']) for f in cx if 'edges' in f], [4])
+        self.assertEqual(sorted(ndex.create_aspect.edges(G)[0]['edges'], key=lambda e: e['@id'])[:2],
+                         [{'@id': 1, 's': 1, 't': 2, 'i': 'binds'}, {'@id': 2, 's': 2, 't': 3}])
+        cx = G.to_cx(fragment_size=2)
+        self.assertEqual([len(f['nodes']) for f in cx if 'nodes' in f], [2, 2, 1])
+        self.assertEqual([len(f['edges']) for f in cx if 'edges' in f], [2, 2])
+        H = NdexGraph(cx)
+        self.assertEqual(sorted(H.nodes(data=True)), sorted(G.nodes(data=True)))
+        self.assertEqual(sorted(H.edges(keys=True)), sorted(G.edges(keys=True)))
+        self.assertEqual(ndex.create_aspect.nodes(NdexGraph()), [])
+
+    def test_to_cx_metadata(self):
+        G = NdexGraph()
+        for n in range(4):
+            G.add_new_node('N%d' % n, represents='R%d' % n, score=n * 0.5, tags=['a', 'b'])
+        for n in range(1, 4):
+            G.add_edge_between(n, n + 1, interaction='binds', weight=n, keep=True)
+        G.add_edge(4, 1)
+        cx = G.to_cx()
+        metadata = cx[1]['metaData']
+        self.assertEqual(metadata, G.generate_metadata(G, [])[0]['metaData'])
+        counts = dict((m['name'], m['elementCount']) for m in metadata)
+        self.assertEqual((counts['nodeAttributes'], counts['edgeAttributes']), (8, 6))
+
+        streamed = json.loads(b''.join(G.to_cx_chunks()).decode('utf-8'))
+        for aspect in ('nodes', 'edges', 'nodeAttributes', 'edgeAttributes'):
+            elements = [e for f in cx if aspect in f for e in f[aspect]]
+            self.assertEqual(sorted(elements, key=repr), sorted([e for f in streamed if aspect in f
+                                                                 for e in f[aspect]], key=repr))
+            self.assertEqual(len(elements), counts[aspect])
+
     def test_edge_float_type(self):
         G = NdexGraph()
         n_a = G.add_new_node(name='A')
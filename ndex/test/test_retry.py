@@ -0,0 +1,165 @@
+import unittest
+import json
+import socket
+import requests
+import ndex.client as nc
+from ndex.test.stub_server import StubNdexServer, StubResponse
+from ndex.test.test_cx_upload import CX, NETWORK_URL, _uploaded_cx
+
+LOCKED = {'errorCode': 'NDEx_Concurrent_Modification_Exception', 'message': 'Network is locked'}
+
+
+def _failing(*responses):
+    # A route that answers with responses, one per request, then with 200 {} for good.
+    responses = list(responses)
+    return lambda request: responses.pop(0) if responses else StubResponse({})
+
+
+def _response(status, headers=None, body=b''):
+    response = requests.models.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response._content = body
+    return response
+
+
+class RetryPolicyTests(unittest.TestCase):
+
+    def test_retry_delay(self):
+        policy = nc.RetryPolicy(retries=3, backoff=1, max_backoff=5, jitter=False, budget=None)
+        self.assertEqual([policy.retry_delay('GET', attempt, _response(503)) for attempt in range(4)],
+                         [1, 2, 4, None])
+        self.assertEqual(nc.RetryPolicy(backoff=4, max_backoff=5, jitter=False).retry_delay('GET', 2, _response(502)),
+                         5)
+        self.assertIsNone(policy.retry_delay('GET', 0, _response(200)))
+        self.assertIsNone(policy.retry_delay('GET', 0, _response(404)))
+        self.assertEqual(policy.retry_delay('GET', 0, _response(400, body=json.dumps(LOCKED).encode('utf-8'))), 1)
+
+        # Requests that aren't idempotent are retried only if the server did not act on them.
+        self.assertIsNone(policy.retry_delay('POST', 0, _response(502)))
+        self.assertEqual(policy.retry_delay('POST', 0, _response(503)), 1)
+        self.assertIsNone(policy.retry_delay('POST', 0, error=requests.exceptions.ReadTimeout()))
+        self.assertEqual(policy.retry_delay('POST', 0, error=requests.exceptions.ConnectTimeout()), 1)
+        self.assertEqual(policy.retry_delay('PUT', 0, error=requests.exceptions.ReadTimeout()), 1)
+        # As are bodies that can only be sent once.
+        self.assertIsNone(policy.retry_delay('PUT', 0, _response(503), replayable=False))
+        self.assertIsNone(policy.retry_delay('PUT', 0, error=requests.exceptions.ConnectionError(),
+                                             replayable=False))
+
+        jittered = nc.RetryPolicy(backoff=1)
+        delays = [jittered.retry_delay('GET', 2, _response(503)) for _ in range(10)]
+        self.assertTrue(all(0 <= delay <= 4 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+    def test_retry_after(self):
+        policy = nc.RetryPolicy(max_backoff=10, budget=None)
+        self.assertEqual(policy.retry_delay('GET', 0, _response(429, {'Retry-After': '7'})), 7)
+        self.assertIsNone(policy.retry_delay('GET', 0, _response(429, {'Retry-After': '60'})))
+        self.assertEqual(policy.retry_delay('GET', 0, _response(503, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})),
+                         0)
+        self.assertLessEqual(policy.copy(respect_retry_after=False).retry_delay(
+            'GET', 0, _response(429, {'Retry-After': '60'})), 0.5)
+
+    def test_budget(self):
+        policy = nc.RetryPolicy(backoff=0, budget=0.5, budget_burst=2)
+        # The initial allowance, then one retry per two requests.
+        self.assertEqual([policy.retry_delay('GET', 0, _response(503)) is not None for _ in range(7)],
+                         [True, True, True, False, True, False, True])
+        self.assertIs(policy.copy(retries=10)._budget, policy._budget)
+        self.assertRaises(TypeError, policy.copy, tries=10)
+        # Lock conflicts are retried whatever is left of the budget.
+        locked = _response(400, body=json.dumps(LOCKED).encode('utf-8'))
+        self.assertEqual([policy.retry_delay('DELETE', 1, locked) is not None for _ in range(3)], [True] * 3)
+
+
+class ClientRetryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubNdexServer().start()
+        self.registry = nc.NdexRegistry()
+        self.ndex = nc.Ndex(self.server.url, 'user', 'password', registry=self.registry,
+                            retry_policy=nc.RetryPolicy(backoff=0.01, budget=None))
+
+    def tearDown(self):
+        self.registry.clear()
+        self.server.stop()
+
+    def test_verbs(self):
+        self.server.add_route('GET', '/v2/network/abc/summary',
+                              _failing(StubResponse({}, status=503), StubResponse({}, status=502)))
+        self.server.add_route('GET', '/v2/network/abc', _failing(StubResponse({}, status=504)))
+        self.server.add_route('PUT', '/v2/network/abc/properties', _failing(StubResponse(LOCKED, status=400)))
+        self.server.add_route('POST', '/v2/search/network', _failing(StubResponse({}, status=502)))
+        self.assertEqual(self.ndex.get_network_summary('abc'), {})
+        self.assertEqual(self.ndex.get_network_as_cx_stream('abc').json(), {})
+        self.assertEqual(self.ndex.set_network_properties('abc', []), {})
+        self.assertRaises(requests.exceptions.HTTPError, self.ndex.search_networks, 'kinase')
+        self.assertEqual([len(self.server.requests_to(method, path)) for method, path in
+                          (('GET', '/v2/network/abc/summary'), ('GET', '/v2/network/abc'),
+                           ('PUT', '/v2/network/abc/properties'), ('POST', '/v2/search/network'))],
+                         [3, 2, 2, 1])
+
+        self.ndex.retry_policy = None
+        self.server.add_route('GET', '/v2/network/abc/summary', _failing(StubResponse({}, status=503)))
+        self.assertRaises(requests.exceptions.HTTPError, self.ndex.get_network_summary, 'abc')
+
+    def test_multipart(self):
+        self.server.add_route('POST', '/v2/network', _failing(
+            StubResponse({}, status=503), StubResponse(NETWORK_URL.encode('ascii'), content_type='text/plain')))
+        # An encoded document is sent again ...
+        self.assertEqual(self.ndex.save_new_network(json.dumps(CX).encode('utf-8')), NETWORK_URL)
+        uploads = self.server.requests_to('POST', '/v2/network')
+        self.assertEqual(len(uploads), 2)
+        self.assertEqual(_uploaded_cx(uploads[0]), CX)
+        self.assertEqual(_uploaded_cx(uploads[1]), CX)
+
+        # ... but a network being encoded as it is sent is not.
+        self.server.add_route('POST', '/v2/network', _failing(StubResponse({}, status=503)))
+        self.assertRaises(requests.exceptions.HTTPError, self.ndex.save_new_network, list(CX))
+        self.assertEqual(len(self.server.requests_to('POST', '/v2/network')), 3)
+
+    def test_connection_refused(self):
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        url = 'http://127.0.0.1:%d' % listener.getsockname()[1]
+        listener.close()
+        delays = []
+
+        class Recording(nc.RetryPolicy):
+            def retry_delay(self, method, attempt, response=None, error=None, replayable=True):
+                delay = nc.RetryPolicy.retry_delay(self, method, attempt, response, error, replayable)
+                delays.append(delay)
+                return delay
+
+        client = nc.Ndex(url, 'user', 'password', registry=self.registry,
+                         retry_policy=Recording(retries=2, backoff=0.01, budget=None))
+        client.host, client.version = url + '/v2', '2.0'
+        self.assertRaises(requests.exceptions.ConnectionError, client.save_new_network, list(CX))
+        self.assertEqual(len(delays), 3)
+        self.assertIsNone(delays[-1])
+
+    def test_delete_network(self):
+        self.server.add_route('DELETE', '/v2/network/abc', _failing(StubResponse(LOCKED, status=400),
+                                                                    StubResponse(LOCKED, status=400),
+                                                                    StubResponse(b'', status=204)))
+        self.assertEqual(self.ndex.delete_network('abc'), "")
+        self.assertEqual(len(self.server.requests_to('DELETE', '/v2/network/abc')), 3)
+
+        self.server.add_route('DELETE', '/v2/network/abc', StubResponse(LOCKED, status=400))
+        with self.assertRaises(Exception) as context:
+            self.ndex.delete_network('abc', retry=1)
+        self.assertEqual(str(context.exception), "Network is locked after 1 retries.")
+
+    def test_delete_network_without_budget(self):
+        policy = nc.RetryPolicy(backoff=0.01, budget=0.1, budget_burst=1)
+        ndex = nc.Ndex(self.server.url, 'user', 'password', registry=self.registry, retry_policy=policy)
+        self.server.add_route('GET', '/v2/network/abc/summary', _failing(StubResponse({}, status=503)))
+        ndex.get_network_summary('abc')
+        self.assertIsNone(policy.retry_delay('GET', 0, _response(503)))
+        self.server.add_route('DELETE', '/v2/network/abc', _failing(*[StubResponse(LOCKED, status=400)] * 4))
+        ndex.delete_network('abc')
+        self.assertEqual(len(self.server.requests_to('DELETE', '/v2/network/abc')), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
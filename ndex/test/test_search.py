@@ -0,0 +1,87 @@
+import unittest
+import threading
+import ndex.client as nc
+from ndex.test.stub_server import StubNdexServer, StubResponse
+
+NETWORKS = [{'externalId': 'uuid-%04d' % n, 'name': 'network %d' % n} for n in range(2345)]
+
+
+def search_route(networks, pages=None):
+    # Answer /search/network like NDEx: start is the number of pages of size to skip.
+    def search(request):
+        start, size = int(request.query['start'][0]), int(request.query['size'][0])
+        if pages is not None:
+            pages.append(start)
+        return {'numFound': len(networks), 'start': start, 'networks': networks[start * size:(start + 1) * size]}
+    return search
+
+
+class SearchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubNdexServer().start()
+        self.pages = []
+        self.server.add_route('POST', '/v2/search/network', search_route(NETWORKS, self.pages))
+        self.registry = nc.NdexRegistry()
+        self.ndex = nc.Ndex(self.server.url, registry=self.registry)
+
+    def tearDown(self):
+        self.registry.clear()
+        self.server.stop()
+
+    def test_iter_networks(self):
+        self.assertEqual(list(self.ndex.iter_networks('kinase', page_size=500)), NETWORKS)
+        self.assertEqual(self.pages, [0, 1, 2, 3, 4])
+        self.assertEqual(self.server.requests_to('POST', '/v2/search/network')[0].json(), {'searchString': 'kinase'})
+
+        del self.pages[:]
+        self.assertEqual(list(self.ndex.iter_networks(page_size=100, limit=250)), NETWORKS[:250])
+        self.assertEqual(self.pages, [0, 1, 2])
+        del self.pages[:]
+        self.assertEqual(list(self.ndex.iter_networks(limit=40)), NETWORKS[:40])
+        self.assertEqual(self.pages, [0])
+
+    def test_exact_pages(self):
+        self.server.add_route('POST', '/v2/search/network', search_route(NETWORKS[:300], self.pages))
+        self.assertEqual(list(self.ndex.iter_networks(page_size=100)), NETWORKS[:300])
+        self.assertEqual(self.pages, [0, 1, 2])
+        self.server.add_route('POST', '/v2/search/network', {'numFound': 0, 'networks': []})
+        self.assertEqual(list(self.ndex.iter_networks()), [])
+
+    def test_prefetch(self):
+        # The second page is requested while the caller still works on the first.
+        networks = self.ndex.iter_networks(page_size=1000)
+        next(networks)
+        requested = threading.Event()
+        for _ in range(100):
+            if len(self.pages) == 2:
+                requested.set()
+                break
+            requested.wait(0.01)
+        self.assertTrue(requested.is_set(), self.pages)
+        self.assertEqual(len(list(networks)), len(NETWORKS) - 1)
+
+        del self.pages[:]
+        networks = self.ndex.iter_networks(page_size=1000, prefetch=False)
+        next(networks)
+        self.assertEqual(self.pages, [0])
+
+    def test_page_error(self):
+        failing = search_route(NETWORKS)
+        self.server.add_route('POST', '/v2/search/network', lambda request: failing(request)
+                              if request.query['start'] == ['0'] else StubResponse({}, status=400))
+        networks = self.ndex.iter_networks(page_size=100)
+        self.assertEqual(len([next(networks) for _ in range(100)]), 100)
+        self.assertRaises(Exception, next, networks)
+
+    def test_user_networks(self):
+        # Accounts with more than 1000 networks are listed completely.
+        self.assertEqual(self.ndex.get_network_summaries_for_user('user'), NETWORKS)
+        self.assertEqual(self.ndex.get_network_ids_for_user('user'), [n['externalId'] for n in NETWORKS])
+        self.assertEqual(self.ndex.get_network_ids_for_user('user', limit=3), ['uuid-0000', 'uuid-0001', 'uuid-0002'])
+        self.assertEqual(self.server.requests_to('POST', '/v2/search/network')[0].json(),
+                         {'searchString': '', 'accountName': 'user'})
+
+
+if __name__ == '__main__':
+    unittest.main()
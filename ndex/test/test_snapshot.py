@@ -0,0 +1,124 @@
+import unittest
+import io
+import json
+import os
+import shutil
+import tempfile
+import networkx as nx
+from ndex.networkn import NdexGraph
+import ndex.snapshot as snapshot
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_cx(name, **kwargs):
+    with open(os.path.join(HERE, name), 'r') as f:
+        return NdexGraph(json.load(f), **kwargs)
+
+
+@unittest.skipIf(snapshot.msgpack is None, "msgpack is not available")
+class SnapshotTests(unittest.TestCase):
+
+    def assertSameGraph(self, G, H):
+        self.assertIs(type(H), NdexGraph)
+        self.assertEqual(list(H.node.items()), list(G.node.items()))
+        self.assertEqual(sorted(H.edges(keys=True, data=True)), sorted(G.edges(keys=True, data=True)))
+        self.assertEqual(H.succ, G.succ)
+        self.assertEqual(H.pred, G.pred)
+        self.assertEqual(H.graph, G.graph)
+        self.assertEqual(H.edgemap, G.edgemap)
+        for name in snapshot._FIELDS:
+            self.assertEqual(getattr(H, name), getattr(G, name), name)
+        for name in ('node_attribute_store', 'edge_attribute_store'):
+            G_store, H_store = getattr(G, name), getattr(H, name)
+            self.assertEqual(H_store is None, G_store is None)
+            if G_store is not None:
+                self.assertEqual(sorted(H_store.names()), sorted(G_store.names()))
+                for attribute in G_store.names():
+                    self.assertEqual(list(H_store.items(attribute)), list(G_store.items(attribute)))
+                    self.assertEqual(H_store.columns[attribute].data_type, G_store.columns[attribute].data_type)
+                    self.assertEqual(H_store.columns[attribute].value_type, G_store.columns[attribute].value_type)
+        self.assertEqual(H.to_cx(), G.to_cx())
+
+    def round_trip(self, G):
+        H = snapshot.loads(snapshot.dumps(G))
+        self.assertSameGraph(G, H)
+        return H
+
+    def test_cx_networks(self):
+        for name in ('The_RAS_Machine.cx', 'A549-SL-network.cx', 'tiny_corpus.cx', 'filtered.cx'):
+            G = load_cx(name)
+            self.round_trip(G)
+            self.round_trip(load_cx(name, columnar_attributes=True))
+
+    def test_attribute_types(self):
+        G = NdexGraph()
+        a = G.add_new_node('a', {'int': 1, 'float': 1.0, 'bool': True, 'text': u'β', 'list': [1.5, 2.5],
+                                 'strings': ['x', 'y'], 'big': 2 ** 62, 'negative': -3})
+        b = G.add_new_node('b')
+        edge_id = G.add_edge_between(a, b, 'binds', {'weight': 0.5, 'pair': (1, 2)})
+        G.set_network_attribute('version', 2)
+        H = self.round_trip(G)
+        for name, value_type in (('int', int), ('float', float), ('bool', bool), ('list', list)):
+            self.assertIs(type(H.node[a][name]), value_type)
+        self.assertIs(type(H.edge[a][b][edge_id]['pair']), tuple)
+
+        G.use_attribute_store()
+        G.set_node_attribute(b, 'score', 3)
+        G.set_node_attribute(b, 'mixed', 'x')
+        G.set_node_attribute(a, 'mixed', 2.0)
+        H = self.round_trip(G)
+        self.assertEqual(H.get_node_attribute_value_by_id(a, 'big'), 2 ** 62)
+        self.assertIs(type(H.get_node_attribute_value_by_id(a, 'float')), float)
+
+    def test_state(self):
+        G = load_cx('The_RAS_Machine.cx', columnar_attributes=True)
+        G.use_node_index()
+        G.pos[G.max_node_id] = (1.0, 2.0)
+        for node_id in list(G.nodes())[:10]:
+            G.remove_node(node_id)
+        H = self.round_trip(G)
+        self.assertIsNotNone(H.node_index)
+        name = G.node[G.nodes()[0]]['name']
+        self.assertEqual(H.get_node_ids(name), G.get_node_ids(name))
+
+        # The restored graph goes on where the original left off.
+        node_id = H.add_new_node('new')
+        self.assertEqual(node_id, G.add_new_node('new'))
+        self.assertEqual(H.add_edge_between(node_id, H.nodes()[0]), G.add_edge_between(node_id, G.nodes()[0]))
+        self.assertSameGraph(G, H)
+
+    def test_networkx_graphs(self):
+        G = NdexGraph(networkx_G=nx.karate_club_graph())
+        self.round_trip(G)
+        G = NdexGraph(data=nx.MultiDiGraph([(('a', 1), ('b', 2)), (('b', 2), ('c', 3))]))
+        self.round_trip(G)
+        G.clear()
+        self.round_trip(G)
+
+    def test_files(self):
+        directory = tempfile.mkdtemp()
+        try:
+            G = load_cx('The_RAS_Machine.cx')
+            path = os.path.join(directory, 'ras.ndexsnap')
+            G.write_snapshot(path)
+            self.assertSameGraph(G, NdexGraph.read_snapshot(path))
+            G.write_to(os.path.join(directory, 'ras.cx'))
+            self.assertLess(os.path.getsize(path), os.path.getsize(os.path.join(directory, 'ras.cx')))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_errors(self):
+        data = snapshot.dumps(load_cx('tiny_network.cx'))
+        self.assertRaises(ValueError, snapshot.loads, b'[{"nodes": []}]')
+        self.assertRaises(ValueError, snapshot.loads, data[:len(data) // 2])
+        self.assertRaises(ValueError, snapshot.loads, snapshot.MAGIC + snapshot._pack({'version': 99}))
+        self.assertRaises(ValueError, snapshot.loads, snapshot.MAGIC + snapshot._pack({'version': 1}))
+        self.assertRaises(ValueError, snapshot.loads,
+                          snapshot.MAGIC + snapshot._pack({'version': 1, 'code': snapshot.msgpack.ExtType(42, b'')}))
+        self.assertRaises(TypeError, snapshot.dumps, NdexGraph(data=nx.MultiDiGraph([(1, 2, {'x': object()})])))
+        self.assertSameGraph(load_cx('tiny_network.cx'), snapshot.load(io.BytesIO(data)))
+
+
+if __name__ == '__main__':
+    unittest.main()
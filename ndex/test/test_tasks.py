@@ -0,0 +1,92 @@
+import unittest
+import threading
+import ndex.client as nc
+from ndex.test.stub_server import StubNdexServer, StubResponse
+
+try:
+    from ndex.tasks import TaskWaiter
+    import concurrent.futures
+except ImportError:
+    TaskWaiter = None
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+
+@unittest.skipIf(TaskWaiter is None, "concurrent.futures is not available")
+class TaskWaiterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubNdexServer().start()
+        self.lock = threading.Lock()
+        self.polls = {}
+        self.registry = nc.NdexRegistry()
+        self.ndex = nc.Ndex(self.server.url, 'user', 'password', registry=self.registry, retry_policy=None)
+        self.waiter = TaskWaiter(self.ndex, first_interval=0.01, fast_polls=2, backoff=2, max_interval=0.05,
+                                 coalesce=0.01)
+
+    def tearDown(self):
+        self.waiter.close()
+        self.registry.clear()
+        self.server.stop()
+
+    def add_task(self, task_id, polls, status='COMPLETED'):
+        # A task that is done on its polls-th poll.
+        def task(request):
+            with self.lock:
+                count = self.polls[task_id] = self.polls.get(task_id, 0) + 1
+            return {'externalId': task_id, 'status': status if count >= polls else 'PROCESSING'}
+        self.server.add_route('GET', '/v2/task/' + task_id, task)
+
+    def test_intervals(self):
+        waiter = TaskWaiter(self.ndex, first_interval=1, fast_polls=3, backoff=2, max_interval=10)
+        waiter.close()
+        self.assertEqual([waiter.interval(polls) for polls in range(8)], [1, 1, 1, 2, 4, 8, 10, 10])
+
+    def test_wait(self):
+        for n in range(20):
+            self.add_task('t%d' % n, n % 5 + 1)
+        self.add_task('failing', 2, status='FAILED')
+        futures = dict(('t%d' % n, self.waiter.wait('t%d' % n)) for n in range(20))
+        self.assertEqual([task['status'] for task in self.waiter.wait_all(sorted(futures), timeout=10)],
+                         ['COMPLETED'] * 20)
+        for task_id, future in futures.items():
+            self.assertEqual(future.result()['externalId'], task_id)
+        self.assertEqual(self.polls, dict(('t%d' % n, n % 5 + 1) for n in range(20)))
+        self.assertEqual(self.waiter.wait('failing').result(10)['status'], 'FAILED')
+
+    def test_shared_polls(self):
+        self.add_task('shared', 3)
+        futures = [self.waiter.wait('shared') for _ in range(5)]
+        self.assertTrue(all(future is futures[0] for future in futures))
+        futures[0].result(10)
+        self.assertEqual(self.polls['shared'], 3)
+
+    def test_errors(self):
+        self.server.add_route('GET', '/v2/task/broken', StubResponse({'errorCode': 'NDEx_Object_Not_Found'},
+                                                                     status=404))
+        self.assertRaises(Exception, self.waiter.wait('broken').result, 10)
+        self.add_task('slow', 1000)
+        self.assertRaises(concurrent.futures.TimeoutError, self.waiter.wait_all, ['slow'], 0.1)
+        future = self.waiter.wait('slow')
+        self.waiter.close()
+        self.assertTrue(future.cancelled())
+        self.assertRaises(RuntimeError, self.waiter.wait, 'slow')
+
+    @unittest.skipIf(asyncio is None, "asyncio is not available")
+    def test_async(self):
+        self.add_task('a', 2)
+        self.add_task('b', 3)
+        loop = asyncio.new_event_loop()
+        try:
+            tasks = loop.run_until_complete(asyncio.gather(self.waiter.wait_async('a', loop=loop),
+                                                           self.waiter.wait_async('b', loop=loop)))
+        finally:
+            loop.close()
+        self.assertEqual([task['externalId'] for task in tasks], ['a', 'b'])
+
+
+if __name__ == '__main__':
+    unittest.main()